@@ -0,0 +1,160 @@
+import os
+import math
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Interactive agent requests running at once per worker, and how many may wait for a slot
+ADMISSION_MAX_CONCURRENT = int(os.environ.get('ADMISSION_MAX_CONCURRENT', '8'))
+ADMISSION_MAX_QUEUE = int(os.environ.get('ADMISSION_MAX_QUEUE', '32'))
+ADMISSION_MAX_WAIT = float(os.environ.get('ADMISSION_MAX_WAIT', '10'))
+# Per-owner token bucket: sustained agent calls per second and the burst allowed on top
+ADMISSION_OWNER_RATE = float(os.environ.get('ADMISSION_OWNER_RATE', '0.5'))
+ADMISSION_OWNER_BURST = float(os.environ.get('ADMISSION_OWNER_BURST', '20'))
+ANONYMOUS_OWNER = "anonymous"
+
+class AdmissionRejected(Exception):
+    """Raised when a request is over its owner's quota or the wait queue is full"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, cost: float) -> float:
+        """Spend cost tokens; returns 0, or the seconds until enough tokens are available.
+
+        A cost above the burst can never be covered, so it is taken in full once the bucket is full:
+        the balance goes negative and later requests wait until it is paid back.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= min(cost, self.burst):
+            self.tokens -= cost
+            return 0.0
+        needed = min(cost, self.burst) - self.tokens
+        return needed / self.rate if self.rate > 0 else float('inf')
+
+class AdmissionController:
+    """Gate in front of agent endpoints: per-owner quotas, a global concurrency limit and a bounded wait queue"""
+
+    def __init__(self, max_concurrent: int = ADMISSION_MAX_CONCURRENT, max_queue: int = ADMISSION_MAX_QUEUE,
+                 max_wait: float = ADMISSION_MAX_WAIT, owner_rate: float = ADMISSION_OWNER_RATE,
+                 owner_burst: float = ADMISSION_OWNER_BURST):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.owner_rate = owner_rate
+        self.owner_burst = owner_burst
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queue_seen = 0
+        self.admitted = 0
+        self.background = 0
+        self.rejected = {"quota": 0, "queue_full": 0, "wait_timeout": 0}
+        self.waits: Deque[float] = deque(maxlen=500)
+        self.holds: Deque[float] = deque(maxlen=100)
+
+    def charge(self, owner_id: Optional[str], cost: float = 1.0):
+        """Take cost from the owner's bucket or raise AdmissionRejected with the time until it refills"""
+        owner = owner_id or ANONYMOUS_OWNER
+        bucket = self.buckets.get(owner)
+        if bucket is None:
+            bucket = self.buckets[owner] = TokenBucket(self.owner_rate, self.owner_burst)
+        wait = bucket.take(cost)
+        if wait:
+            self.rejected["quota"] += 1
+            raise AdmissionRejected(f"Agent quota exceeded for {owner}", wait)
+
+    def _retry_after(self) -> float:
+        hold = sum(self.holds) / len(self.holds) if self.holds else 1.0
+        return hold * (self.queued + 1) / self.max_concurrent
+
+    async def acquire(self, owner_id: Optional[str], cost: float = 1.0):
+        """Charge the owner and take a concurrency slot, waiting in the bounded queue if needed"""
+        busy = self.semaphore.locked()
+        if busy and self.queued >= self.max_queue:
+            self.rejected["queue_full"] += 1
+            raise AdmissionRejected("Agent queue is full", self._retry_after())
+        self.charge(owner_id, cost)
+        started = time.monotonic()
+        if not busy:
+            # A free slot is taken without suspending, so the queue only holds real waiters
+            await self.semaphore.acquire()
+        else:
+            self.queued += 1
+            self.max_queue_seen = max(self.max_queue_seen, self.queued)
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), timeout=self.max_wait)
+            except asyncio.TimeoutError:
+                self.rejected["wait_timeout"] += 1
+                raise AdmissionRejected("Timed out waiting for an agent slot", self._retry_after())
+            finally:
+                self.queued -= 1
+        self.waits.append(time.monotonic() - started)
+        self.in_flight += 1
+        self.admitted += 1
+        return time.monotonic()
+
+    def release(self, admitted_at: float):
+        self.holds.append(time.monotonic() - admitted_at)
+        self.in_flight -= 1
+        self.semaphore.release()
+
+    @asynccontextmanager
+    async def admit(self, owner_id: Optional[str], cost: float = 1.0):
+        admitted_at = await self.acquire(owner_id, cost)
+        try:
+            yield
+        finally:
+            self.release(admitted_at)
+
+    @asynccontextmanager
+    async def slot(self):
+        """A concurrency slot for background agent work (jobs, bulk runs), already charged to its owner.
+
+        Waits as long as it takes rather than being rejected, since nobody is holding a connection open.
+        """
+        await self.semaphore.acquire()
+        self.in_flight += 1
+        self.background += 1
+        admitted_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(admitted_at)
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self.waits)
+
+        def percentile(p: float) -> float:
+            return round(waits[min(len(waits) - 1, int(p / 100 * len(waits)))] * 1000, 1) if waits else 0.0
+
+        return {
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queued,
+            "max_queue_depth": self.max_queue_seen,
+            "queue_limit": self.max_queue,
+            "admitted": self.admitted,
+            "background": self.background,
+            "rejected": self.rejected,
+            "wait_ms_p50": percentile(50),
+            "wait_ms_p95": percentile(95),
+            "owners": len(self.buckets)
+        }
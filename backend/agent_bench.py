@@ -0,0 +1,83 @@
+"""Agent benchmark: run inquiries through the Intake Agent and report latency, throughput and parse success.
+
+Pair with the runtime's record/replay layer to benchmark offline:
+    AGENT_REPLAY_MODE=record python agent_bench.py inquiries.ndjson    # live calls, captured to fixtures
+    AGENT_REPLAY_MODE=replay python agent_bench.py inquiries.ndjson    # served from fixtures, no API key needed
+    AGENT_REPLAY_MODE=replay AGENT_REPLAY_LATENCY=lognormal:1200:0.6 python agent_bench.py inquiries.ndjson
+
+Compare a prompt or model change by recording with each variant (e.g. different AGENT_MODEL_* settings)
+into separate AGENT_FIXTURE_DIR directories and replaying each.
+"""
+import json
+import time
+import asyncio
+import logging
+import argparse
+from collections import Counter
+from typing import Any, Dict, List
+
+from bulk_intake import iter_messages
+from agents.intake_agent import IntakeAgent
+from agents.fast_path import FastPathExtractor
+from agents.preprocess import InquiryPreprocessor
+
+def percentile(samples: List[float], p: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+async def run_benchmark(texts: List[str], concurrency: int, fast_path: bool) -> Dict[str, Any]:
+    # No intake cache, so every inquiry exercises the agent path being measured
+    agent = IntakeAgent(
+        fast_path=FastPathExtractor() if fast_path else None,
+        preprocessor=InquiryPreprocessor()
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def process(text: str):
+        async with semaphore:
+            started = time.perf_counter()
+            result = await agent.process_inquiry(text)
+            latencies.append(time.perf_counter() - started)
+            statuses[result.get("status", "unknown")] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(process(text) for text in texts))
+    elapsed = time.perf_counter() - started
+
+    runtime = agent.runtime.stats()
+    return {
+        "inquiries": len(texts),
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(len(texts) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 1),
+            "p95": round(percentile(latencies, 95) * 1000, 1),
+            "p99": round(percentile(latencies, 99) * 1000, 1),
+            "max": round(max(latencies, default=0.0) * 1000, 1)
+        },
+        "statuses": dict(statuses),
+        "routes": agent.router.stats()["routes"],
+        "intake": agent.stats(),
+        "replay": runtime["replay"],
+        "hedging": runtime["hedging"]
+    }
+
+async def _main(args):
+    texts = list(iter_messages(args.path, args.format))[:args.limit or None]
+    report = await run_benchmark(texts, args.concurrency, args.fast_path)
+    print(json.dumps(report, default=str, indent=2))
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description="Benchmark the Intake Agent (live, recording or replaying)")
+    parser.add_argument("path", help="mbox file, maildir directory or NDJSON file of inquiries")
+    parser.add_argument("--format", choices=["mbox", "maildir", "ndjson"], help="Input format (detected if omitted)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--limit", type=int, default=0, help="Only run the first N inquiries")
+    parser.add_argument("--fast-path", action="store_true", help="Enable the rule-based fast path")
+    asyncio.run(_main(parser.parse_args()))
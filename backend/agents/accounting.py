@@ -0,0 +1,75 @@
+import logging
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Agent calls made while handling the current request or job, persisted with its agent_events trace_id.
+# Nothing is collected until begin_calls() is called in that context.
+_calls: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar('agent_calls', default=None)
+
+def percentile(samples: List[float], p: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))], 1)
+
+def begin_calls():
+    """Start collecting agent calls for the current request or job"""
+    _calls.set([])
+
+def drain_calls() -> List[Dict[str, Any]]:
+    """Calls collected so far in this context; the collector is emptied but stays active"""
+    calls = _calls.get()
+    if not calls:
+        return []
+    taken = list(calls)
+    calls.clear()
+    return taken
+
+def record_call(agent: str, source: str = "model", **fields: Any) -> Optional[Dict[str, Any]]:
+    """Add one call record: source is model, cache, fast_path, engine or fallback"""
+    calls = _calls.get()
+    if calls is None:
+        return None
+    record = {
+        "agent": agent,
+        "source": source,
+        "model": None,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "cache_write_tokens": 0,
+        "cache_read_tokens": 0,
+        "wall_ms": 0.0,
+        "ttft_ms": None,
+        "attempts": 0,
+        "parse_ok": None,
+        "error": None,
+        "fallback_reason": None,
+        "created_at": datetime.utcnow(),
+        **fields
+    }
+    calls.append(record)
+    return record
+
+def annotate_last(agent: str, **fields: Any):
+    """Update the most recent model call of an agent, e.g. with its parse outcome"""
+    for record in reversed(_calls.get() or []):
+        if record["agent"] == agent and record["source"] == "model":
+            record.update(fields)
+            return
+
+def record_fallback(agent: str, error: Exception):
+    """Note that an agent returned canned output, and why"""
+    reason = f"{type(error).__name__}: {error}"[:300]
+    logger.info(f"{agent} agent fell back: {reason}")
+    calls = _calls.get() or []
+    last = next((record for record in reversed(calls) if record["agent"] == agent), None)
+    # A failed or unparseable model call carries its own fallback reason; otherwise it was
+    # refused before any call was made (circuit open, replay miss, bad input)
+    if last is not None and last["source"] == "model" and (last["error"] or last["parse_ok"] is False) \
+            and last["fallback_reason"] is None:
+        last["fallback_reason"] = reason
+    else:
+        record_call(agent, source="fallback", fallback_reason=reason)
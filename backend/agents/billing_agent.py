@@ -2,9 +2,17 @@ import os
 import json
 import logging
 import uuid
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
-import anthropic
+from agents.runtime import get_runtime, cacheable_system
+from agents.routing import get_router
+from agents.context import get_context_builder, PROJECT_FIELDS
+from agents.invoice_engine import InvoiceEngine, invoice_details, priced_line_items
+from agents.accounting import record_call, record_fallback
+
+# Projects per batched line-item call in bulk invoicing runs
+BILLING_BATCH_SIZE = int(os.environ.get('BILLING_BATCH_SIZE', '10'))
+BILLING_BATCH_CONCURRENCY = int(os.environ.get('BILLING_BATCH_CONCURRENCY', '4'))
 
 logger = logging.getLogger(__name__)
 
@@ -21,9 +29,13 @@ def clean_claude_response(response: str) -> str:
 
 class BillingAgent:
     def __init__(self):
-        self.client = anthropic.Anthropic(
-            api_key=os.environ['CLAUDE_API_KEY']
-        )
+        self.runtime = get_runtime()
+        self.router = get_router()
+        self.context = get_context_builder()
+        self.engine = InvoiceEngine()
+        self.llm_calls = 0
+        self.batch_calls = 0
+        self.batched_invoices = 0
         self.system_message = """You are an expert AI billing agent specializing in professional invoice generation for freelance projects, compliant with California business and tax regulations.
 
 Your task is to analyze project information and create detailed, professional, legally-compliant invoices with appropriate line item breakdowns.
@@ -123,12 +135,30 @@ Return JSON in this exact structure:
     "late_fee": "1.5"
 }"""
     
-    async def generate_invoice_data(self, project_data: Dict[str, Any], amount: float, mode: str) -> Dict[str, Any]:
+    def derive_from_contract(self, project_data: Dict[str, Any], amount: float, mode: str,
+                             contract_variables: Optional[Dict[str, Any]] = None, sequence: int = 0,
+                             contract_signed: bool = False) -> Optional[Dict[str, Any]]:
+        """Invoice details from the contract alone (no model call), or None when it has nothing usable"""
+        details = self.engine.derive(contract_variables, amount, mode, project_data, sequence, contract_signed)
+        if details is not None:
+            record_call("billing", source="engine")
+        return details
+
+    async def generate_invoice_data(self, project_data: Dict[str, Any], amount: float, mode: str,
+                                    contract_variables: Optional[Dict[str, Any]] = None,
+                                    sequence: int = 0, contract_signed: bool = False) -> Dict[str, Any]:
+        # Contract milestones and payment terms already define the invoice; the model is only
+        # needed when there is no usable contract (or for hourly billing)
+        details = self.derive_from_contract(project_data, amount, mode, contract_variables, sequence, contract_signed)
+        if details is not None:
+            return details
+
+        self.llm_calls += 1
         try:
             prompt = f"""Generate a professional invoice for the following project:
 
 PROJECT DETAILS:
-{json.dumps(project_data, indent=2)}
+{self.context.render("billing", project_data, PROJECT_FIELDS)}
 
 BILLING INFORMATION:
 - Total Amount: ${amount}
@@ -145,20 +175,17 @@ INSTRUCTIONS:
 
 Ensure ALL required fields are present in your JSON response."""
             
-            response = self.client.messages.create(
-                model="claude-3-opus-20240229",
+            # Clean and parse JSON response; unparseable output escalates to the next model tier
+            route = self.router.route("billing", len(prompt), budget=amount)
+            result = await self.router.call_json(
+                self.runtime,
+                route,
+                lambda content: json.loads(clean_claude_response(content)),
                 max_tokens=1000,
-                system=self.system_message,
+                system=cacheable_system(self.system_message),
                 messages=[{"role": "user", "content": prompt}]
             )
             
-            # Get response content
-            content = response.content[0].text
-            
-            # Clean and parse JSON response
-            cleaned_response = clean_claude_response(content)
-            result = json.loads(cleaned_response)
-            
             # GUARANTEE required fields exist
             today = datetime.utcnow()
             due_date = today + timedelta(days=30)
@@ -175,6 +202,7 @@ Ensure ALL required fields are present in your JSON response."""
             
         except Exception as e:
             logger.error(f"Billing agent error: {e}")
+            record_fallback("billing", e)
             # Enhanced fallback with due_date
             today = datetime.utcnow()
             due_date = today + timedelta(days=30)
@@ -201,4 +229,64 @@ Ensure ALL required fields are present in your JSON response."""
                 "payment_instructions": "Payment is due within 30 days of invoice date. Please remit payment via the specified payment method. Late payments subject to 1.5% monthly fee. For questions, please contact the service provider. Thank you for your business.",
                 "net_terms": "30",
                 "late_fee": "1.5"
-            }
\ No newline at end of file
+            }
+
+    async def generate_line_items_batch(self, entries: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Line items for several projects in one call.
+
+        entries hold project, amount and mode. Returns invoice details per entry, in order, or None
+        for entries whose line items were missing or did not add up, so the caller can retry them alone.
+        """
+        projects = "\n".join(
+            f'- ref "{i}": {self.context.render("billing", entry["project"], PROJECT_FIELDS)} '
+            f'| Total Amount: ${entry["amount"]} | Billing Mode: {entry["mode"]}'
+            for i, entry in enumerate(entries)
+        )
+        prompt = f"""Generate invoice line items for each of the following {len(entries)} projects:
+
+{projects}
+
+INSTRUCTIONS:
+1. Create 3-5 specific line items per project based on its actual requirements
+2. The line item amounts of each project must sum exactly to its Total Amount
+3. Dates, invoice numbers and payment terms are filled in separately; do not include them
+
+Return ONLY JSON in this structure, with one entry per ref:
+{{"invoices": [{{"ref": "0", "project_description": "Brief professional description", "line_items": [{{"description": "...", "amount": 0.00}}]}}]}}"""
+
+        self.batch_calls += 1
+        try:
+            route = self.router.route("billing", len(prompt), budget=sum(entry["amount"] for entry in entries))
+            result = await self.router.call_json(
+                self.runtime,
+                route,
+                lambda content: json.loads(clean_claude_response(content)),
+                max_tokens=200 + 350 * len(entries),
+                system=cacheable_system(self.system_message),
+                messages=[{"role": "user", "content": prompt}]
+            )
+            by_ref = {str(item.get("ref")): item for item in result.get("invoices", []) if isinstance(item, dict)}
+        except Exception as e:
+            logger.error(f"Billing agent batch error: {e}")
+            record_fallback("billing", e)
+            by_ref = {}
+
+        details: List[Optional[Dict[str, Any]]] = []
+        for i, entry in enumerate(entries):
+            item = by_ref.get(str(i), {})
+            line_items = priced_line_items(item.get("line_items"), entry["amount"])
+            if line_items is None:
+                details.append(None)
+                continue
+            description = item.get("project_description") or entry["project"].get("title") or "Professional Services"
+            details.append(invoice_details(line_items, description, source="batch"))
+            self.batched_invoices += 1
+        return details
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "llm_calls": self.llm_calls,
+            "batch_calls": self.batch_calls,
+            "batched_invoices": self.batched_invoices,
+            "contract_derived": self.engine.stats()
+        }
@@ -0,0 +1,56 @@
+import json
+import logging
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Fields each prompt actually uses; nothing else from the Mongo documents is sent to the model
+PROJECT_FIELDS = ["title", "description", "budget", "timeline"]
+CLIENT_FIELDS = ["name", "email", "company"]
+FREELANCER_FIELDS = ["name", "email"]
+# Size in bytes of the whole stored document, computed by Mongo alongside the projection,
+# so the savings baseline is the document that would have been sent without projecting
+DOC_SIZE_FIELD = "_doc_bytes"
+
+def projection(fields: List[str], *extra: str) -> Dict[str, Any]:
+    """Mongo projection for the prompt fields plus any keys the handler needs for lookups"""
+    return {"_id": 0, **{field: 1 for field in list(fields) + list(extra)}, DOC_SIZE_FIELD: {"$bsonSize": "$$ROOT"}}
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English prose and JSON
+    return (len(text) + 3) // 4
+
+class ContextBuilder:
+    """Renders only the needed document fields into compact prompt context and tracks the savings"""
+
+    def __init__(self):
+        self.metrics: Dict[str, Dict[str, int]] = {}
+
+    def render(self, agent: str, doc: Optional[Dict[str, Any]], fields: List[str]) -> str:
+        doc = doc or {}
+        trimmed = {field: doc[field] for field in fields if doc.get(field) not in (None, "")}
+        context = json.dumps(trimmed, default=str, ensure_ascii=False)
+
+        # Baseline is the previous format, the whole stored document; a document loaded without
+        # its size (not projected) is measured as it is
+        if DOC_SIZE_FIELD in doc:
+            baseline_tokens = (doc[DOC_SIZE_FIELD] + 3) // 4
+        else:
+            baseline_tokens = estimate_tokens(json.dumps(doc, indent=2, default=str))
+        metrics = self.metrics.setdefault(agent, {"documents": 0, "context_tokens": 0, "saved_tokens": 0})
+        metrics["documents"] += 1
+        metrics["context_tokens"] += estimate_tokens(context)
+        metrics["saved_tokens"] += max(baseline_tokens - estimate_tokens(context), 0)
+        return context
+
+    def stats(self) -> Dict[str, Any]:
+        return self.metrics
+
+_builder: Optional[ContextBuilder] = None
+
+def get_context_builder() -> ContextBuilder:
+    """Return the process-wide context builder"""
+    global _builder
+    if _builder is None:
+        _builder = ContextBuilder()
+    return _builder
@@ -1,9 +1,11 @@
-import os
 import json
 import logging
 from typing import Dict, Any
 from datetime import datetime, timedelta
-import anthropic
+from agents.runtime import get_runtime, cacheable_system
+from agents.routing import get_router
+from agents.context import get_context_builder, PROJECT_FIELDS, CLIENT_FIELDS, FREELANCER_FIELDS
+from agents.accounting import record_fallback
 
 logger = logging.getLogger(__name__)
 
@@ -20,9 +22,9 @@ def clean_claude_response(response: str) -> str:
 
 class ContractAgent:
     def __init__(self):
-        self.client = anthropic.Anthropic(
-            api_key=os.environ['CLAUDE_API_KEY']
-        )
+        self.runtime = get_runtime()
+        self.router = get_router()
+        self.context = get_context_builder()
         self.system_message = """You are an expert AI contract generation agent specializing in professional freelance service agreements compliant with California law.
 
 Your task is to analyze project, client, and freelancer information to generate comprehensive contract variables that will populate a legally-compliant service agreement template.
@@ -132,18 +134,20 @@ Return JSON in this exact structure:
     "jurisdiction": "State of California"
 }"""
     
-    async def generate_contract_variables(self, project_data: Dict[str, Any], client_data: Dict[str, Any], user_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def generate_contract_variables(self, project_data: Dict[str, Any], client_data: Dict[str, Any], user_data: Dict[str, Any],
+                                          fallback: bool = True) -> Dict[str, Any]:
+        """Contract variables from the model; on failure the canned variables below, or the error when fallback is False"""
         try:
             prompt = f"""Generate professional contract variables for the following freelance service agreement:
 
 PROJECT INFORMATION:
-{json.dumps(project_data, indent=2)}
+{self.context.render("contract", project_data, PROJECT_FIELDS)}
 
 CLIENT INFORMATION:
-{json.dumps(client_data, indent=2)}
+{self.context.render("contract", client_data, CLIENT_FIELDS)}
 
 FREELANCER INFORMATION:
-{json.dumps(user_data, indent=2)}
+{self.context.render("contract", user_data, FREELANCER_FIELDS)}
 
 INSTRUCTIONS:
 1. Extract and use all provided party information (names, emails, company)
@@ -156,21 +160,21 @@ INSTRUCTIONS:
 
 Return the complete JSON structure with ALL required fields filled."""
             
-            response = self.client.messages.create(
-                model="claude-3-opus-20240229",
+            # Clean and parse JSON response; unparseable output escalates to the next model tier
+            route = self.router.route("contract", len(prompt), budget=project_data.get("budget"))
+            return await self.router.call_json(
+                self.runtime,
+                route,
+                lambda content: json.loads(clean_claude_response(content)),
                 max_tokens=1000,
-                system=self.system_message,
+                system=cacheable_system(self.system_message),
                 messages=[{"role": "user", "content": prompt}]
             )
-            
-            # Get response content
-            content = response.content[0].text
-            
-            # Clean and parse JSON response
-            cleaned_response = clean_claude_response(content)
-            return json.loads(cleaned_response)
         except Exception as e:
             logger.error(f"Contract agent error: {e}")
+            if not fallback:
+                raise
+            record_fallback("contract", e)
             # Enhanced fallback with actual user data
             freelancer_business = f"{user_data.get('name', 'Freelancer').split()[0]} Digital Services"
             
@@ -0,0 +1,286 @@
+import os
+import re
+import time
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Minimum overall confidence for a rule-based extraction to be returned without calling Claude
+FAST_PATH_THRESHOLD = float(os.environ.get('INTAKE_FAST_PATH_THRESHOLD', '0.85'))
+FAST_PATH_ENABLED = os.environ.get('INTAKE_FAST_PATH_ENABLED', 'true').lower() == 'true'
+
+EMAIL_RE = re.compile(r'[A-Za-z0-9._%+-]+@([A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,})')
+MONEY_RE = re.compile(
+    r'\$\s?(\d{1,3}(?:,\d{3})+|\d+)(\.\d{1,2})?\s?([kK]\b)?'
+    r'|\b(\d{1,3}(?:,\d{3})+|\d+)(\.\d{1,2})?\s?([kK])?\s?(?:USD|usd|dollars)\b'
+)
+# A range ("$3,000 - $6,000", "5-10k", "3k to 6k") or a rate ("$80/hour", "per month") is not one project budget
+RANGE_RE = re.compile(r'\d\s*[kK]?\s*(?:-|–|—|to)\s*\$?\s*\d|\bbetween\b', re.I)
+RATE_RE = re.compile(
+    r'(?:/\s*|\bper\s+|\ban?\s+)(?:hr|hour|h|day|week|wk|month|mo|year|yr|annum)\b'
+    r'|\b(?:hourly|daily|weekly|monthly|yearly|annually|retainer)\b',
+    re.I
+)
+BUDGET_HINT_RE = re.compile(r'\b(budget|price|pay|paying|cost|fixed|rate|fee)\b', re.I)
+MONTHS = r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?'
+TIMELINE_RES: List[Tuple[re.Pattern, float]] = [
+    (re.compile(r'\b(?:by|before|due|until|no later than)\s+(' + MONTHS + r'\s+\d{1,2}(?:st|nd|rd|th)?(?:,?\s+\d{4})?)', re.I), 1.0),
+    (re.compile(r'\b(?:by|before|due|until)\s+(\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}(?:/\d{2,4})?)', re.I), 1.0),
+    (re.compile(r'\b((?:in|within)\s+(?:the\s+next\s+)?(?:\d+|one|two|three|four|five|six|eight|ten|twelve|a|an)\s+(?:business\s+)?(?:days?|weeks?|months?))\b', re.I), 0.9),
+    (re.compile(r'\b(within\s+the\s+next\s+(?:week|month|quarter))\b', re.I), 0.9),
+]
+LABEL_RE = re.compile(r'^\s*(name|full name|email|e-mail|company|organization|budget|timeline|deadline|'
+                      r'subject|project|project title|title|description|details)\s*:\s*(.+?)\s*$', re.I | re.M)
+INTRO_RE = re.compile(r"\b(?:I'm|I am|my name is|this is)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z'-]+){0,2})"
+                      r"(?:\s+(?:from|at|with)\s+([A-Z][\w&-]*(?:\s+[A-Z][\w&-]*){0,3}))?")
+SIGN_OFF_RE = re.compile(r'^\s*(?:best|best regards|kind regards|regards|thanks|thank you|cheers|sincerely|warmly)[,!.]?\s*$', re.I)
+NAME_LINE_RE = re.compile(r"^\s*([A-Z][a-z]+(?:\s+[A-Z]\.?)?(?:\s+[A-Z][a-z'-]+){1,2})\s*$")
+GREETING_RE = re.compile(r'^\s*(?:hi|hello|hey|dear|good (?:morning|afternoon|evening))\b.*$', re.I)
+# Anything touching credentials, accounts or financial/identity data goes to Claude for the security check
+SENSITIVE_RE = re.compile(
+    r"\b(ssn|social[\s-]*security|security number|bank|banking|routing|account number|account details|"
+    r"credit card|debit card|card number|cvv|pin|password|passcode|credentials|log[\s-]?in|sign[\s-]?in|"
+    r"verify your|confirm your|one[\s-]time code|otp|driver'?s licen[cs]e|passport|tax id|ein|itin|"
+    r"maiden name|date of birth|dob|wire transfer|gift cards?|bitcoin|crypto|click here)\b",
+    re.I
+)
+FREE_MAIL_DOMAINS = {
+    'gmail.com', 'googlemail.com', 'yahoo.com', 'hotmail.com', 'outlook.com', 'live.com', 'aol.com',
+    'icloud.com', 'me.com', 'protonmail.com', 'proton.me', 'gmx.com', 'mail.com', 'zoho.com'
+}
+PROJECT_NOUNS = [
+    'landing page', 'e-commerce store', 'online store', 'mobile app', 'web app', 'web application', 'website',
+    'dashboard', 'api', 'logo', 'brand identity', 'chatbot', 'app', 'platform', 'plugin', 'database'
+]
+PROJECT_VERBS = {
+    'redesign': 'Redesign', 'build': 'Development', 'develop': 'Development', 'create': 'Development',
+    'design': 'Design', 'migrate': 'Migration', 'fix': 'Fixes', 'integrate': 'Integration', 'update': 'Update'
+}
+
+def _parse_amount(whole: str, cents: Optional[str], thousands: Optional[str]) -> float:
+    value = float(whole.replace(',', '') + (cents or ''))
+    return value * 1000 if thousands else value
+
+class FastPathExtractor:
+    """Rule-based intake extraction for well-structured inquiries.
+
+    extract() returns (result, confidence); result follows the IntakeAgent JSON shape and
+    confidence is the minimum over the fields an intake needs (name, email, title, description).
+    """
+
+    def __init__(self, threshold: float = FAST_PATH_THRESHOLD):
+        self.threshold = threshold
+        self.attempts = 0
+        self.hits = 0
+        self.escalations = 0
+        self.total_ms = 0.0
+
+    def try_extract(self, raw_text: str) -> Optional[Dict[str, Any]]:
+        """Return a result when confident enough, otherwise None (escalate to Claude)"""
+        started = time.perf_counter()
+        result, confidence = self.extract(raw_text)
+        self.total_ms += (time.perf_counter() - started) * 1000
+        self.attempts += 1
+        if result is not None and confidence >= self.threshold:
+            self.hits += 1
+            return result
+        self.escalations += 1
+        return None
+
+    def extract(self, raw_text: str) -> Tuple[Optional[Dict[str, Any]], float]:
+        if SENSITIVE_RE.search(raw_text):
+            return None, 0.0
+        # Only a clear project inquiry skips Claude: it must name a deliverable and give a budget or timeline
+        if not self._deliverable(raw_text):
+            return None, 0.0
+
+        lines = [line.rstrip() for line in raw_text.strip().splitlines()]
+        labels: Dict[str, str] = {}
+        for match in LABEL_RE.finditer(raw_text):
+            labels.setdefault(match.group(1).lower(), match.group(2))
+
+        email, email_conf = self._email(raw_text, labels)
+        name, name_conf = self._name(raw_text, lines, labels, email)
+        company, company_conf = self._company(raw_text, labels, email)
+        budget, budget_conf = self._budget(raw_text, labels)
+        timeline, timeline_conf = self._timeline(raw_text, labels)
+        description, description_conf = self._description(lines, labels)
+        title, title_conf = self._title(raw_text, labels)
+
+        if budget is None and not timeline:
+            return None, 0.0
+
+        confidence = min(name_conf, email_conf, title_conf, description_conf)
+        # A budget that is mentioned must be read unambiguously, or it would go into contracts and invoices wrong
+        if labels.get('budget') or MONEY_RE.search(raw_text):
+            confidence = min(confidence, budget_conf)
+        result = {
+            "client": {"name": name, "email": email, "company": company},
+            "project": {"title": title, "description": description, "timeline": timeline, "budget": budget},
+            "confidence": {"budget": budget_conf, "timeline": timeline_conf, "overall": round(confidence, 2)},
+            "status": "intake_complete",
+            "security_message": None
+        }
+        return result, confidence
+
+    def _email(self, text: str, labels: Dict[str, str]) -> Tuple[str, float]:
+        labelled = labels.get('email') or labels.get('e-mail')
+        if labelled and EMAIL_RE.search(labelled):
+            return EMAIL_RE.search(labelled).group(0), 1.0
+        found = list(dict.fromkeys(m.group(0) for m in EMAIL_RE.finditer(text)))
+        if len(found) == 1:
+            return found[0], 1.0
+        if found:
+            # Several addresses (e.g. CCs): the last one is usually the signature
+            return found[-1], 0.6
+        return "", 0.0
+
+    def _name(self, text: str, lines: List[str], labels: Dict[str, str], email: str) -> Tuple[str, float]:
+        labelled = labels.get('name') or labels.get('full name')
+        if labelled:
+            return labelled, 1.0
+
+        candidates: List[Tuple[str, float]] = []
+        from_match = re.search(r'^From:\s*"?([^"<\n]+?)"?\s*<', text, re.M)
+        if from_match:
+            candidates.append((from_match.group(1).strip(), 1.0))
+        intro = INTRO_RE.search(text)
+        if intro:
+            candidates.append((intro.group(1), 0.85))
+        for i, line in enumerate(lines[:-1]):
+            if SIGN_OFF_RE.match(line):
+                follow = NAME_LINE_RE.match(lines[i + 1])
+                if follow:
+                    candidates.append((follow.group(1), 0.85))
+                break
+        if email:
+            for i, line in enumerate(lines):
+                if email in line and i > 0:
+                    previous = NAME_LINE_RE.match(lines[i - 1])
+                    if previous:
+                        candidates.append((previous.group(1), 0.8))
+                    break
+
+        if not candidates:
+            return "", 0.0
+        name, conf = max(candidates, key=lambda c: c[1])
+        # Two independent sources agreeing is as good as an explicit label
+        if sum(1 for other, _ in candidates if other.lower() == name.lower()) > 1:
+            conf = 1.0
+        return name, conf
+
+    def _company(self, text: str, labels: Dict[str, str], email: str) -> Tuple[str, float]:
+        labelled = labels.get('company') or labels.get('organization')
+        if labelled:
+            return labelled, 1.0
+        intro = INTRO_RE.search(text)
+        if intro and intro.group(2):
+            return intro.group(2), 0.9
+        if email:
+            domain = email.split('@', 1)[1].lower()
+            if domain not in FREE_MAIL_DOMAINS:
+                return domain.split('.')[-2].replace('-', ' ').title(), 0.6
+        return "", 0.0
+
+    def _budget(self, text: str, labels: Dict[str, str]) -> Tuple[Optional[float], float]:
+        labelled = labels.get('budget')
+        if labelled:
+            if RANGE_RE.search(labelled) or RATE_RE.search(labelled):
+                return None, 0.0
+            match = MONEY_RE.search(labelled) or re.search(r'(\d{1,3}(?:,\d{3})+|\d+)(\.\d{1,2})?\s?([kK]\b)?', labelled)
+            if match:
+                groups = [g for g in match.groups()]
+                whole, cents, k = (groups[0], groups[1], groups[2]) if groups[0] else (groups[3], groups[4], groups[5])
+                return _parse_amount(whole, cents, k), 1.0
+
+        amounts = []
+        for match in MONEY_RE.finditer(text):
+            # The figure itself plus what directly surrounds it, e.g. "from $3k - $6k" or "$80 per hour"
+            around = text[max(0, match.start() - 12):match.end() + 15]
+            if RANGE_RE.search(around) or RATE_RE.search(text[match.end():match.end() + 15]):
+                return None, 0.0
+            if match.group(1):
+                amount = _parse_amount(match.group(1), match.group(2), match.group(3))
+            else:
+                amount = _parse_amount(match.group(4), match.group(5), match.group(6))
+            window = text[max(0, match.start() - 60):match.end() + 20]
+            amounts.append((amount, bool(BUDGET_HINT_RE.search(window))))
+
+        if not amounts:
+            return None, 0.0
+        distinct = {amount for amount, _ in amounts}
+        hinted = [amount for amount, hint in amounts if hint]
+        if len(distinct) == 1:
+            return amounts[0][0], 1.0 if hinted else 0.8
+        # Several figures: prefer the one next to a budget keyword, but stay unsure
+        return (hinted or [amounts[0][0]])[0], 0.5
+
+    def _timeline(self, text: str, labels: Dict[str, str]) -> Tuple[str, float]:
+        labelled = labels.get('timeline') or labels.get('deadline')
+        if labelled:
+            return labelled, 1.0
+        for pattern, conf in TIMELINE_RES:
+            match = pattern.search(text)
+            if match:
+                return match.group(1), conf
+        return "", 0.0
+
+    def _description(self, lines: List[str], labels: Dict[str, str]) -> Tuple[str, float]:
+        labelled = labels.get('description') or labels.get('details')
+        if labelled and len(labelled.split()) >= 5:
+            return labelled, 1.0
+
+        body = []
+        for line in lines:
+            if SIGN_OFF_RE.match(line):
+                break
+            if GREETING_RE.match(line) or LABEL_RE.match(line) or re.match(r'^From:', line):
+                continue
+            body.append(line.strip())
+        description = ' '.join(' '.join(body).split())
+        words = description.split()
+        if len(words) < 12:
+            return description, 0.4
+        # Mostly non-alphabetic text is likely gibberish; let Claude classify it
+        alpha = sum(1 for word in words if re.search(r'[aeiouy]', word, re.I))
+        if alpha / len(words) < 0.7:
+            return description, 0.2
+        return description, 0.9
+
+    def _deliverable(self, text: str) -> Optional[str]:
+        lowered = text.lower()
+        return next((noun for noun in PROJECT_NOUNS if re.search(r'\b' + re.escape(noun) + r'\b', lowered)), None)
+
+    def _title(self, text: str, labels: Dict[str, str]) -> Tuple[str, float]:
+        for key in ('project title', 'title', 'project'):
+            labelled = labels.get(key)
+            if labelled:
+                return labelled, 1.0
+        subject = labels.get('subject')
+        if subject:
+            subject = re.sub(r'^(?:re|fwd?):\s*', '', subject, flags=re.I)
+            # Any mail has a subject; it is only a title when it names the deliverable
+            return subject, 0.9 if self._deliverable(subject) else 0.5
+
+        lowered = text.lower()
+        for noun in PROJECT_NOUNS:
+            match = re.search(r'\b' + re.escape(noun) + r'\b', lowered)
+            if match is None:
+                continue
+            position = match.start()
+            window = lowered[max(0, position - 60):position]
+            action = next((label for verb, label in PROJECT_VERBS.items() if verb in window), 'Project')
+            noun_title = 'API' if noun == 'api' else noun.title()
+            return f"{noun_title} {action}", 0.75
+        return "", 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threshold": self.threshold,
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "escalations": self.escalations,
+            "hit_rate": round(self.hits / self.attempts, 4) if self.attempts else 0.0,
+            "avg_ms": round(self.total_ms / self.attempts, 3) if self.attempts else 0.0
+        }
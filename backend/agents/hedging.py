@@ -0,0 +1,84 @@
+import os
+import math
+import logging
+from collections import deque
+from typing import Deque, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Agents whose calls are hedged (comma separated); empty disables hedging
+HEDGE_AGENTS = {a.strip() for a in os.environ.get('AGENT_HEDGE_AGENTS', 'intake').split(',') if a.strip()}
+# A second request is sent once the first has been pending longer than this percentile of recent latency
+HEDGE_PERCENTILE = float(os.environ.get('AGENT_HEDGE_PERCENTILE', '95'))
+HEDGE_MIN_SAMPLES = int(os.environ.get('AGENT_HEDGE_MIN_SAMPLES', '20'))
+HEDGE_WINDOW = int(os.environ.get('AGENT_HEDGE_WINDOW', '200'))
+# At most this fraction of calls may send a hedge, so outliers cannot double upstream load
+HEDGE_BUDGET = float(os.environ.get('AGENT_HEDGE_BUDGET', '0.05'))
+HEDGE_BURST = float(os.environ.get('AGENT_HEDGE_BURST', '5'))
+
+class Hedger:
+    """Tracks recent call latency per agent and decides when, and whether, a call may be hedged"""
+
+    def __init__(self, agents=None, percentile: float = HEDGE_PERCENTILE, min_samples: int = HEDGE_MIN_SAMPLES,
+                 window: int = HEDGE_WINDOW, budget: float = HEDGE_BUDGET, burst: float = HEDGE_BURST):
+        self.agents = HEDGE_AGENTS if agents is None else set(agents)
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.window = window
+        self.budget = budget
+        self.burst = burst
+        # Each eligible call earns `budget` hedge credit and each hedge spends one, up to `burst` banked
+        self.credit = burst
+        self.latencies: Dict[str, Deque[float]] = {}
+        self.metrics: Dict[str, Dict[str, int]] = {}
+
+    def enabled(self, agent: str) -> bool:
+        return agent in self.agents
+
+    def record_latency(self, agent: str, seconds: float):
+        self.latencies.setdefault(agent, deque(maxlen=self.window)).append(seconds)
+
+    def delay(self, agent: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None until there are enough samples"""
+        samples = self.latencies.get(agent)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(self.percentile / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def _metrics(self, agent: str) -> Dict[str, int]:
+        return self.metrics.setdefault(agent, {"calls": 0, "hedged": 0, "hedge_wins": 0, "budget_denied": 0})
+
+    def start_call(self, agent: str):
+        self._metrics(agent)["calls"] += 1
+        self.credit = min(self.burst, self.credit + self.budget)
+
+    def try_hedge(self, agent: str) -> bool:
+        if self.credit < 1:
+            self._metrics(agent)["budget_denied"] += 1
+            return False
+        self.credit -= 1
+        self._metrics(agent)["hedged"] += 1
+        return True
+
+    def record_win(self, agent: str):
+        self._metrics(agent)["hedge_wins"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        agents = {}
+        for agent, metrics in self.metrics.items():
+            delay = self.delay(agent)
+            agents[agent] = {
+                **metrics,
+                "hedge_rate": round(metrics["hedged"] / metrics["calls"], 3) if metrics["calls"] else 0.0,
+                "win_rate": round(metrics["hedge_wins"] / metrics["hedged"], 3) if metrics["hedged"] else 0.0,
+                "hedge_delay_ms": round(delay * 1000, 1) if delay is not None else None
+            }
+        return {
+            "agents_enabled": sorted(self.agents),
+            "percentile": self.percentile,
+            "budget": self.budget,
+            "credit": round(self.credit, 2),
+            "agents": agents
+        }
@@ -1,11 +1,20 @@
-import os
 import json
+import time
 import logging
-from typing import Dict, Any
-import anthropic
+from typing import Dict, Any, AsyncIterator, Optional, Tuple
+from agents.runtime import get_runtime, cacheable_system
+from agents.routing import get_router
+from agents.intake_cache import IntakeCache
+from agents.json_stream import IncrementalJSONParser
+from agents.fast_path import FastPathExtractor
+from agents.preprocess import InquiryPreprocessor
+from agents.accounting import record_call, record_fallback, annotate_last
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever the system or user prompt changes so cached results are not reused
+INTAKE_PROMPT_VERSION = "2"
+
 def clean_claude_response(response: str) -> str:
     """Remove markdown code blocks from Claude responses"""
     response = response.strip()
@@ -18,10 +27,15 @@ def clean_claude_response(response: str) -> str:
     return response.strip()
 
 class IntakeAgent:
-    def __init__(self):
-        self.client = anthropic.Anthropic(
-            api_key=os.environ['CLAUDE_API_KEY']
-        )
+    def __init__(self, cache: Optional[IntakeCache] = None, fast_path: Optional[FastPathExtractor] = None,
+                 preprocessor: Optional[InquiryPreprocessor] = None):
+        self.runtime = get_runtime()
+        self.router = get_router()
+        self.cache = cache
+        self.fast_path = fast_path
+        self.preprocessor = preprocessor
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
         self.system_message = """You are an expert AI intake agent for a freelancer workflow system.
 Your job is to carefully extract structured information from raw client inquiries and emails.
 
@@ -106,15 +120,13 @@ Return ONLY valid JSON in this exact structure (no extra text):
     "security_message": "optional message for unable_to_parse or malicious_email statuses"
 }"""
     
-    async def process_inquiry(self, raw_text: str) -> Dict[str, Any]:
-        try:
-            response = self.client.messages.create(
-                model="claude-3-opus-20240229",
-                max_tokens=1500,
-                system=self.system_message,
-                messages=[{
-                    "role": "user",
-                    "content": f"""Carefully analyze and extract information from this client inquiry/email.
+    def _request_params(self, raw_text: str) -> Dict[str, Any]:
+        return {
+            "max_tokens": 1500,
+            "system": cacheable_system(self.system_message),
+            "messages": [{
+                "role": "user",
+                "content": f"""Carefully analyze and extract information from this client inquiry/email.
 
 CLIENT MESSAGE:
 {raw_text}
@@ -129,22 +141,113 @@ Please extract:
 7. Timeline/deadlines (any dates or time periods mentioned)
 
 Return the JSON structure as specified."""
-                }]
+            }]
+        }
+
+    def _fallback(self, raw_text: str) -> Dict[str, Any]:
+        return {
+            "client": {"name": "", "email": "", "company": ""},
+            "project": {"title": "", "description": raw_text, "timeline": "", "budget": None},
+            "confidence": {"budget": 0.0, "timeline": 0.0},
+            "status": "needs_more_info",
+            "security_message": None
+        }
+
+    async def _lookup(self, raw_text: str, route: Dict[str, str]):
+        """Answer from the rule-based fast path or the cache before calling Claude.
+
+        Returns (cache_key, result); result is None when the model has to be called.
+        """
+        if self.fast_path is not None:
+            result = self.fast_path.try_extract(raw_text)
+            if result is not None:
+                record_call("intake", source="fast_path")
+                return None, result
+        if self.cache is None:
+            return None, None
+        cache_key = IntakeCache.make_key(raw_text, route["model"], INTAKE_PROMPT_VERSION)
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            record_call("intake", source="cache", route=route["name"])
+        return cache_key, cached
+
+    def _prepare(self, raw_text: str) -> str:
+        """Strip quoted history, signatures and boilerplate before anything else sees the text"""
+        if self.preprocessor is None:
+            return raw_text
+        return self.preprocessor.process(raw_text)
+
+    async def process_inquiry(self, raw_text: str) -> Dict[str, Any]:
+        raw_text = self._prepare(raw_text)
+        route = self.router.route("intake", len(raw_text))
+        cache_key, cached = await self._lookup(raw_text, route)
+        if cached is not None:
+            return cached
+
+        try:
+            # Clean and parse JSON response; unparseable output escalates to the next model tier
+            started = time.perf_counter()
+            result = await self.router.call_json(
+                self.runtime,
+                route,
+                lambda content: json.loads(clean_claude_response(content)),
+                **self._request_params(raw_text)
             )
-            
-            # Get response content
-            content = response.content[0].text
-            
-            # Clean and parse JSON response
-            cleaned_response = clean_claude_response(content)
-            result = json.loads(cleaned_response)
+            self.llm_calls += 1
+            self.llm_seconds += time.perf_counter() - started
+
+            # Only real model output is cached, never the fallback below
+            if cache_key is not None:
+                await self.cache.set(cache_key, result)
             return result
         except Exception as e:
             logger.error(f"Intake agent error: {e}")
-            return {
-                "client": {"name": "", "email": "", "company": ""},
-                "project": {"title": "", "description": raw_text, "timeline": "", "budget": None},
-                "confidence": {"budget": 0.0, "timeline": 0.0},
-                "status": "needs_more_info",
-                "security_message": None
-            }
\ No newline at end of file
+            record_fallback("intake", e)
+            return self._fallback(raw_text)
+
+    async def stream_inquiry(self, raw_text: str) -> AsyncIterator[Tuple[str, Any]]:
+        """Like process_inquiry, but yields ("field", {"path", "value"}) as soon as each
+        extracted value is complete, followed by a single ("result", result)"""
+        raw_text = self._prepare(raw_text)
+        route = self.router.route("intake", len(raw_text))
+        cache_key, cached = await self._lookup(raw_text, route)
+        if cached is not None:
+            yield "result", cached
+            return
+
+        parser = IncrementalJSONParser()
+        content = []
+        try:
+            started = time.perf_counter()
+            stream = self.runtime.stream_message(agent="intake", model=route["model"], **self._request_params(raw_text))
+            async for text in stream:
+                content.append(text)
+                for path, value in parser.feed(text):
+                    yield "field", {"path": ".".join(str(part) for part in path), "value": value}
+
+            self.router.record(route, time.perf_counter() - started)
+            try:
+                result = json.loads(clean_claude_response("".join(content)))
+            except ValueError:
+                annotate_last("intake", route=route["name"], parse_ok=False)
+                raise
+            annotate_last("intake", route=route["name"], parse_ok=True)
+            if cache_key is not None:
+                await self.cache.set(cache_key, result)
+        except Exception as e:
+            logger.error(f"Intake agent streaming error: {e}")
+            record_fallback("intake", e)
+            result = self._fallback(raw_text)
+        yield "result", result
+
+    def stats(self) -> Dict[str, Any]:
+        avg_llm_ms = self.llm_seconds * 1000 / self.llm_calls if self.llm_calls else 0.0
+        stats = {"llm_calls": self.llm_calls, "avg_llm_ms": round(avg_llm_ms, 1)}
+        if self.fast_path is not None:
+            fast_path = self.fast_path.stats()
+            # Each fast-path hit saves roughly one average model round trip
+            fast_path["latency_saved_ms"] = round(fast_path["hits"] * max(avg_llm_ms - fast_path["avg_ms"], 0.0), 1)
+            stats["fast_path"] = fast_path
+        if self.preprocessor is not None:
+            stats["preprocess"] = self.preprocessor.stats()
+        return stats
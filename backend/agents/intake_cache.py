@@ -0,0 +1,108 @@
+import os
+import copy
+import time
+import hashlib
+import logging
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_MAX_ENTRIES = int(os.environ.get('INTAKE_CACHE_MAX_ENTRIES', '1024'))
+CACHE_TTL_SECONDS = int(os.environ.get('INTAKE_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+
+def normalize_inquiry(raw_text: str) -> str:
+    """Canonical form of an inquiry so trivially different resubmissions share a key"""
+    text = unicodedata.normalize('NFC', raw_text)
+    return ' '.join(text.split())
+
+class IntakeCache:
+    """Two-tier (in-process LRU + Mongo) cache of intake results keyed by inquiry content"""
+
+    def __init__(self, collection=None, max_entries: int = CACHE_MAX_ENTRIES, ttl_seconds: int = CACHE_TTL_SECONDS):
+        self.collection = collection
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(raw_text: str, model: str, prompt_version: str) -> str:
+        # model is the routed tier's, before any escalation: it follows from the input, so escalated
+        # answers stay findable, and changing a tier's configured model still invalidates its entries
+        digest = hashlib.sha256()
+        for part in (model, prompt_version, normalize_inquiry(raw_text)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\x00')
+        return digest.hexdigest()
+
+    async def ensure_indexes(self):
+        """Unique lookup key plus a Mongo TTL index so persisted entries expire on their own"""
+        if self.collection is None:
+            return
+        await self.collection.create_index("key", unique=True)
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def _remember(self, key: str, result: Dict[str, Any], expires_at: float):
+        self._entries[key] = (expires_at, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, result = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(result)
+            del self._entries[key]
+
+        if self.collection is not None:
+            try:
+                doc = await self.collection.find_one({"key": key, "expires_at": {"$gt": datetime.utcnow()}})
+            except Exception as e:
+                logger.warning(f"Intake cache lookup failed: {e}")
+                doc = None
+            if doc:
+                remaining = (doc["expires_at"] - datetime.utcnow()).total_seconds()
+                self._remember(key, doc["result"], time.time() + remaining)
+                self.hits += 1
+                self.persistent_hits += 1
+                return copy.deepcopy(doc["result"])
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, result: Dict[str, Any]):
+        result = copy.deepcopy(result)
+        self._remember(key, result, time.time() + self.ttl_seconds)
+        if self.collection is None:
+            return
+        try:
+            await self.collection.update_one(
+                {"key": key},
+                {"$set": {
+                    "key": key,
+                    "result": result,
+                    "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"Intake cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
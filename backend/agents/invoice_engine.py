@@ -0,0 +1,184 @@
+import re
+import time
+import uuid
+import logging
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal('0.01')
+PERCENT_RE = re.compile(r'(\d+(?:\.\d+)?)\s*%')
+DAYS_RE = re.compile(r'\d+')
+MILESTONE_KEY_RE = re.compile(r'^milestone_(\d+)$')
+DEFAULT_NET_TERMS = 30
+DEFAULT_LATE_FEE = "1.5"
+
+def to_money(value: Any) -> Decimal:
+    return Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+def split_amount(total: Decimal, weights: List[Decimal]) -> List[Decimal]:
+    """Split total by weights into cent amounts that sum exactly to total (remainder on the last share)"""
+    weight_sum = sum(weights)
+    shares = [(total * weight / weight_sum).quantize(CENT, rounding=ROUND_HALF_UP) for weight in weights[:-1]]
+    shares.append(total - sum(shares, Decimal('0')))
+    return shares
+
+def payment_percentages(payment_terms: Any) -> List[Decimal]:
+    """Installment percentages from terms like '33% upfront, 33% at midpoint, 34% on completion'"""
+    percentages = [Decimal(match) for match in PERCENT_RE.findall(str(payment_terms or ''))]
+    # Late fees and similar percentages do not add up to a payment schedule
+    if not percentages or sum(percentages) != 100:
+        return []
+    return percentages
+
+def format_percent(value: Decimal) -> str:
+    return format(value.normalize(), 'f')
+
+def contract_milestones(variables: Dict[str, Any]) -> List[str]:
+    numbered = []
+    for key, value in variables.items():
+        match = MILESTONE_KEY_RE.match(key)
+        if match and isinstance(value, str) and value.strip():
+            numbered.append((int(match.group(1)), value.strip()))
+    return [description for _, description in sorted(numbered)]
+
+def contract_total(variables: Dict[str, Any]) -> Optional[Decimal]:
+    try:
+        return to_money(str(variables.get("project_budget")).replace('$', '').replace(',', ''))
+    except (InvalidOperation, ValueError):
+        return None
+
+def net_terms_days(value: Any) -> int:
+    match = DAYS_RE.search(str(value or ''))
+    return int(match.group()) if match else DEFAULT_NET_TERMS
+
+def invoice_details(line_items: List[Tuple[str, Decimal]], project_description: str,
+                    terms: Optional[Dict[str, Any]] = None, source: str = "contract",
+                    signed: bool = False) -> Dict[str, Any]:
+    """Complete invoice in the BillingAgent JSON shape from priced line items and contract-style terms"""
+    terms = terms or {}
+    today = datetime.utcnow()
+    net_terms = net_terms_days(terms.get("net_terms"))
+    late_fee = str(terms.get("late_fee") or DEFAULT_LATE_FEE)
+    subtotal = sum((line_amount for _, line_amount in line_items), Decimal('0'))
+    # Only a signed contract is cited as an agreement; a draft's terms are only referred to
+    agreement = ""
+    if terms.get("payment_terms"):
+        agreement = f" per the signed agreement ({terms['payment_terms']})" if signed \
+            else f" under the proposed contract terms ({terms['payment_terms']})"
+    return {
+        "invoice_number": f"INV-{today.year}-{uuid.uuid4().hex[:8].upper()}",
+        "issue_date": today.strftime("%Y-%m-%d"),
+        "due_date": (today + timedelta(days=net_terms)).strftime("%Y-%m-%d"),
+        "project_description": project_description,
+        "line_items": [{"description": description, "amount": float(line_amount)} for description, line_amount in line_items],
+        "subtotal": float(subtotal),
+        "tax_rate": 0.00,
+        "tax_amount": 0.00,
+        "total_due": float(subtotal),
+        "payment_platform": str(terms.get("invoice_platform") or "Email / Check"),
+        "payment_link": "Payment information will be provided separately",
+        "payment_instructions": (
+            f"Payment is due within {net_terms} days of invoice date{agreement}. "
+            f"Late payments subject to {late_fee}% monthly fee. Thank you for your business."
+        ),
+        "net_terms": str(net_terms),
+        "late_fee": late_fee,
+        "source": source
+    }
+
+def priced_line_items(line_items: Any, amount: float) -> Optional[List[Tuple[str, Decimal]]]:
+    """Validate model line items against the invoice amount; a cent-level rounding gap goes on the last item"""
+    if not isinstance(line_items, list) or not line_items:
+        return None
+    priced = []
+    for item in line_items:
+        if not isinstance(item, dict) or not str(item.get("description") or "").strip():
+            return None
+        try:
+            priced.append((str(item["description"]).strip(), to_money(item.get("amount"))))
+        except (InvalidOperation, TypeError, ValueError):
+            return None
+    total = to_money(amount)
+    gap = total - sum((line_amount for _, line_amount in priced), Decimal('0'))
+    if abs(gap) > Decimal('1.00') or any(line_amount < 0 for _, line_amount in priced):
+        return None
+    description, last = priced[-1]
+    priced[-1] = (description, last + gap)
+    return priced
+
+class InvoiceEngine:
+    """Builds invoice details from stored contract variables without a model call.
+
+    derive() returns the BillingAgent JSON shape, or None when the contract holds no
+    milestones or payment schedule to bill against (or the mode is hourly).
+    """
+
+    def __init__(self):
+        self.derived = 0
+        self.skipped = 0
+        self.seconds = 0.0
+
+    def derive(self, variables: Optional[Dict[str, Any]], amount: float, mode: str,
+               project: Optional[Dict[str, Any]] = None, sequence: int = 0,
+               signed: bool = False) -> Optional[Dict[str, Any]]:
+        started = time.perf_counter()
+        try:
+            details = self._derive(variables or {}, amount, mode, project or {}, sequence, signed)
+        except (InvalidOperation, ValueError, ZeroDivisionError) as e:
+            logger.warning(f"Invoice derivation failed, using billing agent: {e}")
+            details = None
+        self.seconds += time.perf_counter() - started
+        if details is None:
+            self.skipped += 1
+        else:
+            self.derived += 1
+        return details
+
+    def _derive(self, variables: Dict[str, Any], amount: float, mode: str,
+                project: Dict[str, Any], sequence: int, signed: bool) -> Optional[Dict[str, Any]]:
+        if mode not in ("fixed", "milestone"):
+            return None
+        milestones = contract_milestones(variables)
+        percentages = payment_percentages(variables.get("payment_terms"))
+        if not milestones and not percentages:
+            return None
+
+        total = to_money(amount)
+        if mode == "milestone":
+            # One installment per invoice, in contract order; the requested amount is what gets billed
+            installments = max(len(milestones), len(percentages))
+            index = min(sequence, installments - 1)
+            label = milestones[index] if index < len(milestones) else f"Installment {index + 1} of {installments}"
+            # The share is only named when the schedule pairs up with the milestones and this invoice is that share
+            paired = not milestones or len(milestones) == len(percentages)
+            contract_amount = contract_total(variables)
+            if index < len(percentages) and paired and contract_amount is not None \
+                    and to_money(contract_amount * percentages[index] / 100) == total:
+                label = f"{label} ({format_percent(percentages[index])}% of contract)"
+            line_items = [(label, total)]
+        elif milestones and len(percentages) == len(milestones):
+            line_items = list(zip(milestones, split_amount(total, percentages)))
+        elif milestones:
+            line_items = list(zip(milestones, split_amount(total, [Decimal(1)] * len(milestones))))
+        else:
+            labels = [f"Installment {i + 1} of {len(percentages)} ({format_percent(p)}%)" for i, p in enumerate(percentages)]
+            line_items = list(zip(labels, split_amount(total, percentages)))
+
+        return invoice_details(
+            line_items,
+            variables.get("project_description") or project.get("title") or "Professional Services",
+            variables,
+            source="contract",
+            signed=signed
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        runs = self.derived + self.skipped
+        return {
+            "derived": self.derived,
+            "skipped": self.skipped,
+            "avg_ms": round(self.seconds * 1000 / runs, 3) if runs else 0.0
+        }
@@ -0,0 +1,107 @@
+import json
+import logging
+from typing import Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+_LITERAL_CHARS = set('0123456789+-.eEtruefalsn')
+
+class IncrementalJSONParser:
+    """Parse a JSON object as it streams in, reporting each scalar value once it is complete
+
+    feed() returns a list of (path, value) pairs, e.g. (("client", "name"), "Jane Doe").
+    Anything before the first '{' (such as a markdown code fence) is ignored.
+    """
+
+    def __init__(self):
+        self._stack: List[dict] = []
+        self._started = False
+        self._done = False
+        self._string: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._literal: List[str] = []
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def feed(self, chunk: str) -> List[Tuple[Tuple[Any, ...], Any]]:
+        events: List[Tuple[Tuple[Any, ...], Any]] = []
+        for ch in chunk:
+            if self._done:
+                break
+            self._consume(ch, events)
+        return events
+
+    def _path(self) -> Tuple[Any, ...]:
+        return tuple(frame["key"] if frame["kind"] == "object" else frame["index"] for frame in self._stack)
+
+    def _push(self, kind: str):
+        if kind == "object":
+            self._stack.append({"kind": "object", "key": None, "expect_key": True})
+        else:
+            self._stack.append({"kind": "array", "index": 0})
+
+    def _finish_literal(self, events):
+        text = ''.join(self._literal)
+        self._literal = []
+        try:
+            events.append((self._path(), json.loads(text)))
+        except ValueError:
+            logger.debug(f"Skipping malformed JSON literal: {text!r}")
+
+    def _consume(self, ch: str, events):
+        if not self._started:
+            if ch == '{':
+                self._started = True
+                self._push("object")
+            return
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+                self._string.append(ch)
+            elif ch == '\\':
+                self._escape = True
+                self._string.append(ch)
+            elif ch == '"':
+                self._in_string = False
+                value = json.loads('"' + ''.join(self._string) + '"')
+                self._string = []
+                top = self._stack[-1]
+                if top["kind"] == "object" and top["expect_key"]:
+                    top["key"] = value
+                    top["expect_key"] = False
+                else:
+                    events.append((self._path(), value))
+            else:
+                self._string.append(ch)
+            return
+
+        if self._literal:
+            if ch in _LITERAL_CHARS:
+                self._literal.append(ch)
+                return
+            self._finish_literal(events)
+
+        if ch.isspace() or ch == ':':
+            return
+        if ch == '"':
+            self._in_string = True
+        elif ch == '{':
+            self._push("object")
+        elif ch == '[':
+            self._push("array")
+        elif ch in '}]':
+            self._stack.pop()
+            if not self._stack:
+                self._done = True
+        elif ch == ',':
+            top = self._stack[-1]
+            if top["kind"] == "object":
+                top["expect_key"] = True
+            else:
+                top["index"] += 1
+        elif ch in _LITERAL_CHARS:
+            self._literal.append(ch)
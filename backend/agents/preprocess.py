@@ -0,0 +1,172 @@
+import os
+import re
+import html
+import logging
+from html.parser import HTMLParser
+from typing import Dict, Any, List
+
+from agents.context import estimate_tokens
+from agents.fast_path import MONEY_RE, SIGN_OFF_RE
+
+logger = logging.getLogger(__name__)
+
+# Token budget for the inquiry text sent to the model
+INTAKE_MAX_INPUT_TOKENS = int(os.environ.get('INTAKE_MAX_INPUT_TOKENS', '3000'))
+
+HTML_RE = re.compile(r'<\s*(html|body|div|p|br|table|span|font)\b', re.I)
+REPLY_HEADER_RE = re.compile(r'^\s*On\s.{0,200}?\bwrote:\s*$', re.I | re.M)
+ORIGINAL_MESSAGE_RE = re.compile(r'^\s*-{2,}\s*Original Message\s*-{2,}\s*$', re.I | re.M)
+OUTLOOK_HEADER_RE = re.compile(r'^\s*From:\s.+\n\s*(?:Sent|Date):\s.+\n\s*To:\s.+', re.I | re.M)
+SIGNATURE_DELIMITER_RE = re.compile(r'^--\s?$', re.M)
+MOBILE_FOOTER_RE = re.compile(r'^\s*Sent from my \w+.*$', re.I | re.M)
+# How legal footers, unsubscribe lines and virus-scan stamps open; a keyword alone is not enough
+DISCLAIMER_RE = re.compile(
+    r'^\W*(?:confidentiality\s+notice|legal\s+disclaimer|disclaimer\s*:|notice\s*:'
+    r'|this\s+(?:e-?mail|message|communication|transmission)\b(?:\s+and\s+any\s+(?:files|attachments)\b[^.]*?)?'
+    r'\s+(?:is|are|may\s+(?:be|contain)|contains?)\b[^.]*?\b(?:confidential|privileged|intended\s+(?:solely|only))'
+    r'|if\s+you\s+(?:are\s+not\s+the\s+intended\s+recipient|have\s+received\s+this\s+(?:e-?mail|message)\s+in\s+error)'
+    r'|to\s+unsubscribe|you\s+(?:are\s+receiving|received)\s+this\s+(?:e-?mail|message)'
+    r'|please\s+consider\s+the\s+environment|(?:this\s+e-?mail\s+(?:has\s+been|was)\s+)?scanned\s+(?:for\s+viruses|by))',
+    re.I
+)
+# A paragraph with any of these is part of the inquiry, whatever else it says
+REQUIREMENT_RE = re.compile(
+    r'\b(?:budget|deadline|timeline|deliverables?|requirements?|scope|milestones?|we need|i need|looking for|'
+    r'build|develop|design|redesign|website|app|project)\b',
+    re.I
+)
+# Keep quoted history when the new text alone is too thin to be the inquiry
+MIN_REPLY_WORDS = 20
+SIGNATURE_KEEP_LINES = 4
+
+class _TextExtractor(HTMLParser):
+    BLOCK_TAGS = {'p', 'div', 'br', 'tr', 'li', 'h1', 'h2', 'h3', 'h4', 'table', 'blockquote'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style', 'head'):
+            self._skip += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style', 'head'):
+            self._skip = max(self._skip - 1, 0)
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+def html_to_text(markup: str) -> str:
+    parser = _TextExtractor()
+    try:
+        parser.feed(markup)
+        parser.close()
+    except Exception as e:
+        logger.warning(f"HTML conversion failed, stripping tags: {e}")
+        return html.unescape(re.sub(r'<[^>]+>', ' ', markup))
+    return ''.join(parser.parts)
+
+def strip_quoted(text: str) -> str:
+    """Drop quoted reply history, unless the new part is too short to be the inquiry itself"""
+    cut = len(text)
+    for pattern in (REPLY_HEADER_RE, ORIGINAL_MESSAGE_RE, OUTLOOK_HEADER_RE):
+        match = pattern.search(text)
+        if match and match.start() > 0:
+            cut = min(cut, match.start())
+    fresh = text[:cut]
+    fresh = '\n'.join(line for line in fresh.splitlines() if not line.lstrip().startswith('>'))
+    if len(fresh.split()) >= MIN_REPLY_WORDS:
+        return fresh
+    # Thin top-post ("see below"): keep the history but drop the quote markers
+    return '\n'.join(re.sub(r'^\s*(?:>\s?)+', '', line) for line in text.splitlines())
+
+def _is_disclaimer(paragraph: str) -> bool:
+    return bool(DISCLAIMER_RE.match(paragraph)) and not MONEY_RE.search(paragraph) and not REQUIREMENT_RE.search(paragraph)
+
+def strip_boilerplate(text: str) -> str:
+    """Remove mobile footers and the disclaimer paragraphs that trail the message or follow its signature"""
+    text = MOBILE_FOOTER_RE.sub('', text)
+    paragraphs = re.split(r'\n\s*\n', text)
+    # Everything after the sign-off (or a '-- ' delimiter) is signature territory
+    signed_at = next((
+        i for i, paragraph in enumerate(paragraphs)
+        if any(SIGN_OFF_RE.match(line) or SIGNATURE_DELIMITER_RE.match(line) for line in paragraph.splitlines())
+    ), len(paragraphs))
+    # The trailing run of disclaimers, wherever the signature is
+    trailing = len(paragraphs)
+    while trailing > 0 and _is_disclaimer(paragraphs[trailing - 1]):
+        trailing -= 1
+    kept = [
+        paragraph for i, paragraph in enumerate(paragraphs)
+        if not (i >= trailing or (i > signed_at and _is_disclaimer(paragraph)))
+    ]
+    return '\n\n'.join(kept)
+
+def compact_signature(text: str) -> str:
+    """Keep the first lines after a '-- ' delimiter (name, company, email) and drop the rest"""
+    match = SIGNATURE_DELIMITER_RE.search(text)
+    if not match:
+        return text
+    signature = [line for line in text[match.end():].splitlines() if line.strip()]
+    return text[:match.start()].rstrip() + '\n' + '\n'.join(signature[:SIGNATURE_KEEP_LINES])
+
+def collapse_whitespace(text: str) -> str:
+    lines = [re.sub(r'[ \t\u00a0]+', ' ', line).strip() for line in text.splitlines()]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+def truncate_to_budget(text: str, max_tokens: int) -> str:
+    """Keep the start (the request) and the end (sign-off and contact details) within the budget"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    max_chars = max_tokens * 4
+    head = text[:int(max_chars * 0.75)]
+    tail = text[-int(max_chars * 0.25):]
+    # Cut on line boundaries so no half-lines reach the model
+    head = head[:head.rfind('\n')] if '\n' in head else head
+    tail = tail[tail.find('\n') + 1:] if '\n' in tail else tail
+    return f"{head}\n[...]\n{tail}"
+
+class InquiryPreprocessor:
+    """Cleans raw inquiry text before it reaches the Intake Agent and tracks the size reduction"""
+
+    def __init__(self, max_tokens: int = INTAKE_MAX_INPUT_TOKENS):
+        self.max_tokens = max_tokens
+        self.calls = 0
+        self.chars_before = 0
+        self.chars_after = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    def process(self, raw_text: str) -> str:
+        text = raw_text.replace('\r\n', '\n')
+        if HTML_RE.search(text):
+            text = html_to_text(text)
+        text = strip_quoted(text)
+        text = strip_boilerplate(text)
+        text = compact_signature(text)
+        text = collapse_whitespace(text)
+        text = truncate_to_budget(text, self.max_tokens)
+
+        self.calls += 1
+        self.chars_before += len(raw_text)
+        self.chars_after += len(text)
+        self.tokens_before += estimate_tokens(raw_text)
+        self.tokens_after += estimate_tokens(text)
+        return text
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "chars_before": self.chars_before,
+            "chars_after": self.chars_after,
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "reduction_pct": round(100 * (1 - self.chars_after / self.chars_before), 1) if self.chars_before else 0.0
+        }
@@ -0,0 +1,119 @@
+import os
+import json
+import random
+import hashlib
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+
+from anthropic.types import Message
+
+logger = logging.getLogger(__name__)
+
+# off: call upstream; record: call upstream and append each exchange to the fixtures;
+# replay: serve fixtures only, never calling upstream
+REPLAY_MODE = os.environ.get('AGENT_REPLAY_MODE', 'off').lower()
+FIXTURE_DIR = Path(os.environ.get('AGENT_FIXTURE_DIR', str(Path(__file__).parent.parent / 'fixtures' / 'agent_calls')))
+# recorded | none | scale:<factor> | fixed:<ms> | lognormal:<median_ms>:<sigma>
+REPLAY_LATENCY = os.environ.get('AGENT_REPLAY_LATENCY', 'recorded')
+REPLAY_SEED = int(os.environ.get('AGENT_REPLAY_SEED', '0'))
+# Streams are replayed in chunks of this many characters
+REPLAY_CHUNK_CHARS = 24
+
+class ReplayMissError(Exception):
+    """Raised in replay mode when no fixture matches the request"""
+
+def request_key(kwargs: Dict[str, Any]) -> str:
+    """Fingerprint of everything sent upstream (model, system, messages, limits)"""
+    canonical = json.dumps(kwargs, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+class AgentRecorder:
+    """Captures upstream exchanges to NDJSON fixtures (one file per agent) and serves them back deterministically"""
+
+    def __init__(self, mode: str = REPLAY_MODE, fixture_dir: Path = FIXTURE_DIR,
+                 latency: str = REPLAY_LATENCY, seed: int = REPLAY_SEED):
+        if mode not in ("off", "record", "replay"):
+            raise ValueError(f"Unknown AGENT_REPLAY_MODE {mode!r}")
+        self.mode = mode
+        self.fixture_dir = Path(fixture_dir)
+        self.latency = latency
+        self.random = random.Random(seed)
+        self.fixtures: Dict[str, List[Dict[str, Any]]] = {}
+        # Next recording to serve per key, so repeated requests cycle through their recordings in order
+        self.cursors: Dict[str, int] = {}
+        self.recorded = 0
+        self.hits = 0
+        self.misses = 0
+        if mode == "replay":
+            self._load()
+
+    def _load(self):
+        for path in sorted(self.fixture_dir.glob('*.ndjson')):
+            with open(path, encoding='utf-8') as fixture_file:
+                for line_number, line in enumerate(fixture_file, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        logger.warning(f"Skipping bad fixture {path.name}:{line_number}: {e}")
+                        continue
+                    self.fixtures.setdefault(entry["key"], []).append(entry)
+        logger.info(f"Loaded {sum(map(len, self.fixtures.values()))} agent fixtures from {self.fixture_dir}")
+
+    def record(self, agent: str, kwargs: Dict[str, Any], response: Message, seconds: float):
+        self.fixture_dir.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "key": request_key(kwargs),
+            "agent": agent,
+            "model": kwargs.get("model"),
+            "request": kwargs,
+            "response": response.model_dump(mode="json"),
+            "latency_ms": round(seconds * 1000, 1),
+            "recorded_at": datetime.utcnow().isoformat()
+        }
+        with open(self.fixture_dir / f"{agent}.ndjson", 'a', encoding='utf-8') as fixture_file:
+            fixture_file.write(json.dumps(entry, default=str, ensure_ascii=False) + '\n')
+        self.recorded += 1
+
+    def replay(self, agent: str, kwargs: Dict[str, Any]) -> Tuple[Message, float]:
+        """The recorded response for this request and the latency (seconds) to simulate"""
+        key = request_key(kwargs)
+        entries = self.fixtures.get(key)
+        if not entries:
+            self.misses += 1
+            raise ReplayMissError(f"No {agent} fixture for request {key[:12]}")
+        cursor = self.cursors.get(key, 0)
+        self.cursors[key] = cursor + 1
+        entry = entries[cursor % len(entries)]
+        self.hits += 1
+        return Message.model_validate(entry["response"]), self._latency(entry["latency_ms"] / 1000)
+
+    def _latency(self, recorded: float) -> float:
+        kind, _, args = self.latency.partition(':')
+        if kind == "none":
+            return 0.0
+        if kind == "scale":
+            return recorded * float(args)
+        if kind == "fixed":
+            return float(args) / 1000
+        if kind == "lognormal":
+            median_ms, sigma = args.split(':')
+            return self.random.lognormvariate(0, float(sigma)) * float(median_ms) / 1000
+        return recorded
+
+    def chunks(self, message: Message) -> List[str]:
+        text = "".join(getattr(block, 'text', '') for block in message.content)
+        return [text[i:i + REPLAY_CHUNK_CHARS] for i in range(0, len(text), REPLAY_CHUNK_CHARS)] or [""]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "latency": self.latency,
+            "fixtures": sum(map(len, self.fixtures.values())),
+            "recorded": self.recorded,
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from agents.accounting import annotate_last
+
+logger = logging.getLogger(__name__)
+
+# Model per tier; override with AGENT_MODEL_FAST / AGENT_MODEL_BALANCED / AGENT_MODEL_QUALITY
+TIERS = ["fast", "balanced", "quality"]
+TIER_MODELS = {
+    "fast": os.environ.get('AGENT_MODEL_FAST', 'claude-3-5-haiku-20241022'),
+    "balanced": os.environ.get('AGENT_MODEL_BALANCED', 'claude-3-5-sonnet-20241022'),
+    "quality": os.environ.get('AGENT_MODEL_QUALITY', 'claude-3-opus-20240229')
+}
+# USD per million (input, output) tokens, used for the per-route cost estimate
+MODEL_PRICES = {
+    'claude-3-haiku-20240307': (0.25, 1.25),
+    'claude-3-5-haiku-20241022': (0.80, 4.00),
+    'claude-3-5-sonnet-20241022': (3.00, 15.00),
+    'claude-3-opus-20240229': (15.00, 75.00)
+}
+
+# Evaluated in order, first match wins. A rule matches when every condition it sets holds:
+# agent, max_chars/min_chars (prompt input size) and min_budget/max_budget (project budget).
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {"agent": "billing", "tier": "fast"},
+    {"agent": "intake", "max_chars": 2000, "tier": "fast"},
+    {"agent": "intake", "min_chars": 8000, "tier": "quality"},
+    {"agent": "intake", "tier": "balanced"},
+    {"agent": "contract", "min_budget": 15000, "tier": "quality"},
+    {"agent": "contract", "tier": "balanced"}
+]
+
+def _load_rules() -> List[Dict[str, Any]]:
+    raw = os.environ.get('AGENT_ROUTING_RULES')
+    if not raw:
+        return DEFAULT_RULES
+    try:
+        rules = json.loads(raw)
+        for rule in rules:
+            if rule.get("tier") not in TIERS:
+                raise ValueError(f"unknown tier {rule.get('tier')!r}")
+        return rules
+    except ValueError as e:
+        logger.error(f"Invalid AGENT_ROUTING_RULES, using defaults: {e}")
+        return DEFAULT_RULES
+
+class ModelRouter:
+    """Picks a model tier per agent call and keeps latency/token/cost counters per route"""
+
+    def __init__(self, rules: Optional[List[Dict[str, Any]]] = None, tier_models: Optional[Dict[str, str]] = None):
+        self.rules = rules if rules is not None else _load_rules()
+        self.tier_models = tier_models or TIER_MODELS
+        self.metrics: Dict[str, Dict[str, float]] = {}
+
+    def _route(self, agent: str, tier: str) -> Dict[str, str]:
+        return {"name": f"{agent}:{tier}", "agent": agent, "tier": tier, "model": self.tier_models[tier]}
+
+    def route(self, agent: str, input_chars: int, budget: Optional[float] = None) -> Dict[str, str]:
+        for rule in self.rules:
+            if rule.get("agent") not in (None, agent):
+                continue
+            if "max_chars" in rule and input_chars > rule["max_chars"]:
+                continue
+            if "min_chars" in rule and input_chars < rule["min_chars"]:
+                continue
+            if "min_budget" in rule and (budget is None or budget < rule["min_budget"]):
+                continue
+            if "max_budget" in rule and (budget is None or budget > rule["max_budget"]):
+                continue
+            return self._route(agent, rule["tier"])
+        return self._route(agent, "quality")
+
+    def escalate(self, route: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """The next tier up, or None when already on the top tier"""
+        position = TIERS.index(route["tier"])
+        if position + 1 >= len(TIERS):
+            return None
+        return self._route(route["agent"], TIERS[position + 1])
+
+    def _metrics(self, route: Dict[str, str]) -> Dict[str, float]:
+        return self.metrics.setdefault(route["name"], {
+            "model": route["model"], "calls": 0, "escalations": 0, "parse_failures": 0, "total_ms": 0.0,
+            "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0
+        })
+
+    def record(self, route: Dict[str, str], seconds: float, usage=None, escalated: bool = False):
+        metrics = self._metrics(route)
+        metrics["calls"] += 1
+        metrics["total_ms"] += seconds * 1000
+        if escalated:
+            metrics["escalations"] += 1
+        if usage is not None:
+            uncached = getattr(usage, 'input_tokens', 0) or 0
+            cache_write = getattr(usage, 'cache_creation_input_tokens', 0) or 0
+            cache_read = getattr(usage, 'cache_read_input_tokens', 0) or 0
+            output_tokens = getattr(usage, 'output_tokens', 0) or 0
+            input_price, output_price = MODEL_PRICES.get(route["model"], (0.0, 0.0))
+            metrics["input_tokens"] += uncached + cache_write + cache_read
+            metrics["output_tokens"] += output_tokens
+            # Cache writes bill at 1.25x and cache reads at 0.1x the base input price
+            billed_input = uncached + cache_write * 1.25 + cache_read * 0.1
+            metrics["cost_usd"] += (billed_input * input_price + output_tokens * output_price) / 1_000_000
+
+    async def call_json(self, runtime, route: Dict[str, str], parse: Callable[[str], Any], **kwargs) -> Any:
+        """Call the routed model and parse its text; unparseable output is retried once per higher tier"""
+        escalated = False
+        while True:
+            started = time.perf_counter()
+            response = await runtime.create_message(agent=route["agent"], model=route["model"], **kwargs)
+            self.record(route, time.perf_counter() - started, getattr(response, 'usage', None), escalated)
+            try:
+                parsed = parse(response.content[0].text)
+                annotate_last(route["agent"], route=route["name"], parse_ok=True)
+                return parsed
+            except ValueError:
+                self._metrics(route)["parse_failures"] += 1
+                annotate_last(route["agent"], route=route["name"], parse_ok=False)
+                next_route = self.escalate(route)
+                if next_route is None:
+                    raise
+                logger.warning(f"Unparseable {route['name']} output, escalating to {next_route['name']}")
+                route, escalated = next_route, True
+
+    def stats(self) -> Dict[str, Any]:
+        routes = {}
+        for name, metrics in self.metrics.items():
+            routes[name] = {
+                **metrics,
+                "total_ms": round(metrics["total_ms"], 1),
+                "avg_ms": round(metrics["total_ms"] / metrics["calls"], 1) if metrics["calls"] else 0.0,
+                "parse_success_rate": round(1 - metrics["parse_failures"] / metrics["calls"], 3) if metrics["calls"] else 0.0,
+                "cost_usd": round(metrics["cost_usd"], 4)
+            }
+        return {"tiers": self.tier_models, "routes": routes}
+
+_router: Optional[ModelRouter] = None
+
+def get_router() -> ModelRouter:
+    """Return the process-wide model router"""
+    global _router
+    if _router is None:
+        _router = ModelRouter()
+    return _router
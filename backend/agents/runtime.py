@@ -0,0 +1,332 @@
+import os
+import time
+import random
+import asyncio
+import logging
+from typing import Dict, Any, AsyncIterator, List, Optional
+import anthropic
+
+from agents.hedging import Hedger
+from agents.replay import AgentRecorder
+from agents.accounting import record_call
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on concurrent upstream calls made by a single worker
+MAX_CONCURRENT_CALLS = int(os.environ.get('AGENT_MAX_CONCURRENCY', '16'))
+# Timeout for a single upstream attempt, and the overall deadline across retries
+REQUEST_TIMEOUT = float(os.environ.get('AGENT_REQUEST_TIMEOUT', '30'))
+CALL_DEADLINE = float(os.environ.get('AGENT_CALL_DEADLINE', '60'))
+MAX_RETRIES = int(os.environ.get('AGENT_MAX_RETRIES', '3'))
+BACKOFF_BASE = float(os.environ.get('AGENT_BACKOFF_BASE', '0.5'))
+BACKOFF_CAP = float(os.environ.get('AGENT_BACKOFF_CAP', '8'))
+# Circuit breaker: open after N consecutive upstream failures, probe again after the cooldown
+BREAKER_THRESHOLD = int(os.environ.get('AGENT_BREAKER_THRESHOLD', '5'))
+BREAKER_COOLDOWN = float(os.environ.get('AGENT_BREAKER_COOLDOWN', '30'))
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the circuit breaker is open"""
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        # Numbers each probe let through, so only the call holding the current one can release it
+        self.probe_id = 0
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream; lets a single probe through after the cooldown"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            self.probe_id += 1
+            return True
+        return False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info("Agent circuit breaker closed")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def current_probe(self) -> Optional[int]:
+        """The probe id right after allow() let a half-open probe through, else None"""
+        return self.probe_id if self.state == self.HALF_OPEN and self._probing else None
+
+    def release_probe(self, probe_id: int):
+        """A probe that ended without a verdict says nothing about upstream health; let the next call probe.
+
+        Ignored unless probe_id is still the outstanding probe, so a late release cannot free someone else's.
+        """
+        if self._probing and probe_id == self.probe_id:
+            self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Agent circuit breaker opened after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probing = False
+
+def cacheable_system(text: str) -> List[Dict[str, Any]]:
+    """Send a static system prompt as a cacheable prefix (provider-side prompt caching)"""
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
+
+def _is_retryable(error: Exception) -> bool:
+    """429s, 5xx, timeouts and connection errors are worth retrying; other 4xx are not"""
+    if isinstance(error, (asyncio.TimeoutError, anthropic.APIConnectionError)):
+        return True
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+class AgentRuntime:
+    """Shared upstream path for all agents: one pooled client, deadlines, retries and a circuit breaker"""
+
+    def __init__(self):
+        self.recorder = AgentRecorder()
+        # The SDK's own retries are disabled so backoff and the breaker see every attempt.
+        # Replay mode never calls upstream, so it runs without an API key.
+        self.client = anthropic.AsyncAnthropic(
+            api_key=os.environ.get('CLAUDE_API_KEY', 'replay') if self.recorder.mode == "replay" else os.environ['CLAUDE_API_KEY'],
+            timeout=REQUEST_TIMEOUT,
+            max_retries=0
+        )
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENT_CALLS)
+        self.breaker = CircuitBreaker()
+        self.usage: Dict[str, Dict[str, int]] = {}
+        self.cancelled: Dict[str, Dict[str, int]] = {}
+        self.hedger = Hedger()
+
+    def _record_usage(self, agent: str, response) -> Dict[str, int]:
+        usage = getattr(response, 'usage', None)
+        if usage is None:
+            return {}
+        counts = {
+            "input_tokens": getattr(usage, 'input_tokens', 0) or 0,
+            "output_tokens": getattr(usage, 'output_tokens', 0) or 0,
+            "cache_write_tokens": getattr(usage, 'cache_creation_input_tokens', 0) or 0,
+            "cache_read_tokens": getattr(usage, 'cache_read_input_tokens', 0) or 0
+        }
+        totals = self.usage.setdefault(agent, {"calls": 0, **{k: 0 for k in counts}})
+        totals["calls"] += 1
+        for name, value in counts.items():
+            totals[name] += value
+        logger.info(
+            f"{agent} agent usage: in={counts['input_tokens']} out={counts['output_tokens']} "
+            f"cache_read={counts['cache_read_tokens']} cache_write={counts['cache_write_tokens']}"
+        )
+        return counts
+
+    def _record_cancel(self, agent: str, max_tokens: Optional[int], produced_tokens: int = 0):
+        """Count a call abandoned by its caller and estimate the output tokens it no longer pays for"""
+        usage = self.usage.get(agent)
+        # Expected output is this agent's average so far, or max_tokens before there is any history
+        expected = usage["output_tokens"] // usage["calls"] if usage and usage["calls"] else (max_tokens or 0)
+        totals = self.cancelled.setdefault(agent, {"calls": 0, "output_tokens_saved": 0})
+        totals["calls"] += 1
+        totals["output_tokens_saved"] += max(expected - produced_tokens, 0)
+        logger.info(f"{agent} agent call cancelled by caller after ~{produced_tokens} output tokens")
+
+    async def _send(self, agent: str, timeout: float, kwargs: Dict[str, Any]):
+        async with self.semaphore:
+            started = time.monotonic()
+            if self.recorder.mode == "replay":
+                response, latency = self.recorder.replay(agent, kwargs)
+                if latency >= timeout:
+                    await asyncio.sleep(timeout)
+                    raise asyncio.TimeoutError()
+                await asyncio.sleep(latency)
+            else:
+                response = await asyncio.wait_for(self.client.messages.create(**kwargs), timeout=timeout)
+        elapsed = time.monotonic() - started
+        self.hedger.record_latency(agent, elapsed)
+        if self.recorder.mode == "record":
+            self.recorder.record(agent, kwargs, response, elapsed)
+        return response
+
+    async def _attempt(self, agent: str, timeout: float, kwargs: Dict[str, Any]):
+        """One upstream attempt; for hedged agents a slow call gets a second identical request and the first to finish wins"""
+        if not self.hedger.enabled(agent):
+            return await self._send(agent, timeout, kwargs)
+
+        self.hedger.start_call(agent)
+        delay = self.hedger.delay(agent)
+        primary = asyncio.ensure_future(self._send(agent, timeout, kwargs))
+        tasks = {primary}
+        try:
+            if delay is None or delay >= timeout:
+                return await primary
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self.hedger.try_hedge(agent):
+                return await primary
+
+            backup = asyncio.ensure_future(self._send(agent, timeout - delay, kwargs))
+            tasks.add(backup)
+            logger.info(f"{agent} agent call pending past {delay * 1000:.0f}ms, sent hedge request")
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    tasks.discard(task)
+                    # A failed request only loses if the other one can still succeed
+                    if task.exception() is None or not tasks:
+                        if task is backup and task.exception() is None:
+                            self.hedger.record_win(agent)
+                        return task.result()
+        finally:
+            # The losing request is cancelled, which aborts it upstream
+            for task in tasks:
+                task.cancel()
+
+    async def create_message(self, agent: str = "agent", deadline: float = CALL_DEADLINE, **kwargs):
+        """Call messages.create with retries; raises CircuitOpenError when upstream is unhealthy"""
+        if not self.breaker.allow():
+            raise CircuitOpenError("Agent upstream circuit is open")
+        probe = self.breaker.current_probe()
+
+        started = time.monotonic()
+        expires_at = started + deadline
+        attempt = 0
+
+        def account(**fields):
+            record_call(agent, model=kwargs.get("model"), attempts=attempt + 1,
+                        wall_ms=round((time.monotonic() - started) * 1000, 1), **fields)
+
+        try:
+            while True:
+                attempt_started = time.monotonic()
+                remaining = expires_at - attempt_started
+                try:
+                    response = await self._attempt(agent, min(REQUEST_TIMEOUT, remaining), kwargs)
+                    self.breaker.record_success()
+                    counts = self._record_usage(agent, response)
+                    # A non-streamed response arrives whole, so its first token comes with the successful attempt
+                    account(ttft_ms=round((time.monotonic() - attempt_started) * 1000, 1), **counts)
+                    return response
+                except asyncio.CancelledError:
+                    # Client went away or a route deadline hit: the SDK aborts the upstream request
+                    self._record_cancel(agent, kwargs.get("max_tokens"))
+                    account(error="cancelled")
+                    raise
+                except Exception as e:
+                    if not _is_retryable(e):
+                        account(error=type(e).__name__)
+                        raise
+                    self.breaker.record_failure()
+                    delay = _retry_after(e) or random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+                    if attempt + 1 > MAX_RETRIES or self.breaker.state == CircuitBreaker.OPEN \
+                            or time.monotonic() + delay >= expires_at:
+                        account(error=type(e).__name__)
+                        raise
+                    attempt += 1
+                    logger.warning(f"Agent call failed ({type(e).__name__}), retry {attempt} in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+        finally:
+            if probe is not None:
+                # A probe that ended without a verdict (a 400, or cancelled) must not hold the half-open breaker shut
+                self.breaker.release_probe(probe)
+
+    async def stream_message(self, agent: str = "agent", **kwargs) -> AsyncIterator[str]:
+        """Yield text deltas from messages.stream; a stream is not retried once tokens have been sent"""
+        if not self.breaker.allow():
+            raise CircuitOpenError("Agent upstream circuit is open")
+        probe = self.breaker.current_probe()
+
+        produced_chars = 0
+        first_token_at = None
+        async with self.semaphore:
+            started = time.monotonic()
+
+            def account(**fields):
+                ttft = round((first_token_at - started) * 1000, 1) if first_token_at else None
+                record_call(agent, model=kwargs.get("model"), attempts=1, ttft_ms=ttft,
+                            wall_ms=round((time.monotonic() - started) * 1000, 1), **fields)
+
+            try:
+                if self.recorder.mode == "replay":
+                    # Spread the simulated latency over the chunks, like tokens arriving
+                    response, latency = self.recorder.replay(agent, kwargs)
+                    chunks = self.recorder.chunks(response)
+                    for text in chunks:
+                        await asyncio.sleep(latency / len(chunks))
+                        first_token_at = first_token_at or time.monotonic()
+                        produced_chars += len(text)
+                        yield text
+                else:
+                    async with self.client.messages.stream(**kwargs) as stream:
+                        async for text in stream.text_stream:
+                            first_token_at = first_token_at or time.monotonic()
+                            produced_chars += len(text)
+                            yield text
+                        response = await stream.get_final_message()
+                    if self.recorder.mode == "record":
+                        self.recorder.record(agent, kwargs, response, time.monotonic() - started)
+            except (asyncio.CancelledError, GeneratorExit):
+                # Closing the stream context aborts the upstream response mid-generation
+                self._record_cancel(agent, kwargs.get("max_tokens"), produced_chars // 4)
+                account(error="cancelled", output_tokens=produced_chars // 4)
+                raise
+            except Exception as e:
+                if _is_retryable(e):
+                    self.breaker.record_failure()
+                account(error=type(e).__name__)
+                raise
+            finally:
+                if probe is not None:
+                    self.breaker.release_probe(probe)
+        self.breaker.record_success()
+        account(**self._record_usage(agent, response))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "breaker_state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "usage": self.usage,
+            "cancelled": self.cancelled,
+            "hedging": self.hedger.stats(),
+            "replay": self.recorder.stats()
+        }
+
+    async def close(self):
+        """Release pooled connections on shutdown"""
+        await self.client.close()
+        logger.info("Closed shared Anthropic client")
+
+_runtime: Optional[AgentRuntime] = None
+
+def get_runtime() -> AgentRuntime:
+    """Return the process-wide agent runtime"""
+    global _runtime
+    if _runtime is None:
+        _runtime = AgentRuntime()
+    return _runtime
+
+async def close_runtime():
+    global _runtime
+    if _runtime is not None:
+        await _runtime.close()
+        _runtime = None
@@ -0,0 +1,318 @@
+"""Bulk intake: run mailbox exports or NDJSON message lists through the Intake Agent.
+
+Usage (from the backend directory):
+    python bulk_intake.py inbox.mbox --user-id <id> [--format mbox|maildir|ndjson] [--concurrency 8]
+"""
+import os
+import re
+import json
+import uuid
+import asyncio
+import logging
+import argparse
+import mailbox
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from email.header import decode_header, make_header
+from email.message import Message
+from typing import Any, AsyncContextManager, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional
+
+from agents.accounting import begin_calls, drain_calls
+
+logger = logging.getLogger(__name__)
+
+BULK_INTAKE_CONCURRENCY = int(os.environ.get('BULK_INTAKE_CONCURRENCY', '8'))
+BULK_INTAKE_BATCH_SIZE = int(os.environ.get('BULK_INTAKE_BATCH_SIZE', '50'))
+# A running run refreshes heartbeat_at this often; one silent for three intervals is marked interrupted at startup
+BULK_INTAKE_HEARTBEAT_SECONDS = int(os.environ.get('BULK_INTAKE_HEARTBEAT_SECONDS', '30'))
+# Seconds shutdown waits for running runs to finish before cancelling them
+BULK_INTAKE_SHUTDOWN_TIMEOUT = float(os.environ.get('BULK_INTAKE_SHUTDOWN_TIMEOUT', '10'))
+
+# Write callback: takes intake results for one owner and their trace ids, returns one dict
+# per result with either project_id/client_id or an error
+WriteBatch = Callable[[List[Dict[str, Any]], str, List[str]], Awaitable[List[Dict[str, Any]]]]
+# Stores the agent call records of a batch, each already tagged with its message's trace_id
+SaveCalls = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+def _header(msg: Message, name: str) -> str:
+    value = msg.get(name)
+    if not value:
+        return ""
+    try:
+        return str(make_header(decode_header(value)))
+    except Exception:
+        return str(value)
+
+def _part_text(part: Message) -> str:
+    payload = part.get_payload(decode=True)
+    if payload is None:
+        return ""
+    charset = part.get_content_charset() or 'utf-8'
+    try:
+        return payload.decode(charset, errors='replace')
+    except LookupError:
+        return payload.decode('utf-8', errors='replace')
+
+def message_to_text(msg: Message) -> str:
+    """Flatten an email into the raw text the Intake Agent expects (sender, subject, body)"""
+    plain, html = [], []
+    for part in msg.walk():
+        if part.get_content_maintype() == 'multipart' or part.get_filename():
+            continue
+        if part.get_content_type() == 'text/plain':
+            plain.append(_part_text(part))
+        elif part.get_content_type() == 'text/html':
+            html.append(re.sub(r'<[^>]+>', ' ', _part_text(part)))
+    body = "\n".join(plain) if plain else "\n".join(html)
+
+    lines = []
+    sender = _header(msg, 'From')
+    subject = _header(msg, 'Subject')
+    if sender:
+        lines.append(f"From: {sender}")
+    if subject:
+        lines.append(f"Subject: {subject}")
+    return "\n".join(lines) + "\n\n" + body.strip() if lines else body.strip()
+
+def iter_mbox(path: str) -> Iterator[str]:
+    for msg in mailbox.mbox(path, create=False):
+        yield message_to_text(msg)
+
+def iter_maildir(path: str) -> Iterator[str]:
+    for msg in mailbox.Maildir(path, factory=None, create=False):
+        yield message_to_text(msg)
+
+def iter_ndjson(path: str) -> Iterator[str]:
+    """One message per line: a JSON string or an object with raw_text (or text/body)"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                yield record
+            else:
+                yield record.get("raw_text") or record.get("text") or record.get("body") or ""
+
+def detect_format(path: str) -> str:
+    if os.path.isdir(path):
+        return "maildir"
+    if path.endswith(('.ndjson', '.jsonl')):
+        return "ndjson"
+    return "mbox"
+
+def iter_messages(path: str, fmt: Optional[str] = None) -> Iterator[str]:
+    fmt = fmt or detect_format(path)
+    readers = {"mbox": iter_mbox, "maildir": iter_maildir, "ndjson": iter_ndjson}
+    if fmt not in readers:
+        raise ValueError(f"Unsupported bulk intake format: {fmt}")
+    return readers[fmt](path)
+
+def count_messages(path: str, fmt: Optional[str] = None) -> int:
+    """Messages in an input without flattening them (blocking; scans the whole file)"""
+    fmt = fmt or detect_format(path)
+    if fmt == "mbox":
+        return len(mailbox.mbox(path, create=False))
+    if fmt == "maildir":
+        return len(mailbox.Maildir(path, factory=None, create=False))
+    with open(path, encoding='utf-8') as f:
+        return sum(1 for line in f if line.strip())
+
+class BulkIntakeRunner:
+    """Streams messages through the Intake Agent with bounded concurrency and batched writes.
+
+    Run progress lives in the intake_runs collection and per-message status in intake_run_items.
+    """
+
+    def __init__(self, agent, runs, items, write_batch: WriteBatch, save_calls: Optional[SaveCalls] = None,
+                 concurrency: int = BULK_INTAKE_CONCURRENCY, batch_size: int = BULK_INTAKE_BATCH_SIZE,
+                 slot: Optional[Callable[[], AsyncContextManager]] = None,
+                 heartbeat_seconds: int = BULK_INTAKE_HEARTBEAT_SECONDS):
+        self.agent = agent
+        # Taken around each agent call, so runs share the server's global agent concurrency limit
+        self.slot = slot or nullcontext
+        self.runs = runs
+        self.items = items
+        self.write_batch = write_batch
+        self.save_calls = save_calls
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self._tasks = set()
+
+    async def create_run(self, owner_id: str, source: str, concurrency: Optional[int] = None) -> str:
+        run_id = str(uuid.uuid4())
+        await self.runs.insert_one({
+            "id": run_id,
+            "owner_id": owner_id,
+            "source": source,
+            "status": "running",
+            "concurrency": concurrency or self.concurrency,
+            "processed": 0,
+            "created": 0,
+            "needs_review": 0,
+            "failed": 0,
+            "created_at": datetime.utcnow(),
+            "heartbeat_at": datetime.utcnow(),
+            "finished_at": None
+        })
+        return run_id
+
+    async def recover(self):
+        """Mark runs whose process died mid-run as interrupted; they would otherwise stay running forever"""
+        cutoff = datetime.utcnow() - timedelta(seconds=3 * self.heartbeat_seconds)
+        result = await self.runs.update_many(
+            {"status": "running", "$or": [{"heartbeat_at": {"$lt": cutoff}}, {"heartbeat_at": {"$exists": False}}]},
+            {"$set": {"status": "interrupted", "finished_at": datetime.utcnow()}}
+        )
+        if result.modified_count:
+            logger.warning(f"Marked {result.modified_count} abandoned bulk intake runs as interrupted")
+
+    async def stop(self, timeout: float = BULK_INTAKE_SHUTDOWN_TIMEOUT):
+        """Let running runs finish for up to timeout seconds, then cancel the rest (they end as interrupted)"""
+        if not self._tasks:
+            return
+        _, running = await asyncio.wait(list(self._tasks), timeout=timeout)
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+    def start(self, run_id: str, messages: Iterable[str], owner_id: str,
+              concurrency: Optional[int] = None, on_done: Optional[Callable[[], None]] = None):
+        """Run in the background; keeps a reference so the task is not garbage collected"""
+        async def _run():
+            try:
+                await self.run(run_id, messages, owner_id, concurrency)
+            finally:
+                if on_done:
+                    on_done()
+
+        task = asyncio.create_task(_run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def run(self, run_id: str, messages: Iterable[str], owner_id: str, concurrency: Optional[int] = None):
+        queue: asyncio.Queue = asyncio.Queue(maxsize=(concurrency or self.concurrency) * 2)
+        pending: List[Dict[str, Any]] = []
+        flush_lock = asyncio.Lock()
+
+        async def flush():
+            async with flush_lock:
+                if not pending:
+                    return
+                batch = pending[:]
+                pending.clear()
+                try:
+                    await self._write(run_id, owner_id, batch)
+                except Exception as e:
+                    logger.error(f"Bulk intake run {run_id} failed to write a batch: {e}")
+                    await self.runs.update_one({"id": run_id}, {"$inc": {"processed": len(batch), "failed": len(batch)}})
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                index, raw_text = item
+                entry = {"index": index, "trace_id": str(uuid.uuid4())}
+                begin_calls()
+                try:
+                    async with self.slot():
+                        entry["result"] = await self.agent.process_inquiry(raw_text)
+                except Exception as e:
+                    logger.error(f"Bulk intake message {index} failed: {e}")
+                    entry["error"] = str(e)
+                entry["agent_calls"] = [{**call, "trace_id": entry["trace_id"]} for call in drain_calls()]
+                pending.append(entry)
+                if len(pending) >= self.batch_size:
+                    await flush()
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency or self.concurrency)]
+        heartbeat = asyncio.create_task(self._heartbeat(run_id))
+        status = "completed"
+        try:
+            try:
+                # Reading and parsing the mailbox is blocking file I/O, so each message is pulled on a thread
+                reader = iter(messages)
+                index = 0
+                while (raw_text := await asyncio.to_thread(next, reader, None)) is not None:
+                    await queue.put((index, raw_text))
+                    index += 1
+            except Exception as e:
+                logger.error(f"Bulk intake run {run_id} could not read input: {e}")
+                status = "failed"
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        except asyncio.CancelledError:
+            # Shutdown: messages still in flight are dropped, finished ones are written below
+            status = "interrupted"
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            logger.warning(f"Bulk intake run {run_id} interrupted")
+            raise
+        finally:
+            heartbeat.cancel()
+            await flush()
+            await self.runs.update_one(
+                {"id": run_id},
+                {"$set": {"status": status, "finished_at": datetime.utcnow()}}
+            )
+        logger.info(f"Bulk intake run {run_id} {status}")
+
+    async def _heartbeat(self, run_id: str):
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                await self.runs.update_one({"id": run_id}, {"$set": {"heartbeat_at": datetime.utcnow()}})
+            except Exception as e:
+                logger.warning(f"Bulk intake run {run_id} heartbeat failed: {e}")
+
+    async def _write(self, run_id: str, owner_id: str, batch: List[Dict[str, Any]]):
+        complete = [entry for entry in batch if entry.get("result", {}).get("status") == "intake_complete"]
+        written = await self.write_batch(
+            [entry["result"] for entry in complete], owner_id, [entry["trace_id"] for entry in complete]
+        ) if complete else []
+        outcomes = {id(entry): outcome for entry, outcome in zip(complete, written)}
+
+        docs, counts = [], {"processed": 0, "created": 0, "needs_review": 0, "failed": 0}
+        for entry in batch:
+            doc = {"run_id": run_id, "index": entry["index"], "trace_id": entry["trace_id"], "result": entry.get("result")}
+            outcome = outcomes.get(id(entry))
+            if "error" in entry or (outcome and "error" in outcome):
+                doc.update(status="failed", error=entry.get("error") or outcome["error"])
+                counts["failed"] += 1
+            elif outcome:
+                doc.update(status="created", project_id=outcome["project_id"], client_id=outcome["client_id"])
+                counts["created"] += 1
+            else:
+                doc.update(status="needs_review")
+                counts["needs_review"] += 1
+            counts["processed"] += 1
+            docs.append(doc)
+
+        await self.items.insert_many(docs)
+        await self.runs.update_one({"id": run_id}, {"$inc": counts})
+        calls = [call for entry in batch for call in entry["agent_calls"]]
+        if calls and self.save_calls is not None:
+            await self.save_calls(calls)
+
+async def _main(args):
+    import server
+
+    runner = server.bulk_intake_runner
+    run_id = await runner.create_run(args.user_id, os.path.basename(args.path), args.concurrency)
+    await runner.run(run_id, iter_messages(args.path, args.format), args.user_id, args.concurrency)
+    run = await server.db.intake_runs.find_one({"id": run_id}, {"_id": 0})
+    print(json.dumps(run, default=str, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import a mailbox or NDJSON file through the Intake Agent")
+    parser.add_argument("path", help="mbox file, maildir directory or NDJSON file")
+    parser.add_argument("--user-id", required=True, help="Owner of the created clients and projects")
+    parser.add_argument("--format", choices=["mbox", "maildir", "ndjson"], help="Input format (detected if omitted)")
+    parser.add_argument("--concurrency", type=int, default=BULK_INTAKE_CONCURRENCY)
+    asyncio.run(_main(parser.parse_args()))
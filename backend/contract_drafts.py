@@ -0,0 +1,70 @@
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from agents.context import PROJECT_FIELDS, CLIENT_FIELDS, FREELANCER_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Off by default: when on, every project with a budget costs a Contract Agent call, charged to its owner's
+# admission quota, whether or not a contract is ever generated for it
+CONTRACT_PREGENERATE_ENABLED = os.environ.get('CONTRACT_PREGENERATE_ENABLED', 'false').lower() == 'true'
+
+def contract_fingerprint(project: Dict[str, Any], client: Dict[str, Any], user: Dict[str, Any]) -> str:
+    """Hash of every field the Contract Agent prompt reads; any edit to them changes it"""
+    inputs = {
+        "project": {field: project.get(field) for field in PROJECT_FIELDS},
+        "client": {field: client.get(field) for field in CLIENT_FIELDS},
+        "freelancer": {field: user.get(field) for field in FREELANCER_FIELDS}
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+class ContractDraftStore:
+    """Contract variables generated ahead of time, keyed by project and the fingerprint of their inputs"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+        self.generated = 0
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("project_id", unique=True)
+
+    async def put(self, project_id: str, fingerprint: str, variables: Dict[str, Any]):
+        await self.collection.update_one(
+            {"project_id": project_id},
+            {"$set": {"fingerprint": fingerprint, "variables": variables, "created_at": datetime.utcnow()}},
+            upsert=True
+        )
+        self.generated += 1
+
+    async def take(self, project_id: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Consume the draft for a project; a draft built from since-edited inputs is discarded"""
+        draft = await self.collection.find_one_and_delete({"project_id": project_id}, projection={"_id": 0})
+        if draft is None:
+            self.misses += 1
+            return None
+        if draft["fingerprint"] != fingerprint:
+            self.stale += 1
+            logger.info(f"Discarding stale contract draft for project {project_id}")
+            return None
+        self.hits += 1
+        return draft["variables"]
+
+    async def invalidate(self, project_id: str):
+        await self.collection.delete_one({"project_id": project_id})
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale + self.misses
+        return {
+            "generated": self.generated,
+            "hits": self.hits,
+            "stale": self.stale,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
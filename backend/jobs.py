@@ -0,0 +1,278 @@
+import os
+import json
+import uuid
+import hashlib
+import socket
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+JOB_CONCURRENCY = int(os.environ.get('JOB_CONCURRENCY', '4'))
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', '1'))
+# A running job whose lease has expired (worker crashed) is picked up again; the running
+# worker renews the lease every third of this, so handlers may run longer than the lease
+JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', '300'))
+JOB_SHUTDOWN_TIMEOUT = float(os.environ.get('JOB_SHUTDOWN_TIMEOUT', '30'))
+# How long a single-flight key is held: per-entity keys until the job finishes (or this
+# safety expiry), client idempotency keys for the whole window so retries see the same job
+JOB_SINGLE_FLIGHT_SECONDS = int(os.environ.get('JOB_SINGLE_FLIGHT_SECONDS', '600'))
+JOB_IDEMPOTENCY_SECONDS = int(os.environ.get('JOB_IDEMPOTENCY_SECONDS', '86400'))
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+def payload_key(payload: Dict[str, Any]) -> str:
+    """Single-flight key for a request without an Idempotency-Key: only identical payloads share a job"""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+class JobQueue:
+    """Mongo-backed job queue drained by a pool of asyncio workers in each API process"""
+
+    def __init__(self, collection, keys=None, concurrency: int = JOB_CONCURRENCY,
+                 poll_interval: float = JOB_POLL_INTERVAL, lease_seconds: int = JOB_LEASE_SECONDS):
+        self.collection = collection
+        # Single-flight key documents shared by every API process
+        self.keys = keys
+        self.submitted = 0
+        self.coalesced = 0
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.handlers: Dict[str, JobHandler] = {}
+        self.timeouts: Dict[str, Optional[float]] = {}
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def register(self, kind: str, handler: JobHandler, timeout: Optional[float] = None):
+        """Handle jobs of this kind; a handler still running after timeout seconds is cancelled and fails the job"""
+        self.handlers[kind] = handler
+        self.timeouts[kind] = timeout
+
+    def _new_job(self, kind: str, payload: Dict[str, Any], owner_id: Optional[str]) -> Dict[str, Any]:
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for job kind {kind}")
+        return {
+            "id": str(uuid.uuid4()),
+            "kind": kind,
+            "payload": payload,
+            "owner_id": owner_id,
+            "status": JobStatus.QUEUED,
+            "result": None,
+            "error": None,
+            "attempts": 0,
+            "worker_id": None,
+            "lease_id": None,
+            "lease_until": None,
+            "created_at": datetime.utcnow(),
+            "started_at": None,
+            "finished_at": None
+        }
+
+    async def enqueue(self, kind: str, payload: Dict[str, Any], owner_id: Optional[str] = None) -> str:
+        job = self._new_job(kind, payload, owner_id)
+        await self.collection.insert_one(job)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job["id"]
+
+    async def _insert_completed(self, job: Dict[str, Any], result: Any):
+        """Store a job that was completed inline, so callers can poll it like any other"""
+        now = datetime.utcnow()
+        job.update(status=JobStatus.SUCCEEDED, result=result, started_at=now, finished_at=now)
+        await self.collection.insert_one(job)
+
+    async def _hold_key(self, key: str, job_id: str, seconds: int) -> Optional[str]:
+        """Take the single-flight key for job_id; returns the holder's job id if it is already taken"""
+        for _ in range(3):
+            now = datetime.utcnow()
+            try:
+                await self.keys.insert_one({"key": key, "job_id": job_id, "expires_at": now + timedelta(seconds=seconds)})
+                return None
+            except DuplicateKeyError:
+                holder = await self.keys.find_one({"key": key})
+                if holder is None:
+                    continue
+                if holder["expires_at"] < now:
+                    # The TTL monitor only sweeps once a minute
+                    await self.keys.delete_one({"key": key, "job_id": holder["job_id"]})
+                    continue
+                return holder["job_id"]
+        raise RuntimeError(f"Could not acquire single-flight key {key}")
+
+    async def _release_key(self, job: Dict[str, Any]):
+        if self.keys is not None and job.get("flight_key"):
+            await self.keys.delete_one({"key": job["flight_key"], "job_id": job["id"]})
+
+    async def submit(self, kind: str, payload: Dict[str, Any], key: str, idempotent: bool = False,
+                     owner_id: Optional[str] = None,
+                     inline: Optional[Callable[[], Awaitable[Any]]] = None) -> Dict[str, Any]:
+        """Queue a job unless another request already holds the same key, in which case join its job.
+
+        idempotent keys (client-supplied) stay held after success so retries return the same job;
+        other keys are released when the job finishes. inline runs once the key is held: a non-None
+        result completes the job on the spot instead of queueing it. Returns the job status document
+        with a coalesced flag.
+        """
+        job = self._new_job(kind, payload, owner_id)
+        # Scoped by owner, so two users sending the same Idempotency-Key never share a job
+        job.update(flight_key=f"{kind}:{owner_id or ''}:{key}", keep_flight_key=idempotent)
+        self.submitted += 1
+
+        if self.keys is not None:
+            seconds = JOB_IDEMPOTENCY_SECONDS if idempotent else JOB_SINGLE_FLIGHT_SECONDS
+            holder = await self._hold_key(job["flight_key"], job["id"], seconds)
+            if holder is not None:
+                self.coalesced += 1
+                existing = await self.get(holder)
+                # The holder may not have inserted its job document yet
+                return {**(existing or {"id": holder, "kind": kind, "status": JobStatus.QUEUED}), "coalesced": True}
+
+        try:
+            result = await inline() if inline is not None else None
+            if result is not None:
+                await self._insert_completed(job, result)
+                if not idempotent:
+                    await self._release_key(job)
+            else:
+                await self.collection.insert_one(job)
+                if self._wakeup is not None:
+                    self._wakeup.set()
+        except Exception:
+            await self._release_key(job)
+            raise
+
+        return {**{k: v for k, v in job.items() if k not in ("_id", "payload", "lease_id", "lease_until")}, "coalesced": False}
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"id": job_id}, {"_id": 0, "payload": 0, "lease_id": 0, "lease_until": 0})
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("id", unique=True)
+        await self.collection.create_index([("status", 1), ("created_at", 1)])
+        if self.keys is not None:
+            await self.keys.create_index("key", unique=True)
+            await self.keys.create_index("expires_at", expireAfterSeconds=0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "workers": len(self._workers),
+            "submitted": self.submitted,
+            "coalesced": self.coalesced
+        }
+
+    async def start(self):
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        logger.info(f"Started {self.concurrency} job workers on {self.worker_id}")
+
+    async def stop(self, timeout: float = JOB_SHUTDOWN_TIMEOUT):
+        """Stop claiming new jobs and wait for in-flight ones to finish"""
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if not self._workers:
+            return
+        done, pending = await asyncio.wait(self._workers, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            # Their leases expire and another worker picks the jobs up again
+            logger.warning(f"{len(pending)} job workers did not drain within {timeout}s")
+        self._workers = []
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": JobStatus.QUEUED},
+                {"status": JobStatus.RUNNING, "lease_until": {"$lt": now}}
+            ]},
+            {
+                "$set": {
+                    "status": JobStatus.RUNNING,
+                    "worker_id": self.worker_id,
+                    # Identifies this claim, so a worker whose lease was taken over cannot renew or finish the job
+                    "lease_id": str(uuid.uuid4()),
+                    "started_at": now,
+                    "lease_until": now + timedelta(seconds=self.lease_seconds)
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _worker(self):
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logger.error(f"Job claim failed: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _heartbeat(self, job: Dict[str, Any], handler: asyncio.Future):
+        """Extend the job's lease while its handler runs; cancel the handler if another worker took the job over"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                renewed = await self.collection.update_one(
+                    {"id": job["id"], "lease_id": job["lease_id"]},
+                    {"$set": {"lease_until": datetime.utcnow() + timedelta(seconds=self.lease_seconds)}}
+                )
+            except Exception as e:
+                logger.warning(f"Job {job['id']} lease renewal failed: {e}")
+                continue
+            if renewed.matched_count == 0:
+                logger.error(f"Job {job['id']} ({job['kind']}) lost its lease, cancelling it")
+                job["lease_lost"] = True
+                handler.cancel()
+                return
+
+    async def _run(self, job: Dict[str, Any]):
+        update: Dict[str, Any] = {"finished_at": None, "lease_until": None}
+        timeout = self.timeouts.get(job["kind"])
+        handler = asyncio.ensure_future(asyncio.wait_for(self.handlers[job["kind"]](job["payload"]), timeout))
+        heartbeat = asyncio.create_task(self._heartbeat(job, handler))
+        try:
+            result = await handler
+            update.update(status=JobStatus.SUCCEEDED, result=result, error=None)
+        except asyncio.TimeoutError:
+            logger.error(f"Job {job['id']} ({job['kind']}) cancelled after its {timeout}s deadline")
+            update.update(status=JobStatus.FAILED, error=f"Deadline of {timeout}s exceeded")
+        except asyncio.CancelledError:
+            if not job.get("lease_lost"):
+                raise
+            # The worker that took the job over records its outcome
+            return
+        except Exception as e:
+            logger.error(f"Job {job['id']} ({job['kind']}) failed: {e}")
+            update.update(status=JobStatus.FAILED, error=getattr(e, 'detail', None) or str(e) or type(e).__name__)
+        finally:
+            heartbeat.cancel()
+        update["finished_at"] = datetime.utcnow()
+        await self.collection.update_one({"id": job["id"], "lease_id": job["lease_id"]}, {"$set": update})
+        # A failed job frees its key even when idempotent, so the client can retry
+        if update["status"] == JobStatus.FAILED or not job.get("keep_flight_key"):
+            await self._release_key(job)
@@ -0,0 +1,109 @@
+"""PDF micro-benchmark: per-PDF render time of the compiled templates against compiling them for every render.
+
+The cold path builds a fresh CompiledTemplates (stylesheet, static sections and their layout) per PDF,
+which is the work every render did before the templates were compiled once per process:
+    python pdf_bench.py --renders 200
+"""
+import json
+import time
+import argparse
+from typing import Any, Callable, Dict, List
+
+from pdf_templates import CompiledTemplates, templates
+
+SAMPLE_CONTRACT = {
+    "client_name": "Dana Whitfield",
+    "client_company": "Northwind Outfitters",
+    "client_email": "dana@northwind.example",
+    "freelancer_name": "Sam Rivera",
+    "freelancer_business": "Sam Digital Services",
+    "project_description": "Redesign and rebuild the e-commerce storefront with a headless CMS, "
+                           "a new checkout flow and analytics integration.",
+    "deliverables_list": [
+        "Design system and page templates",
+        "Headless CMS setup and content migration",
+        "Checkout flow with payment provider integration",
+        "Analytics and conversion tracking",
+        "Launch support and handover documentation"
+    ],
+    "start_date": "2025-03-01",
+    "end_date": "2025-05-30",
+    "milestone_1": "Designs approved - 2025-03-21",
+    "milestone_2": "Storefront in staging - 2025-04-25",
+    "milestone_3": "Launch - 2025-05-30",
+    "project_budget": 18500,
+    "payment_terms": "40% upfront, 30% at staging, 30% on launch",
+    "invoice_platform": "Stripe",
+    "net_terms": "15",
+    "late_fee": "1.5",
+    "jurisdiction": "State of California"
+}
+
+SAMPLE_INVOICE = (
+    {
+        "invoice_number": "INV-2025-0042",
+        "issue_date": "2025-04-25",
+        "due_date": "2025-05-10",
+        "project_title": "Storefront rebuild",
+        "project_description": "Redesign and rebuild the e-commerce storefront",
+        "line_items": [
+            {"description": "Headless CMS setup and content migration", "amount": 3200.0},
+            {"description": "Checkout flow with payment provider integration", "amount": 2350.0}
+        ],
+        "subtotal": 5550.0,
+        "tax_rate": 0.0,
+        "tax_amount": 0.0,
+        "total_due": 5550.0,
+        "payment_platform": "Stripe",
+        "payment_link": "https://pay.example/inv-2025-0042",
+        "net_terms": "15",
+        "late_fee": "1.5"
+    },
+    {"name": "Dana Whitfield", "company": "Northwind Outfitters", "email": "dana@northwind.example"},
+    {"name": "Sam Rivera", "business": "Sam Digital Services", "email": "sam@rivera.example"}
+)
+
+def percentile(samples: List[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    return {
+        "mean_ms": round(sum(samples) / len(samples), 3),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3)
+    }
+
+def timed(render: Callable[[], bytes]) -> float:
+    started = time.perf_counter()
+    render()
+    return (time.perf_counter() - started) * 1000
+
+def run_benchmark(renders: int) -> Dict[str, Any]:
+    cases = {
+        "contract": (lambda t: t.contract(SAMPLE_CONTRACT)),
+        "invoice": (lambda t: t.invoice(*SAMPLE_INVOICE))
+    }
+    report = {"renders": renders}
+    for name, render in cases.items():
+        # Warm both paths so neither pays for ReportLab imports or font loading
+        render(templates)
+        render(CompiledTemplates())
+        cold: List[float] = []
+        compiled: List[float] = []
+        # Interleaved so drift (frequency scaling, GC) affects both paths alike
+        for _ in range(renders):
+            cold.append(timed(lambda: render(CompiledTemplates())))
+            compiled.append(timed(lambda: render(templates)))
+        cold_ms, compiled_ms = sum(cold) / renders, sum(compiled) / renders
+        report[name] = {
+            "cold": summarize(cold),
+            "compiled": summarize(compiled),
+            "reduction_pct": round((1 - compiled_ms / cold_ms) * 100, 1) if cold_ms else 0.0
+        }
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark compiled PDF templates")
+    parser.add_argument("--renders", type=int, default=200, help="PDFs rendered per template and path")
+    print(json.dumps(run_benchmark(parser.parse_args().renders), indent=2))
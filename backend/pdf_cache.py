@@ -0,0 +1,115 @@
+import os
+import json
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from pdf_templates import TEMPLATE_VERSION
+
+logger = logging.getLogger(__name__)
+
+PDF_CACHE_MEMORY_MB = float(os.environ.get('PDF_CACHE_MEMORY_MB', '64'))
+
+def pdf_cache_key(kind: str, inputs: Dict[str, Any]) -> str:
+    """Content address of a rendered PDF: template version plus everything the template reads"""
+    digest = hashlib.sha256()
+    for part in (TEMPLATE_VERSION, kind, json.dumps(inputs, sort_keys=True, default=str, ensure_ascii=False)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+class PdfCache:
+    """Size-bounded in-process LRU of rendered PDFs, backed by the documents' stored PDFs.
+
+    Nothing is written to GridFS here: the durable copy of each PDF is the one PdfStore keeps for its document.
+    """
+
+    def __init__(self, store=None, memory_mb: float = PDF_CACHE_MEMORY_MB):
+        self.store = store
+        self.memory_bytes = int(memory_mb * 1024 * 1024)
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        # Renders in progress, so concurrent requests for the same PDF share one render
+        self._rendering: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _remember(self, key: str, data: bytes):
+        if len(data) > self.memory_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= len(previous)
+        self._entries[key] = data
+        self._size += len(data)
+        while self._size > self.memory_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        data = self._entries.get(key)
+        if data is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+        if self.store is not None:
+            try:
+                data = await self.store.read_by_key(key)
+            except Exception as e:
+                logger.warning(f"PDF cache lookup failed: {e}")
+                data = None
+            if data is not None:
+                self._remember(key, data)
+                self.hits += 1
+                self.persistent_hits += 1
+                return data
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, data: bytes):
+        self._remember(key, data)
+
+    async def _render(self, key: str, render: Callable[[], Awaitable[bytes]]) -> bytes:
+        data = await render()
+        self.put(key, data)
+        return data
+
+    def _render_done(self, key: str, task: asyncio.Task):
+        del self._rendering[key]
+        if not task.cancelled():
+            # Retrieved here so a failure nobody is still waiting for is not reported as unhandled
+            task.exception()
+
+    async def get_or_render(self, key: str, render: Callable[[], Awaitable[bytes]]) -> bytes:
+        """Cached PDF for key, rendering and storing it on a miss.
+
+        Concurrent misses for one key share a render, which finishes (and is cached) even if its requesters go away.
+        """
+        data = await self.get(key)
+        if data is not None:
+            return data
+        task = self._rendering.get(key)
+        if task is None:
+            task = self._rendering[key] = asyncio.ensure_future(self._render(key, render))
+            task.add_done_callback(lambda done: self._render_done(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "memory_bytes": self._size,
+            "hits": self.hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,62 @@
+import os
+import asyncio
+import zipfile
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Deque, List
+
+# PDFs fetched or rendered ahead of the one being written to an export archive
+PDF_EXPORT_PREFETCH = int(os.environ.get('PDF_EXPORT_PREFETCH', '8'))
+
+class ZipStream:
+    """A ZIP archive written entry by entry, handing back each entry's bytes as soon as it is added.
+
+    The archive never seeks (sizes and CRCs follow each entry in a data descriptor), so nothing
+    but the central directory's per-entry records is kept once an entry's bytes are taken.
+    """
+
+    def __init__(self):
+        self._pending: List[bytes] = []
+        # No tell(), so zipfile treats this as an unseekable stream
+        self._zip = zipfile.ZipFile(self, mode="w", compression=zipfile.ZIP_DEFLATED)
+
+    def write(self, data) -> int:
+        self._pending.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def _take(self) -> bytes:
+        data, self._pending = b"".join(self._pending), []
+        return data
+
+    def add(self, name: str, data: bytes, modified: datetime) -> bytes:
+        info = zipfile.ZipInfo(name, date_time=max(modified, datetime(1980, 1, 1)).timetuple()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        # PDFs are small, but force_zip64 keeps a huge one from failing halfway through the archive
+        with self._zip.open(info, "w", force_zip64=len(data) > zipfile.ZIP64_LIMIT) as entry:
+            entry.write(data)
+        return self._take()
+
+    def close(self) -> bytes:
+        self._zip.close()
+        return self._take()
+
+async def prefetch(items: AsyncIterable[Any], fetch: Callable[[Any], Awaitable[Any]],
+                   window: int = PDF_EXPORT_PREFETCH) -> AsyncIterator[Any]:
+    """Yield (item, fetch(item)) in order, running up to window fetches ahead of the consumer"""
+    running: Deque = deque()
+    try:
+        async for item in items:
+            running.append((item, asyncio.ensure_future(fetch(item))))
+            if len(running) >= window:
+                item, task = running.popleft()
+                yield item, await task
+        while running:
+            item, task = running.popleft()
+            yield item, await task
+    finally:
+        # The client went away or a fetch failed: drop the read-ahead
+        for _, task in running:
+            task.cancel()
@@ -0,0 +1,134 @@
+import os
+import time
+import asyncio
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Deque, Dict, Optional
+
+from agents.accounting import percentile
+
+logger = logging.getLogger(__name__)
+
+# Worker processes rendering PDFs; 0 renders on a thread in this process instead
+PDF_RENDER_WORKERS = int(os.environ.get('PDF_RENDER_WORKERS', str(min(4, os.cpu_count() or 1))))
+# Renders that may wait for a free worker before new ones are turned away
+PDF_RENDER_MAX_QUEUE = int(os.environ.get('PDF_RENDER_MAX_QUEUE', '32'))
+# Seconds a render may take, including its wait for a worker
+PDF_RENDER_TIMEOUT = float(os.environ.get('PDF_RENDER_TIMEOUT', '30'))
+
+class PdfRenderBusy(Exception):
+    """Raised when every worker is busy and the render queue is full"""
+
+def _warm_worker():
+    """Pool initializer: import ReportLab and lay out one page so the first real render pays no import or font cost"""
+    from pdf_templates import generate_contract_pdf
+    generate_contract_pdf({}, "")
+
+def _ping() -> int:
+    return os.getpid()
+
+class PdfRenderer:
+    """Runs ReportLab renders in a pool of warm worker processes, so PDF downloads use every core
+    without blocking the event loop"""
+
+    def __init__(self, workers: int = PDF_RENDER_WORKERS, max_queue: int = PDF_RENDER_MAX_QUEUE,
+                 timeout: float = PDF_RENDER_TIMEOUT):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.semaphore = asyncio.Semaphore(max(workers, 1))
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.in_flight = 0
+        self.queued = 0
+        self.rendered = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.restarts = 0
+        self.render_ms: Deque[float] = deque(maxlen=500)
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn, not fork: forking a process with Mongo and HTTP client threads can deadlock the child
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_worker
+        )
+
+    async def start(self):
+        if self.workers <= 0 or self.executor is not None:
+            return
+        self.executor = self._new_executor()
+        # Submitting one task per worker starts them all now rather than on the first downloads
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(loop.run_in_executor(self.executor, _ping) for _ in range(self.workers)))
+        logger.info(f"Started {len(set(pids))} PDF render workers")
+
+    async def stop(self):
+        if self.executor is not None:
+            executor, self.executor = self.executor, None
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+            logger.info("Stopped PDF render workers")
+
+    async def _execute(self, render: Callable[..., bytes], args) -> bytes:
+        if self.workers <= 0:
+            return await asyncio.to_thread(render, *args)
+        if self.executor is None:
+            self.executor = self._new_executor()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, render, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); replace the pool so later renders recover
+            self.restarts += 1
+            logger.error("PDF render pool broke, restarting it")
+            self.executor = self._new_executor()
+            raise
+
+    async def render(self, render: Callable[..., bytes], *args: Any) -> bytes:
+        """Run a module-level render function (picklable, as are its arguments) on a worker"""
+        if self.semaphore.locked() and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise PdfRenderBusy("PDF render queue is full")
+        try:
+            async with asyncio.timeout(self.timeout):
+                self.queued += 1
+                try:
+                    await self.semaphore.acquire()
+                finally:
+                    self.queued -= 1
+                self.in_flight += 1
+                started = time.perf_counter()
+                try:
+                    pdf_bytes = await self._execute(render, args)
+                finally:
+                    self.in_flight -= 1
+                    self.semaphore.release()
+        except TimeoutError:
+            # A render already on a worker cannot be interrupted; it finishes and its result is dropped
+            self.timeouts += 1
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        self.render_ms.append((time.perf_counter() - started) * 1000)
+        self.rendered += 1
+        return pdf_bytes
+
+    def stats(self) -> Dict[str, Any]:
+        samples = list(self.render_ms)
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queued,
+            "queue_limit": self.max_queue,
+            "rendered": self.rendered,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "restarts": self.restarts,
+            "render_ms_p50": percentile(samples, 50) or 0.0,
+            "render_ms_p95": percentile(samples, 95) or 0.0
+        }
@@ -0,0 +1,113 @@
+import os
+import logging
+from typing import Any, AsyncIterator, Dict, Optional
+
+from gridfs.errors import NoFile
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+logger = logging.getLogger(__name__)
+
+PDF_EAGER_RENDER_ENABLED = os.environ.get('PDF_EAGER_RENDER_ENABLED', 'true').lower() == 'true'
+PDF_STORE_BUCKET = "documents"
+
+def pdf_filename(entity_type: str, entity_id: str) -> str:
+    return f"{entity_type}/{entity_id}.pdf"
+
+def pdf_url(entity_type: str, entity_id: str) -> str:
+    """Download URL of a contract or invoice PDF, served from the stored blob"""
+    return f"/api/{entity_type}s/{entity_id}/pdf"
+
+class PdfStore:
+    """The rendered PDF of each contract and invoice, kept in GridFS for as long as the document exists.
+
+    Each blob records the content key it was rendered from, so one made from since-edited inputs is never served.
+    """
+
+    def __init__(self, database):
+        self.bucket = AsyncIOMotorGridFSBucket(database, bucket_name=PDF_STORE_BUCKET)
+        self.files = database[f"{PDF_STORE_BUCKET}.files"]
+        self.stored = 0
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+
+    async def ensure_indexes(self):
+        await self.files.create_index("filename")
+        await self.files.create_index("metadata.key")
+
+    async def _current(self, entity_type: str, entity_id: str) -> Optional[Dict[str, Any]]:
+        return await self.files.find_one(
+            {"filename": pdf_filename(entity_type, entity_id)}, {"_id": 1, "length": 1, "metadata": 1},
+            sort=[("uploadDate", -1)]
+        )
+
+    async def has(self, entity_type: str, entity_id: str, key: str) -> bool:
+        stored = await self._current(entity_type, entity_id)
+        return stored is not None and stored.get("metadata", {}).get("key") == key
+
+    async def open(self, entity_type: str, entity_id: str, key: str):
+        """The stored PDF rendered from content key, as a GridOut, or None"""
+        stored = await self._current(entity_type, entity_id)
+        if stored is None:
+            self.misses += 1
+            return None
+        if stored.get("metadata", {}).get("key") != key:
+            self.stale += 1
+            return None
+        try:
+            grid_out = await self.bucket.open_download_stream(stored["_id"])
+        except NoFile:
+            # Replaced between the lookup and the open
+            self.misses += 1
+            return None
+        self.hits += 1
+        return grid_out
+
+    async def read_by_key(self, key: str) -> Optional[bytes]:
+        """Any stored PDF rendered from content key, whichever document it belongs to, or None"""
+        stored = await self.files.find_one({"metadata.key": key}, {"_id": 1})
+        if stored is None:
+            return None
+        try:
+            grid_out = await self.bucket.open_download_stream(stored["_id"])
+        except NoFile:
+            return None
+        return await grid_out.read()
+
+    async def save(self, entity_type: str, entity_id: str, key: str, data: bytes):
+        """Store the PDF rendered from content key, replacing earlier renders of the document"""
+        filename = pdf_filename(entity_type, entity_id)
+        file_id = await self.bucket.upload_from_stream(
+            filename, data, metadata={"key": key, "entity_type": entity_type, "entity_id": entity_id}
+        )
+        async for older in self.files.find({"filename": filename, "_id": {"$ne": file_id}}, {"_id": 1}):
+            try:
+                await self.bucket.delete(older["_id"])
+            except NoFile:
+                pass
+        self.stored += 1
+
+    async def delete(self, entity_type: str, entity_id: str):
+        async for stored in self.files.find({"filename": pdf_filename(entity_type, entity_id)}, {"_id": 1}):
+            try:
+                await self.bucket.delete(stored["_id"])
+            except NoFile:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale + self.misses
+        return {
+            "stored": self.stored,
+            "hits": self.hits,
+            "stale": self.stale,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+async def iter_chunks(grid_out) -> AsyncIterator[bytes]:
+    """Stream a stored file chunk by chunk rather than loading it whole"""
+    while True:
+        chunk = await grid_out.readchunk()
+        if not chunk:
+            return
+        yield chunk
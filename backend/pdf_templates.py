@@ -0,0 +1,233 @@
+"""ReportLab templates for contract and invoice PDFs.
+
+Kept free of app state so the PDF render pool's worker processes can import it on their own.
+Styles and the static sections are compiled once per process, when this module is imported;
+each render only builds the paragraphs that depend on its inputs.
+"""
+import io
+import copy
+from functools import lru_cache
+from typing import Dict, Any, List
+
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Flowable
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+
+# Part of every rendered-PDF cache key; bump whenever a template's output changes
+TEMPLATE_VERSION = "1"
+
+STANDARD_TERMS = """
+    <b>4. Ownership and Rights</b><br/>
+    Upon receipt of full payment, Client will own the final deliverables. Freelancer retains the right to showcase the work in portfolios or marketing materials.<br/><br/>
+
+    <b>5. Confidentiality</b><br/>
+    Both parties agree to keep confidential information private, including trade secrets, client data, and sensitive business materials.<br/><br/>
+
+    <b>6. Termination</b><br/>
+    Either party may terminate this Agreement with written notice. Client must pay for work completed up to the termination date.<br/><br/>
+
+    <b>7. Governing Law</b><br/>
+    This Agreement will be governed by the laws of {jurisdiction}.<br/><br/>
+    """
+
+SIGNATURE_BLOCK = """
+    <b>Signatures</b><br/><br/>
+    Client: ___________________________   Date: ____________<br/><br/>
+    Freelancer: ________________________   Date: ____________
+    """
+
+class StaticParagraph(Paragraph):
+    """A paragraph parsed and laid out once, then copied into each story.
+
+    Copies share the parsed markup and the line breaks computed per frame width. Drawing and
+    splitting modify the lines, so each copy lays out from its own copy of the pristine breaks.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # Paragraph.split builds the pieces of a split paragraph through self.__class__
+        super().__init__(*args, **kwargs)
+        self._layouts: Dict[float, Dict[str, Any]] = {}
+
+    def wrap(self, availWidth, availHeight):
+        layout = self._layouts.get(availWidth)
+        if layout is None:
+            before = dict(vars(self))
+            super().wrap(availWidth, availHeight)
+            # Everything wrap set (line breaks, widths, height, re-split frags) is kept for the next copy
+            layout = self._layouts[availWidth] = {
+                name: value for name, value in vars(self).items() if before.get(name) is not value
+            }
+            layout["blPara"] = copy.deepcopy(self.blPara)
+            return self.width, self.height
+        vars(self).update(layout)
+        self.blPara = copy.deepcopy(layout["blPara"])
+        return self.width, self.height
+
+class CompiledTemplates:
+    """Styles and static flowables for the contract and invoice templates"""
+
+    def __init__(self):
+        styles = getSampleStyleSheet()
+        self.contract_title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'],
+                                                   fontSize=18, spaceAfter=20, alignment=1)
+        self.contract_style = ParagraphStyle('Contract', parent=styles['Normal'],
+                                             fontSize=11, spaceAfter=12, leading=16)
+        self.invoice_title_style = ParagraphStyle('InvoiceTitle', parent=styles['Heading1'],
+                                                  fontSize=18, spaceAfter=20, alignment=1)
+        self.invoice_header_style = ParagraphStyle('InvoiceHeader', parent=styles['Normal'],
+                                                   fontSize=11, spaceAfter=8)
+        self.invoice_parties_style = ParagraphStyle('Parties', parent=styles['Normal'],
+                                                    fontSize=11, spaceAfter=12)
+
+        self.contract_title = StaticParagraph("FREELANCE SERVICES AGREEMENT", self.contract_title_style)
+        self.signature_block = StaticParagraph(SIGNATURE_BLOCK, self.contract_style)
+        self.invoice_title = StaticParagraph("INVOICE", self.invoice_title_style)
+        # Sections 4-7 only vary by jurisdiction, which takes few distinct values
+        self.standard_terms = lru_cache(maxsize=32)(
+            lambda jurisdiction: StaticParagraph(STANDARD_TERMS.format(jurisdiction=jurisdiction), self.contract_style)
+        )
+
+    @staticmethod
+    def _build(story: List[Flowable]) -> bytes:
+        buffer = io.BytesIO()
+        # invariant: no timestamp or random document ID, so the same inputs always give the same bytes
+        doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=1*inch, invariant=True)
+        doc.build(story)
+        return buffer.getvalue()
+
+    def contract(self, variables: Dict[str, Any]) -> bytes:
+        content_style = self.contract_style
+        story: List[Flowable] = [copy.copy(self.contract_title), Spacer(1, 20)]
+
+        # Parties
+        parties_text = f"""
+    This Freelance Services Agreement ("Agreement") is made between:<br/><br/>
+    <b>Client:</b> {variables.get('client_name', 'N/A')}, {variables.get('client_company', 'N/A')},
+    with primary contact at {variables.get('client_email', 'N/A')} ("Client")<br/>
+    and<br/>
+    <b>Freelancer:</b> {variables.get('freelancer_name', 'N/A')},
+    operating as {variables.get('freelancer_business', 'N/A')} ("Freelancer").
+    """
+        story.append(Paragraph(parties_text, content_style))
+        story.append(Spacer(1, 20))
+
+        # Section 1: Project Scope
+        scope_text = f"""
+    <b>1. Project Scope</b><br/>
+    Freelancer agrees to perform the following services for Client:<br/>
+    {variables.get('project_description', 'N/A')}<br/><br/>
+    Deliverables will include:<br/>
+    """
+        for deliverable in variables.get('deliverables_list', []):
+            scope_text += f"• {deliverable}<br/>"
+        story.append(Paragraph(scope_text, content_style))
+        story.append(Spacer(1, 15))
+
+        # Section 2: Timeline
+        timeline_text = f"""
+    <b>2. Timeline</b><br/>
+    Work will commence on {variables.get('start_date', 'TBD')} and is expected to be completed by {variables.get('end_date', 'TBD')}.<br/><br/>
+    Milestones:<br/>
+    • {variables.get('milestone_1', 'TBD')}<br/>
+    • {variables.get('milestone_2', 'TBD')}<br/>
+    • {variables.get('milestone_3', 'TBD')}<br/>
+    """
+        story.append(Paragraph(timeline_text, content_style))
+        story.append(Spacer(1, 15))
+
+        # Section 3: Payment Terms
+        payment_text = f"""
+    <b>3. Payment Terms</b><br/>
+    Client agrees to pay Freelancer a total of <b>${variables.get('project_budget', 0):,.2f}</b> for the services described above.<br/><br/>
+    Payment schedule:<br/>
+    • {variables.get('payment_terms', 'Net 30')}<br/><br/>
+    Invoices will be sent via {variables.get('invoice_platform', 'email')} and are payable within {variables.get('net_terms', '30')} days.
+    Late payments may incur a fee of {variables.get('late_fee', '1.5')}%.
+    """
+        story.append(Paragraph(payment_text, content_style))
+        story.append(Spacer(1, 15))
+
+        # Sections 4-7: Standard Terms
+        story.append(copy.copy(self.standard_terms(variables.get('jurisdiction', 'State of California'))))
+        story.append(Spacer(1, 30))
+
+        # Signatures
+        story.append(copy.copy(self.signature_block))
+        return self._build(story)
+
+    def invoice(self, invoice_data: Dict[str, Any], client_data: Dict[str, Any], freelancer_data: Dict[str, Any]) -> bytes:
+        parties_style = self.invoice_parties_style
+        story: List[Flowable] = [copy.copy(self.invoice_title), Spacer(1, 20)]
+
+        # Invoice header info
+        header_text = f"""
+    Invoice Number: {invoice_data.get('invoice_number', 'N/A')}<br/>
+    Date Issued: {invoice_data.get('issue_date', 'N/A')}<br/>
+    Due Date: {invoice_data.get('due_date', 'N/A')}<br/>
+    """
+        story.append(Paragraph(header_text, self.invoice_header_style))
+        story.append(Spacer(1, 20))
+
+        # Bill To and From
+        parties_text = f"""
+    <b>Bill To:</b><br/>
+    {client_data.get('name', 'N/A')}<br/>
+    {client_data.get('company', '')}<br/>
+    {client_data.get('email', 'N/A')}<br/><br/>
+
+    <b>From:</b><br/>
+    {freelancer_data.get('name', 'N/A')}<br/>
+    {freelancer_data.get('business', 'N/A')}<br/>
+    {freelancer_data.get('email', 'N/A')}<br/>
+    """
+        story.append(Paragraph(parties_text, parties_style))
+        story.append(Spacer(1, 20))
+
+        # Project info
+        project_text = f"""
+    <b>Project:</b> {invoice_data.get('project_title', 'N/A')}<br/>
+    Description: {invoice_data.get('project_description', 'N/A')}<br/>
+    """
+        story.append(Paragraph(project_text, parties_style))
+        story.append(Spacer(1, 20))
+
+        # Line Items
+        line_items_text = "<b>Line Items:</b><br/>"
+        for i, item in enumerate(invoice_data.get('line_items', []), 1):
+            line_items_text += f"{i}. {item.get('description', 'N/A')} — ${item.get('amount', 0):,.2f}<br/>"
+        story.append(Paragraph(line_items_text, parties_style))
+        story.append(Spacer(1, 15))
+
+        # Totals
+        totals_text = f"""
+    <b>Subtotal:</b> ${invoice_data.get('subtotal', 0):,.2f}<br/>
+    <b>Tax ({invoice_data.get('tax_rate', 0)}%):</b> ${invoice_data.get('tax_amount', 0):,.2f}<br/>
+    <b>Total Due:</b> <b>${invoice_data.get('total_due', 0):,.2f}</b><br/>
+    """
+        story.append(Paragraph(totals_text, parties_style))
+        story.append(Spacer(1, 20))
+
+        # Payment instructions
+        payment_text = f"""
+    <b>Payment Instructions:</b><br/>
+    Please pay via {invoice_data.get('payment_platform', 'Stripe')} using the following link:<br/>
+    {invoice_data.get('payment_link', 'Payment link will be provided')}<br/><br/>
+
+    Payment is due within {invoice_data.get('net_terms', '30')} days of invoice date.
+    Late payments may incur a fee of {invoice_data.get('late_fee', '1.5')}%.<br/><br/>
+
+    Thank you for your business!
+    """
+        story.append(Paragraph(payment_text, parties_style))
+        return self._build(story)
+
+templates = CompiledTemplates()
+
+def generate_contract_pdf(variables: Dict[str, Any], output_path: str):
+    """Generate contract PDF using your custom template"""
+    return templates.contract(variables)
+
+def generate_invoice_pdf(invoice_data: Dict[str, Any], client_data: Dict[str, Any], freelancer_data: Dict[str, Any], output_path: str):
+    """Generate invoice PDF using your custom template"""
+    return templates.invoice(invoice_data, client_data, freelancer_data)
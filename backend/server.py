@@ -1,4 +1,6 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Response, Header
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Response, Header, UploadFile, File, Form
+from fastapi.responses import StreamingResponse, JSONResponse
+from starlette.background import BackgroundTask
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -10,13 +12,11 @@ from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timedelta
 from enum import Enum
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.colors import black, blue, grey
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-import io
+import json
+import math
+import asyncio
+import shutil
+import tempfile
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -155,6 +155,9 @@ class InvoiceCreate(BaseModel):
     mode: str  # "fixed", "hourly", "milestone"
     line_items: Optional[List[Dict[str, Any]]] = None
 
+class BulkInvoiceCreate(BaseModel):
+    invoices: List[InvoiceCreate]
+
 class AgentEvent(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     trace_id: str
@@ -178,14 +181,88 @@ class IntakeResult(BaseModel):
 # Import AI Agents from separate files
 from agents.intake_agent import IntakeAgent
 from agents.contract_agent import ContractAgent
-from agents.billing_agent import BillingAgent
+from agents.billing_agent import BillingAgent, BILLING_BATCH_SIZE, BILLING_BATCH_CONCURRENCY
+from agents.intake_cache import IntakeCache
+from agents.fast_path import FastPathExtractor, FAST_PATH_ENABLED
+from agents.preprocess import InquiryPreprocessor
+from agents.runtime import get_runtime, close_runtime
+from agents.routing import get_router
+from agents.accounting import begin_calls, drain_calls, percentile
+from agents.context import get_context_builder, projection, PROJECT_FIELDS, CLIENT_FIELDS, FREELANCER_FIELDS
 
 # Initialize agents
-intake_agent = IntakeAgent()
+intake_cache = IntakeCache(db.intake_cache)
+intake_agent = IntakeAgent(
+    cache=intake_cache,
+    fast_path=FastPathExtractor() if FAST_PATH_ENABLED else None,
+    preprocessor=InquiryPreprocessor()
+)
 contract_agent = ContractAgent()
 billing_agent = BillingAgent()
 
+# Per-route deadlines (seconds) for agent work; past them the agent call is cancelled upstream
+INTAKE_ROUTE_DEADLINE = float(os.environ.get('INTAKE_ROUTE_DEADLINE', '45'))
+INTAKE_STREAM_DEADLINE = float(os.environ.get('INTAKE_STREAM_DEADLINE', '90'))
+CONTRACT_JOB_DEADLINE = float(os.environ.get('CONTRACT_JOB_DEADLINE', '120'))
+INVOICE_JOB_DEADLINE = float(os.environ.get('INVOICE_JOB_DEADLINE', '60'))
+INVOICE_BULK_JOB_DEADLINE = float(os.environ.get('INVOICE_BULK_JOB_DEADLINE', '900'))
+PDF_RENDER_JOB_DEADLINE = float(os.environ.get('PDF_RENDER_JOB_DEADLINE', '600'))
+DISCONNECT_POLL_INTERVAL = 0.25
+
+# Every agent endpoint is charged to the caller's quota; interactive ones also take an admission slot,
+# and background agent calls (jobs, bulk runs) take a slot from the same global limit
+from admission import AdmissionController, AdmissionRejected
+admission = AdmissionController()
+
+# Bulk intake writes through write_intake_results, defined with the intake endpoints
+from bulk_intake import BulkIntakeRunner, iter_messages, count_messages, BULK_INTAKE_CONCURRENCY
+bulk_intake_runner = BulkIntakeRunner(
+    intake_agent,
+    db.intake_runs,
+    db.intake_run_items,
+    lambda results, user_id, trace_ids: write_intake_results(results, user_id, trace_ids),
+    save_calls=lambda calls: save_agent_calls(calls),
+    slot=admission.slot
+)
+
+# ReportLab renders run in a pool of worker processes, off the event loop
+from pdf_templates import generate_contract_pdf, generate_invoice_pdf
+from pdf_render import PdfRenderer, PdfRenderBusy
+pdf_renderer = PdfRenderer()
+
+# Each contract's and invoice's PDF, rendered after it is written and served from GridFS
+from pdf_store import PdfStore, PDF_EAGER_RENDER_ENABLED, pdf_url, iter_chunks
+pdf_store = PdfStore(db)
+
+# Rendered PDFs, keyed by template version and inputs, in memory and backed by the stored PDFs above
+from pdf_cache import PdfCache, pdf_cache_key
+pdf_cache = PdfCache(pdf_store)
+
+# Date-range exports of those PDFs, streamed as ZIP archives
+from pdf_export import ZipStream, prefetch, PDF_EXPORT_PREFETCH
+
+# Contract and invoice generation run as background jobs; handlers are registered with the endpoints
+from jobs import JobQueue, JobStatus, payload_key
+job_queue = JobQueue(db.jobs, db.job_keys)
+
+# Contract variables generated speculatively when a project with a budget is created
+from contract_drafts import ContractDraftStore, contract_fingerprint, CONTRACT_PREGENERATE_ENABLED
+contract_drafts = ContractDraftStore(db.contract_drafts)
+
 # Helper Functions
+def job_response(job: Dict[str, Any], response: Response) -> Dict[str, Any]:
+    """Body for a submitted job: 200 with the result when it already finished, 202 otherwise"""
+    body = {
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": f"/api/jobs/{job['id']}",
+        "coalesced": job.get("coalesced", False)
+    }
+    if job["status"] == JobStatus.SUCCEEDED:
+        response.status_code = 200
+        body["result"] = job.get("result")
+    return body
+
 async def log_agent_event(trace_id: str, kind: EventKind, entity_type: str, entity_id: str, payload: Dict[str, Any]):
     """Log an agent event for audit trail"""
     event = AgentEvent(
@@ -197,189 +274,66 @@ async def log_agent_event(trace_id: str, kind: EventKind, entity_type: str, enti
     )
     await db.agent_events.insert_one(event.dict())
     logger.info(f"Logged event: {kind} for {entity_type}:{entity_id}")
+    # The agent calls behind this event share its trace_id
+    await persist_agent_calls(trace_id)
 
-def generate_contract_pdf(variables: Dict[str, Any], output_path: str):
-    """Generate contract PDF using your custom template"""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=1*inch)
-    styles = getSampleStyleSheet()
-    story = []
-    
-    # Title
-    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], 
-                                fontSize=18, spaceAfter=20, alignment=1)
-    story.append(Paragraph("FREELANCE SERVICES AGREEMENT", title_style))
-    story.append(Spacer(1, 20))
-    
-    # Contract content using your template
-    content_style = ParagraphStyle('Contract', parent=styles['Normal'], 
-                                  fontSize=11, spaceAfter=12, leading=16)
-    
-    # Parties
-    parties_text = f"""
-    This Freelance Services Agreement ("Agreement") is made between:<br/><br/>
-    <b>Client:</b> {variables.get('client_name', 'N/A')}, {variables.get('client_company', 'N/A')}, 
-    with primary contact at {variables.get('client_email', 'N/A')} ("Client")<br/>
-    and<br/>
-    <b>Freelancer:</b> {variables.get('freelancer_name', 'N/A')}, 
-    operating as {variables.get('freelancer_business', 'N/A')} ("Freelancer").
-    """
-    story.append(Paragraph(parties_text, content_style))
-    story.append(Spacer(1, 20))
-    
-    # Section 1: Project Scope
-    scope_text = f"""
-    <b>1. Project Scope</b><br/>
-    Freelancer agrees to perform the following services for Client:<br/>
-    {variables.get('project_description', 'N/A')}<br/><br/>
-    Deliverables will include:<br/>
-    """
-    
-    deliverables = variables.get('deliverables_list', [])
-    for deliverable in deliverables:
-        scope_text += f"• {deliverable}<br/>"
-    
-    story.append(Paragraph(scope_text, content_style))
-    story.append(Spacer(1, 15))
-    
-    # Section 2: Timeline
-    timeline_text = f"""
-    <b>2. Timeline</b><br/>
-    Work will commence on {variables.get('start_date', 'TBD')} and is expected to be completed by {variables.get('end_date', 'TBD')}.<br/><br/>
-    Milestones:<br/>
-    • {variables.get('milestone_1', 'TBD')}<br/>
-    • {variables.get('milestone_2', 'TBD')}<br/>
-    • {variables.get('milestone_3', 'TBD')}<br/>
-    """
-    story.append(Paragraph(timeline_text, content_style))
-    story.append(Spacer(1, 15))
-    
-    # Section 3: Payment Terms
-    payment_text = f"""
-    <b>3. Payment Terms</b><br/>
-    Client agrees to pay Freelancer a total of <b>${variables.get('project_budget', 0):,.2f}</b> for the services described above.<br/><br/>
-    Payment schedule:<br/>
-    • {variables.get('payment_terms', 'Net 30')}<br/><br/>
-    Invoices will be sent via {variables.get('invoice_platform', 'email')} and are payable within {variables.get('net_terms', '30')} days. 
-    Late payments may incur a fee of {variables.get('late_fee', '1.5')}%.
-    """
-    story.append(Paragraph(payment_text, content_style))
-    story.append(Spacer(1, 15))
-    
-    # Sections 4-7: Standard Terms
-    standard_terms = """
-    <b>4. Ownership and Rights</b><br/>
-    Upon receipt of full payment, Client will own the final deliverables. Freelancer retains the right to showcase the work in portfolios or marketing materials.<br/><br/>
-    
-    <b>5. Confidentiality</b><br/>
-    Both parties agree to keep confidential information private, including trade secrets, client data, and sensitive business materials.<br/><br/>
-    
-    <b>6. Termination</b><br/>
-    Either party may terminate this Agreement with written notice. Client must pay for work completed up to the termination date.<br/><br/>
-    
-    <b>7. Governing Law</b><br/>
-    This Agreement will be governed by the laws of """ + variables.get('jurisdiction', 'State of California') + """.<br/><br/>
-    """
-    story.append(Paragraph(standard_terms, content_style))
-    story.append(Spacer(1, 30))
-    
-    # Signatures
-    signature_text = """
-    <b>Signatures</b><br/><br/>
-    Client: ___________________________   Date: ____________<br/><br/>
-    Freelancer: ________________________   Date: ____________
-    """
-    story.append(Paragraph(signature_text, content_style))
-    
-    doc.build(story)
-    buffer.seek(0)
-    return buffer.getvalue()
-
-def generate_invoice_pdf(invoice_data: Dict[str, Any], client_data: Dict[str, Any], freelancer_data: Dict[str, Any], output_path: str):
-    """Generate invoice PDF using your custom template"""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=1*inch)
-    styles = getSampleStyleSheet()
-    story = []
-    
-    # Title
-    title_style = ParagraphStyle('InvoiceTitle', parent=styles['Heading1'], 
-                                fontSize=18, spaceAfter=20, alignment=1)
-    story.append(Paragraph("INVOICE", title_style))
-    story.append(Spacer(1, 20))
-    
-    # Invoice header info
-    header_style = ParagraphStyle('InvoiceHeader', parent=styles['Normal'], 
-                                 fontSize=11, spaceAfter=8)
-    
-    header_text = f"""
-    Invoice Number: {invoice_data.get('invoice_number', 'N/A')}<br/>
-    Date Issued: {invoice_data.get('issue_date', 'N/A')}<br/>
-    Due Date: {invoice_data.get('due_date', 'N/A')}<br/>
-    """
-    story.append(Paragraph(header_text, header_style))
-    story.append(Spacer(1, 20))
-    
-    # Bill To and From
-    parties_style = ParagraphStyle('Parties', parent=styles['Normal'], 
-                                  fontSize=11, spaceAfter=12)
-    
-    parties_text = f"""
-    <b>Bill To:</b><br/>
-    {client_data.get('name', 'N/A')}<br/>
-    {client_data.get('company', '')}<br/>
-    {client_data.get('email', 'N/A')}<br/><br/>
-    
-    <b>From:</b><br/>
-    {freelancer_data.get('name', 'N/A')}<br/>
-    {freelancer_data.get('business', 'N/A')}<br/>
-    {freelancer_data.get('email', 'N/A')}<br/>
-    """
-    story.append(Paragraph(parties_text, parties_style))
-    story.append(Spacer(1, 20))
-    
-    # Project info
-    project_text = f"""
-    <b>Project:</b> {invoice_data.get('project_title', 'N/A')}<br/>
-    Description: {invoice_data.get('project_description', 'N/A')}<br/>
-    """
-    story.append(Paragraph(project_text, parties_style))
-    story.append(Spacer(1, 20))
-    
-    # Line Items
-    line_items_text = "<b>Line Items:</b><br/>"
-    line_items = invoice_data.get('line_items', [])
-    for i, item in enumerate(line_items, 1):
-        line_items_text += f"{i}. {item.get('description', 'N/A')} — ${item.get('amount', 0):,.2f}<br/>"
-    
-    story.append(Paragraph(line_items_text, parties_style))
-    story.append(Spacer(1, 15))
-    
-    # Totals
-    totals_text = f"""
-    <b>Subtotal:</b> ${invoice_data.get('subtotal', 0):,.2f}<br/>
-    <b>Tax ({invoice_data.get('tax_rate', 0)}%):</b> ${invoice_data.get('tax_amount', 0):,.2f}<br/>
-    <b>Total Due:</b> <b>${invoice_data.get('total_due', 0):,.2f}</b><br/>
-    """
-    story.append(Paragraph(totals_text, parties_style))
-    story.append(Spacer(1, 20))
-    
-    # Payment instructions
-    payment_text = f"""
-    <b>Payment Instructions:</b><br/>
-    Please pay via {invoice_data.get('payment_platform', 'Stripe')} using the following link:<br/>
-    {invoice_data.get('payment_link', 'Payment link will be provided')}<br/><br/>
-    
-    Payment is due within {invoice_data.get('net_terms', '30')} days of invoice date. 
-    Late payments may incur a fee of {invoice_data.get('late_fee', '1.5')}%.<br/><br/>
-    
-    Thank you for your business!
-    """
-    story.append(Paragraph(payment_text, parties_style))
-    
-    doc.build(story)
-    buffer.seek(0)
-    return buffer.getvalue()
+async def save_agent_calls(calls: List[Dict[str, Any]]):
+    """Store agent call records; accounting never fails the request it describes"""
+    try:
+        await db.agent_calls.insert_many(calls)
+    except Exception as e:
+        logger.error(f"Agent call accounting error: {e}")
+
+async def persist_agent_calls(trace_id: Optional[str]):
+    """Store the agent calls collected in this request or job under trace_id"""
+    calls = drain_calls()
+    if calls:
+        await save_agent_calls([{**call, "trace_id": trace_id} for call in calls])
+
+def collect_agent_calls(handler):
+    """Wrap a job handler so its agent calls are collected; any not claimed by an event are stored untraced"""
+    async def run(payload: Dict[str, Any]) -> Dict[str, Any]:
+        begin_calls()
+        try:
+            return await handler(payload)
+        finally:
+            await persist_agent_calls(None)
+    return run
+
+async def run_until_disconnect(request: Request, awaitable, deadline: float):
+    """Await agent work, cancelling it (and with it the upstream request) if the client disconnects or the deadline passes"""
+    task = asyncio.ensure_future(awaitable)
+    loop = asyncio.get_running_loop()
+    expires_at = loop.time() + deadline
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=min(DISCONNECT_POLL_INTERVAL, max(expires_at - loop.time(), 0)))
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.info(f"Client disconnected from {request.url.path}, cancelling agent call")
+                raise HTTPException(status_code=499, detail="Client closed request")
+            if loop.time() >= expires_at:
+                logger.warning(f"{request.url.path} exceeded its {deadline}s deadline, cancelling agent call")
+                raise HTTPException(status_code=504, detail="Agent call timed out")
+    finally:
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+def intake_event_kind(status: str) -> EventKind:
+    """Map an intake result status to the event logged for it"""
+    if status == "intake_complete":
+        return EventKind.INTAKE_COMPLETED
+    # unable_to_parse, malicious_email and needs_more_info all need attention
+    return EventKind.INTAKE_NEEDS_INFO
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
 
 # API Endpoints
 
@@ -459,6 +413,7 @@ async def create_project(project_data: ProjectCreate):
         payload=project.dict()
     )
     
+    await schedule_contract_pregeneration(project.id, project.budget, project.owner_id)
     return project
 
 @api_router.get("/projects/{project_id}")
@@ -477,12 +432,20 @@ async def delete_project(project_id: str):
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
         
+        # Delete the stored PDFs of related contracts and invoices
+        for entity_type, collection in PDF_COLLECTIONS.items():
+            async for doc in collection.find({"project_id": project_id}, {"_id": 0, "id": 1}):
+                await pdf_store.delete(entity_type, doc["id"])
+        
         # Delete related contracts
         await db.contracts.delete_many({"project_id": project_id})
         
         # Delete related invoices
         await db.invoices.delete_many({"project_id": project_id})
         
+        # Drop any pre-generated contract draft
+        await contract_drafts.invalidate(project_id)
+        
         # Delete related agent events
         await db.agent_events.delete_many({"entity_id": project_id})
         
@@ -500,27 +463,19 @@ async def delete_project(project_id: str):
 
 # Intake endpoints
 @api_router.post("/intake/parse-email")
-async def parse_email_inquiry(intake_data: IntakeInput):
+async def parse_email_inquiry(intake_data: IntakeInput, request: Request, user_id: Optional[str] = Header(None, alias="X-User-ID")):
     """Process raw email inquiry using Intake Agent"""
     trace_id = str(uuid.uuid4())
     
     try:
-        # Use AI to extract information
-        result = await intake_agent.process_inquiry(intake_data.raw_text)
+        # Use AI to extract information; abandoned if the client leaves or the route deadline passes
+        async with admission.admit(user_id):
+            result = await run_until_disconnect(request, intake_agent.process_inquiry(intake_data.raw_text), INTAKE_ROUTE_DEADLINE)
         
         # Log the intake event based on status
-        if result["status"] == "unable_to_parse":
-            event_kind = EventKind.INTAKE_NEEDS_INFO
-        elif result["status"] == "malicious_email":
-            event_kind = EventKind.INTAKE_NEEDS_INFO
-        elif result["status"] == "intake_complete":
-            event_kind = EventKind.INTAKE_COMPLETED
-        else:
-            event_kind = EventKind.INTAKE_NEEDS_INFO
-
         await log_agent_event(
             trace_id=trace_id,
-            kind=event_kind,
+            kind=intake_event_kind(result["status"]),
             entity_type="intake",
             entity_id=trace_id,
             payload=result
@@ -528,116 +483,332 @@ async def parse_email_inquiry(intake_data: IntakeInput):
         
         return IntakeResult(**result)
         
+    except (HTTPException, AdmissionRejected):
+        raise
     except Exception as e:
         logger.error(f"Intake processing error: {e}")
         raise HTTPException(status_code=500, detail="Failed to process inquiry")
 
+@api_router.post("/intake/parse-email/stream")
+async def stream_email_inquiry(intake_data: IntakeInput, user_id: Optional[str] = Header(None, alias="X-User-ID")):
+    """Process raw email inquiry, pushing each extracted field as a Server-Sent Event"""
+    trace_id = str(uuid.uuid4())
+
+    # Admitted before the response starts so a rejection can still be a 429; the slot is held for the stream
+    admitted_at = await admission.acquire(user_id)
+    released = False
+
+    def release_slot():
+        nonlocal released
+        if not released:
+            released = True
+            admission.release(admitted_at)
+
+    # A client disconnect cancels this generator, which closes the upstream stream mid-generation
+    async def event_stream():
+        try:
+            async with asyncio.timeout(INTAKE_STREAM_DEADLINE):
+                async for kind, data in intake_agent.stream_inquiry(intake_data.raw_text):
+                    if kind == "result":
+                        await log_agent_event(
+                            trace_id=trace_id,
+                            kind=intake_event_kind(data["status"]),
+                            entity_type="intake",
+                            entity_id=trace_id,
+                            payload=data
+                        )
+                        data = IntakeResult(**data).dict()
+                    yield sse_event(kind, data)
+        except TimeoutError:
+            logger.warning(f"Intake stream exceeded its {INTAKE_STREAM_DEADLINE}s deadline")
+            yield sse_event("error", {"detail": "Agent call timed out"})
+        except Exception as e:
+            logger.error(f"Intake streaming error: {e}")
+            yield sse_event("error", {"detail": "Failed to process inquiry"})
+        finally:
+            release_slot()
+
+    # The background task covers a client that disconnects before the stream starts
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(release_slot)
+    )
+
+async def write_intake_results(results: List[Dict[str, Any]], user_id: str,
+                               trace_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Create clients and projects for intake results with one insert per collection.
+
+    Returns one entry per result: project_id and client_id, or an error.
+    """
+    trace_ids = trace_ids or [str(uuid.uuid4()) for _ in results]
+    emails = list({r["client"].get("email") for r in results})
+    existing = await db.clients.find(
+        {"email": {"$in": emails}, "owner_id": user_id}, {"_id": 0, "email": 1, "id": 1}
+    ).to_list(None)
+    client_ids = {c["email"]: c["id"] for c in existing}
+
+    new_clients, projects, events, outcomes = [], [], [], []
+    for result, trace_id in zip(results, trace_ids):
+        try:
+            # Create client if not exists
+            client_data = result["client"]
+            client_id = client_ids.get(client_data["email"])
+            if client_id is None:
+                client = Client(
+                    name=client_data["name"],
+                    email=client_data["email"],
+                    company=client_data.get("company"),
+                    owner_id=user_id
+                )
+                new_clients.append(client.dict())
+                client_id = client_ids[client_data["email"]] = client.id
+
+            # Create project with owner_id
+            project_data = result["project"]
+            project = Project(
+                client_id=client_id,
+                title=project_data["title"],
+                description=project_data["description"],
+                budget=project_data.get("budget"),
+                timeline=project_data.get("timeline"),
+                status=ProjectStatus.INTAKE,
+                owner_id=user_id
+            )
+            projects.append(project.dict())
+            events.append(AgentEvent(
+                trace_id=trace_id,
+                kind=EventKind.INTAKE_COMPLETED,
+                entity_type="project",
+                entity_id=project.id,
+                payload={"client_id": client_id, "project": project.dict(), "user_id": user_id}
+            ).dict())
+            outcomes.append({"project_id": project.id, "client_id": client_id})
+        except Exception as e:
+            outcomes.append({"error": str(e)})
+
+    if new_clients:
+        await db.clients.insert_many(new_clients)
+    if projects:
+        await db.projects.insert_many(projects)
+        await db.agent_events.insert_many(events)
+        logger.info(f"Created {len(projects)} projects from intake for {user_id}")
+    return outcomes
+
 @api_router.post("/intake/create-manual")
 async def create_manual_intake(intake_result: IntakeResult, user_id: str = Header(None, alias="X-User-ID")):
     """Create client and project from manual intake"""
-    trace_id = str(uuid.uuid4())
-    
     try:
         if not user_id:
             raise HTTPException(status_code=401, detail="User ID required")
         
-        # Create client if not exists
-        client_data = intake_result.client
-        existing_client = await db.clients.find_one({"email": client_data["email"], "owner_id": user_id})
+        outcome = (await write_intake_results([intake_result.dict()], user_id))[0]
+        if "error" in outcome:
+            raise ValueError(outcome["error"])
         
-        if not existing_client:
-            client = Client(
-                name=client_data["name"],
-                email=client_data["email"],
-                company=client_data.get("company"),
-                owner_id=user_id
-            )
-            await db.clients.insert_one(client.dict())
-            client_id = client.id
-        else:
-            client_id = existing_client["id"]
+        await schedule_contract_pregeneration(outcome["project_id"], intake_result.project.get("budget"), user_id)
         
-        # Create project with owner_id
-        project_data = intake_result.project
-        project = Project(
-            client_id=client_id,
-            title=project_data["title"],
-            description=project_data["description"],
-            budget=project_data.get("budget"),
-            timeline=project_data.get("timeline"),
-            status=ProjectStatus.INTAKE,
-            owner_id=user_id  # Now includes owner_id
-        )
-        await db.projects.insert_one(project.dict())
-        
-        # Log event
-        await log_agent_event(
-            trace_id=trace_id,
-            kind=EventKind.INTAKE_COMPLETED,
-            entity_type="project",
-            entity_id=project.id,
-            payload={"client_id": client_id, "project": project.dict(), "user_id": user_id}
-        )
-        
-        return {"message": "Project created successfully", "project_id": project.id, "client_id": client_id}
+        return {"message": "Project created successfully", **outcome}
         
     except Exception as e:
         logger.error(f"Manual intake error: {e}")
         raise HTTPException(status_code=500, detail="Failed to create project")
 
+@api_router.post("/intake/bulk", status_code=202)
+async def start_bulk_intake(
+    file: UploadFile = File(...),
+    fmt: Optional[str] = Form(None, alias="format"),
+    concurrency: int = Form(BULK_INTAKE_CONCURRENCY),
+    user_id: str = Header(None, alias="X-User-ID")
+):
+    """Import an mbox or NDJSON upload through the Intake Agent in the background"""
+    if not user_id:
+        raise HTTPException(status_code=401, detail="User ID required")
+    if fmt not in (None, "mbox", "ndjson"):
+        raise HTTPException(status_code=400, detail="Format must be mbox or ndjson")
+    concurrency = min(max(concurrency, 1), BULK_INTAKE_CONCURRENCY)
+
+    # mailbox needs a real file, so spool the upload to disk for the duration of the run
+    suffix = os.path.splitext(file.filename or "")[1]
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as spool:
+        # A large upload would block every other request if copied on the event loop
+        await asyncio.to_thread(shutil.copyfileobj, file.file, spool)
+
+    try:
+        messages = await asyncio.to_thread(count_messages, spool.name, fmt)
+    except Exception as e:
+        os.unlink(spool.name)
+        logger.error(f"Bulk intake upload could not be read: {e}")
+        raise HTTPException(status_code=400, detail="Upload could not be read as mbox or ndjson")
+    if not messages:
+        os.unlink(spool.name)
+        raise HTTPException(status_code=400, detail="No messages to import")
+    # Charged in full, one per message: a run larger than the burst leaves the owner in debt until repaid
+    try:
+        admission.charge(user_id, messages)
+    except AdmissionRejected:
+        os.unlink(spool.name)
+        raise
+
+    run_id = await bulk_intake_runner.create_run(user_id, file.filename or "upload", concurrency)
+    bulk_intake_runner.start(
+        run_id,
+        iter_messages(spool.name, fmt),
+        user_id,
+        concurrency,
+        on_done=lambda: os.unlink(spool.name)
+    )
+    return {"message": "Bulk intake started", "run_id": run_id}
+
+@api_router.get("/intake/bulk/{run_id}")
+async def get_bulk_intake(run_id: str, status: Optional[str] = None, limit: int = 100,
+                          user_id: str = Header(None, alias="X-User-ID")):
+    """Get bulk intake progress and per-message status"""
+    run = await db.intake_runs.find_one({"id": run_id, "owner_id": user_id}, {"_id": 0})
+    if not run:
+        raise HTTPException(status_code=404, detail="Bulk intake run not found")
+
+    query = {"run_id": run_id}
+    if status:
+        query["status"] = status
+    items = await db.intake_run_items.find(query, {"_id": 0}).sort("index", 1).limit(limit).to_list(limit)
+    return {"run": run, "items": items}
+
 # Contract endpoints
-@api_router.post("/contracts/generate")
-async def generate_contract(contract_data: ContractCreate):
-    """Generate contract using Contract Agent"""
-    trace_id = str(uuid.uuid4())
-    
+async def load_contract_inputs(project_id: str):
+    """Project, client and freelancer documents for the Contract Agent prompt; raises ValueError if any is missing"""
+    # Only the fields the prompt and lookups need
+    project = await db.projects.find_one({"id": project_id}, projection(PROJECT_FIELDS, "client_id"))
+    if not project:
+        raise ValueError("Project not found")
+
+    client = await db.clients.find_one({"id": project["client_id"]}, projection(CLIENT_FIELDS, "owner_id"))
+    if not client:
+        raise ValueError("Client not found")
+
+    # Get the user who owns this client (for freelancer info)
+    user = await db.users.find_one({"id": client["owner_id"]}, projection(FREELANCER_FIELDS))
+    if not user:
+        raise ValueError("User not found")
+
+    return project, client, user
+
+async def store_contract(project_id: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+    """Insert a draft contract, move the project to Contract and log the event"""
+    contract = Contract(
+        project_id=project_id,
+        variables=variables,
+        status=ContractStatus.DRAFT
+    )
+    await db.contracts.insert_one(contract.dict())
+
+    # Update project status
+    await db.projects.update_one(
+        {"id": project_id},
+        {"$set": {"status": ProjectStatus.CONTRACT}}
+    )
+
+    # Log event
+    await log_agent_event(
+        trace_id=str(uuid.uuid4()),
+        kind=EventKind.CONTRACT_SENT,
+        entity_type="contract",
+        entity_id=contract.id,
+        payload=contract.dict()
+    )
+
+    await schedule_pdf_render("contract", [contract.id])
+    return contract.dict()
+
+async def run_contract_generation(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: generate contract variables with the Contract Agent and store the draft"""
+    project_id = payload["project_id"]
+    project, client, user = await load_contract_inputs(project_id)
+
+    # A pre-generated draft may have landed since the request was queued
+    variables = await contract_drafts.take(project_id, contract_fingerprint(project, client, user))
+    if variables is None:
+        async with admission.slot():
+            variables = await contract_agent.generate_contract_variables(project, client, user)
+
+    return await store_contract(project_id, variables)
+
+async def run_contract_pregeneration(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: generate contract variables ahead of the user's request and keep them as a draft"""
+    project_id = payload["project_id"]
+    project, client, user = await load_contract_inputs(project_id)
+    if not project.get("budget"):
+        return {"project_id": project_id, "skipped": "no budget"}
+
+    # Speculative work is charged like a request, and skipped rather than delayed when over quota
     try:
-        # Get project and client data
-        project = await db.projects.find_one({"id": contract_data.project_id})
-        if not project:
-            raise HTTPException(status_code=404, detail="Project not found")
-        
-        client = await db.clients.find_one({"id": project["client_id"]})
-        if not client:
-            raise HTTPException(status_code=404, detail="Client not found")
-        
-        # Get the user who owns this client (for freelancer info)
-        user = await db.users.find_one({"id": client["owner_id"]})
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Generate contract variables using AI with user info
-        variables = await contract_agent.generate_contract_variables(project, client, user)
-        
-        # Create contract record
-        contract = Contract(
-            project_id=contract_data.project_id,
-            variables=variables,
-            status=ContractStatus.DRAFT
-        )
-        await db.contracts.insert_one(contract.dict())
-        
-        # Update project status
-        await db.projects.update_one(
-            {"id": contract_data.project_id},
-            {"$set": {"status": ProjectStatus.CONTRACT}}
-        )
-        
-        # Log event
-        await log_agent_event(
-            trace_id=trace_id,
-            kind=EventKind.CONTRACT_SENT,
-            entity_type="contract",
-            entity_id=contract.id,
-            payload=contract.dict()
+        admission.charge(payload.get("owner_id"))
+    except AdmissionRejected:
+        return {"project_id": project_id, "skipped": "over quota"}
+
+    # Fingerprint the inputs read before the call, so an edit made during it makes the draft stale
+    fingerprint = contract_fingerprint(project, client, user)
+    try:
+        async with admission.slot():
+            variables = await contract_agent.generate_contract_variables(project, client, user, fallback=False)
+    except Exception:
+        # Never keep the canned fallback as a draft; the user's request gets a real attempt instead
+        return {"project_id": project_id, "skipped": "contract agent failed"}
+    await contract_drafts.put(project_id, fingerprint, variables)
+    return {"project_id": project_id, "fingerprint": fingerprint}
+
+async def schedule_contract_pregeneration(project_id: str, budget: Optional[float], owner_id: Optional[str] = None):
+    """Queue a speculative contract draft for a new project with a budget; never fails the caller"""
+    if not CONTRACT_PREGENERATE_ENABLED or not budget:
+        return
+    try:
+        await job_queue.enqueue("contract.pregenerate", {"project_id": project_id, "owner_id": owner_id}, owner_id=owner_id)
+    except Exception as e:
+        logger.error(f"Contract pre-generation scheduling error: {e}")
+
+async def contract_from_draft(project_id: str) -> Optional[Dict[str, Any]]:
+    """Store a contract from a pre-generated draft that still matches the project, if there is one"""
+    project, client, user = await load_contract_inputs(project_id)
+    variables = await contract_drafts.take(project_id, contract_fingerprint(project, client, user))
+    if variables is None:
+        return None
+    return await store_contract(project_id, variables)
+
+@api_router.post("/contracts/generate", status_code=202)
+async def generate_contract(
+    contract_data: ContractCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    user_id: Optional[str] = Header(None, alias="X-User-ID")
+):
+    """Generate a contract with the Contract Agent.
+
+    Returns the contract immediately (200) when a pre-generated draft matches the current
+    project, otherwise a job (202) to poll for it. Concurrent requests for the same project,
+    or repeats of an Idempotency-Key, share one job.
+    """
+    try:
+        await load_contract_inputs(contract_data.project_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    admission.charge(user_id)
+
+    try:
+        job = await job_queue.submit(
+            "contract.generate",
+            contract_data.dict(),
+            key=idempotency_key or contract_data.project_id,
+            idempotent=idempotency_key is not None,
+            owner_id=user_id,
+            inline=lambda: contract_from_draft(contract_data.project_id)
         )
-        
-        return contract
-        
     except Exception as e:
         logger.error(f"Contract generation error: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate contract")
 
+    return job_response(job, response)
+
 @api_router.post("/contracts/send")
 async def send_contract(contract_id: str):
     """Send contract for signature"""
@@ -653,102 +824,276 @@ async def send_contract(contract_id: str):
     
     return {"message": "Contract sent for signature", "contract_id": contract_id}
 
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in [tag.removeprefix("W/") for tag in tags]
+
+def pdf_response(pdf_bytes: Optional[bytes], etag: str, filename: str) -> Response:
+    """The PDF with its ETag, or a bodiless 304 when pdf_bytes is None"""
+    # Clients revalidate on every download, so an edited document is never served stale
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if pdf_bytes is None:
+        return Response(status_code=304, headers=headers)
+    headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
+
+async def invoice_pdf_inputs(invoice: Dict[str, Any]) -> Dict[str, Any]:
+    """Everything the invoice template reads; raises ValueError if the project is missing"""
+    project = await db.projects.find_one({"id": invoice["project_id"]})
+    if not project:
+        raise ValueError("Project not found")
+
+    client = await db.clients.find_one({"id": project["client_id"]})
+    user = await db.users.find_one({"id": client["owner_id"]})
+
+    # Prepare professional invoice data
+    invoice_details = invoice.get("details", {})
+
+    # Create comprehensive invoice data for PDF
+    invoice_data = {
+        "invoice_number": invoice_details.get("invoice_number", f"INV-{invoice['id'][:8].upper()}"),
+        "issue_date": invoice_details.get("issue_date", datetime.utcnow().strftime("%Y-%m-%d")),
+        "due_date": invoice_details.get("due_date", invoice["due_date"].strftime("%Y-%m-%d")),
+        "project_title": project.get("title", "N/A"),
+        "project_description": project.get("description", "N/A"),
+        "line_items": invoice_details.get("line_items", []),
+        "subtotal": invoice_details.get("subtotal", invoice["amount"]),
+        "tax_rate": invoice_details.get("tax_rate", 0.0),
+        "tax_amount": invoice_details.get("tax_amount", 0.0),
+        "total_due": invoice_details.get("total_due", invoice["amount"]),
+        "payment_platform": invoice_details.get("payment_platform", "Stripe"),
+        "payment_link": invoice_details.get("payment_link", "Payment link will be provided"),
+        "payment_instructions": invoice_details.get("payment_instructions", "Please process payment according to agreed terms."),
+        "net_terms": invoice_details.get("net_terms", "30"),
+        "late_fee": invoice_details.get("late_fee", "1.5")
+    }
+
+    client_data = {
+        "name": client.get("name", "N/A"),
+        "company": client.get("company", ""),
+        "email": client.get("email", "N/A")
+    }
+
+    freelancer_data = {
+        "name": user.get("name", "N/A"),
+        "business": f"{user.get('name', 'Freelancer').split()[0]} Digital Services",
+        "email": user.get("email", "N/A")
+    }
+
+    return {"invoice_data": invoice_data, "client_data": client_data, "freelancer_data": freelancer_data}
+
+async def pdf_source(entity_type: str, doc: Dict[str, Any]):
+    """Content key of a contract's or invoice's PDF and a function rendering it (through the cache)"""
+    if entity_type == "contract":
+        variables = doc.get("variables", {})
+        key = pdf_cache_key("contract", {"variables": variables})
+        render = lambda: pdf_renderer.render(generate_contract_pdf, variables, "")
+    else:
+        inputs = await invoice_pdf_inputs(doc)
+        key = pdf_cache_key("invoice", inputs)
+        render = lambda: pdf_renderer.render(
+            generate_invoice_pdf, inputs["invoice_data"], inputs["client_data"], inputs["freelancer_data"], ""
+        )
+    return key, lambda: pdf_cache.get_or_render(key, render)
+
+async def serve_pdf(entity_type: str, doc: Dict[str, Any], if_none_match: Optional[str], filename: str) -> Response:
+    """Stream the stored PDF; render on demand only when there is none for the current content"""
+    # The content key covers everything the template reads, so it doubles as a strong ETag
+    key, render = await pdf_source(entity_type, doc)
+    etag = f'"{key}"'
+    if etag_matches(if_none_match, etag):
+        return pdf_response(None, etag, filename)
+
+    grid_out = await pdf_store.open(entity_type, doc["id"], key)
+    if grid_out is not None:
+        return StreamingResponse(
+            iter_chunks(grid_out),
+            media_type="application/pdf",
+            headers={
+                "ETag": etag,
+                "Cache-Control": "private, no-cache",
+                "Content-Length": str(grid_out.length),
+                "Content-Disposition": f"attachment; filename={filename}"
+            }
+        )
+
+    pdf_bytes = await render()
+    # Missing or rendered from since-edited inputs: store the current one for next time
+    await schedule_pdf_render(entity_type, [doc["id"]])
+    return pdf_response(pdf_bytes, etag, filename)
+
 @api_router.get("/contracts/{contract_id}/pdf")
-async def download_contract_pdf(contract_id: str):
-    """Generate and download contract as PDF"""
+async def download_contract_pdf(contract_id: str, if_none_match: Optional[str] = Header(None, alias="If-None-Match")):
+    """Download a contract as PDF, rendered once per distinct contract content"""
     try:
         contract = await db.contracts.find_one({"id": contract_id})
         if not contract:
             raise HTTPException(status_code=404, detail="Contract not found")
         
-        # Get project and client info
+        # Get project info
         project = await db.projects.find_one({"id": contract["project_id"]})
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
         
-        client = await db.clients.find_one({"id": project["client_id"]})
-        
-        # Use the existing professional PDF generator
-        variables = contract.get("variables", {})
-        pdf_bytes = generate_contract_pdf(variables, "")
-        
-        return Response(
-            content=pdf_bytes,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename=contract_{contract_id[:8]}.pdf"}
-        )
+        return await serve_pdf("contract", contract, if_none_match, f"contract_{contract_id[:8]}.pdf")
         
     except HTTPException:
         raise
+    except PdfRenderBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except TimeoutError:
+        logger.error(f"Contract PDF render timed out for {contract_id}")
+        raise HTTPException(status_code=504, detail="PDF generation timed out")
     except Exception as e:
         logger.error(f"PDF generation error: {e}")
         raise HTTPException(status_code=500, detail="PDF generation failed")
 
 @api_router.get("/invoices/{invoice_id}/pdf")
-async def download_invoice_pdf(invoice_id: str):
-    """Generate and download invoice as PDF"""
+async def download_invoice_pdf(invoice_id: str, if_none_match: Optional[str] = Header(None, alias="If-None-Match")):
+    """Download an invoice as PDF, rendered once per distinct invoice content"""
     try:
         invoice = await db.invoices.find_one({"id": invoice_id})
         if not invoice:
             raise HTTPException(status_code=404, detail="Invoice not found")
         
-        # Get project and client info
-        project = await db.projects.find_one({"id": invoice["project_id"]})
-        if not project:
-            raise HTTPException(status_code=404, detail="Project not found")
-        
-        client = await db.clients.find_one({"id": project["client_id"]})
-        user = await db.users.find_one({"id": client["owner_id"]})
-        
-        # Prepare professional invoice data
-        invoice_details = invoice.get("details", {})
-        
-        # Create comprehensive invoice data for PDF
-        invoice_data = {
-            "invoice_number": invoice_details.get("invoice_number", f"INV-{invoice['id'][:8].upper()}"),
-            "issue_date": invoice_details.get("issue_date", datetime.utcnow().strftime("%Y-%m-%d")),
-            "due_date": invoice_details.get("due_date", invoice["due_date"].strftime("%Y-%m-%d")),
-            "project_title": project.get("title", "N/A"),
-            "project_description": project.get("description", "N/A"),
-            "line_items": invoice_details.get("line_items", []),
-            "subtotal": invoice_details.get("subtotal", invoice["amount"]),
-            "tax_rate": invoice_details.get("tax_rate", 0.0),
-            "tax_amount": invoice_details.get("tax_amount", 0.0),
-            "total_due": invoice_details.get("total_due", invoice["amount"]),
-            "payment_platform": invoice_details.get("payment_platform", "Stripe"),
-            "payment_link": invoice_details.get("payment_link", "Payment link will be provided"),
-            "payment_instructions": invoice_details.get("payment_instructions", "Please process payment according to agreed terms."),
-            "net_terms": invoice_details.get("net_terms", "30"),
-            "late_fee": invoice_details.get("late_fee", "1.5")
-        }
-        
-        client_data = {
-            "name": client.get("name", "N/A"),
-            "company": client.get("company", ""),
-            "email": client.get("email", "N/A")
-        }
-        
-        freelancer_data = {
-            "name": user.get("name", "N/A"),
-            "business": f"{user.get('name', 'Freelancer').split()[0]} Digital Services",
-            "email": user.get("email", "N/A")
-        }
-        
-        # Use the existing professional PDF generator
-        pdf_bytes = generate_invoice_pdf(invoice_data, client_data, freelancer_data, "")
-        
-        return Response(
-            content=pdf_bytes,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename=invoice_{invoice_id[:8]}.pdf"}
-        )
+        try:
+            return await serve_pdf("invoice", invoice, if_none_match, f"invoice_{invoice_id[:8]}.pdf")
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
         
     except HTTPException:
         raise
+    except PdfRenderBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except TimeoutError:
+        logger.error(f"Invoice PDF render timed out for {invoice_id}")
+        raise HTTPException(status_code=504, detail="Invoice PDF generation timed out")
     except Exception as e:
         logger.error(f"Invoice PDF generation error: {e}")
         raise HTTPException(status_code=500, detail="Invoice PDF generation failed")
 
+PDF_COLLECTIONS = {"contract": db.contracts, "invoice": db.invoices}
+
+async def run_pdf_render(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: render and store the PDFs of newly written contracts or invoices and set their pdf_url"""
+    entity_type = payload["entity_type"]
+    collection = PDF_COLLECTIONS[entity_type]
+    counts = {"rendered": 0, "current": 0, "failed": 0}
+    # Bounded by the pool size so a large batch never overflows the render queue
+    semaphore = asyncio.Semaphore(max(pdf_renderer.workers, 1))
+
+    async def render_one(entity_id: str):
+        doc = await collection.find_one({"id": entity_id})
+        if doc is None:
+            return
+        try:
+            key, render = await pdf_source(entity_type, doc)
+            if await pdf_store.has(entity_type, entity_id, key):
+                counts["current"] += 1
+            else:
+                async with semaphore:
+                    pdf_bytes = await render()
+                await pdf_store.save(entity_type, entity_id, key, pdf_bytes)
+                counts["rendered"] += 1
+            if doc.get("pdf_url") is None:
+                await collection.update_one({"id": entity_id}, {"$set": {"pdf_url": pdf_url(entity_type, entity_id)}})
+        except Exception as e:
+            logger.error(f"PDF render failed for {entity_type} {entity_id}: {e}")
+            counts["failed"] += 1
+
+    await asyncio.gather(*(render_one(entity_id) for entity_id in payload["ids"]))
+    return counts
+
+async def schedule_pdf_render(entity_type: str, ids: List[str]):
+    """Queue rendering of the PDFs of written documents; never fails the caller"""
+    if not PDF_EAGER_RENDER_ENABLED or not ids:
+        return
+    try:
+        await job_queue.enqueue("pdf.render", {"entity_type": entity_type, "ids": ids})
+    except Exception as e:
+        logger.error(f"PDF render scheduling error: {e}")
+
+async def export_pdf_bytes(entity_type: str, doc: Dict[str, Any]) -> Optional[bytes]:
+    """A document's PDF for an export: the stored one, else rendered (and stored); None if it cannot be made"""
+    try:
+        key, render = await pdf_source(entity_type, doc)
+        grid_out = await pdf_store.open(entity_type, doc["id"], key)
+        if grid_out is not None:
+            return await grid_out.read()
+        pdf_bytes = await render()
+        await pdf_store.save(entity_type, doc["id"], key, pdf_bytes)
+        if doc.get("pdf_url") is None:
+            await PDF_COLLECTIONS[entity_type].update_one(
+                {"id": doc["id"]}, {"$set": {"pdf_url": pdf_url(entity_type, doc["id"])}}
+            )
+        return pdf_bytes
+    except Exception as e:
+        logger.error(f"PDF export failed for {entity_type} {doc['id']}: {e}")
+        return None
+
+@api_router.get("/exports/pdfs")
+async def export_pdfs(
+    start: datetime,
+    end: datetime,
+    types: str = "invoice,contract",
+    user_id: str = Header(None, alias="X-User-ID")
+):
+    """Stream a ZIP of the caller's invoice and contract PDFs created in [start, end).
+
+    Entries are written as their PDFs arrive, stored ones read and missing ones rendered a few
+    ahead in parallel, so memory stays flat however large the archive is.
+    """
+    if not user_id:
+        raise HTTPException(status_code=401, detail="User ID required")
+    entity_types = [entity_type.strip() for entity_type in types.split(",") if entity_type.strip()]
+    unknown = [entity_type for entity_type in entity_types if entity_type not in PDF_COLLECTIONS]
+    if unknown or not entity_types:
+        raise HTTPException(status_code=400, detail=f"types must be a list of: {', '.join(PDF_COLLECTIONS)}")
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+
+    project_ids = [
+        project["id"] for project in
+        await db.projects.find({"owner_id": user_id}, {"_id": 0, "id": 1}).to_list(None)
+    ]
+
+    async def documents():
+        for entity_type in entity_types:
+            async for doc in PDF_COLLECTIONS[entity_type].find(
+                {"project_id": {"$in": project_ids}, "created_at": {"$gte": start, "$lt": end}}, {"_id": 0}
+            ).sort("created_at", 1):
+                yield entity_type, doc
+
+    async def archive():
+        archive = ZipStream()
+        failed = []
+        # Read-ahead capped by the pool size, so an export never fills the render queue on its own
+        window = max(min(PDF_EXPORT_PREFETCH, pdf_renderer.workers * 2), 1)
+        async for (entity_type, doc), pdf_bytes in prefetch(
+            documents(), lambda item: export_pdf_bytes(*item), window=window
+        ):
+            created_at = doc.get("created_at") or start
+            name = f"{entity_type}s/{created_at:%Y-%m-%d}_{entity_type}_{doc['id'][:8]}.pdf"
+            if pdf_bytes is None:
+                failed.append(name)
+                continue
+            yield archive.add(name, pdf_bytes, created_at)
+        if failed:
+            # The response is already under way, so documents that could not be rendered are listed in the archive
+            note = "These documents could not be rendered; download them individually:\n" + "\n".join(failed) + "\n"
+            yield archive.add("export_errors.txt", note.encode("utf-8"), datetime.utcnow())
+        yield archive.close()
+
+    filename = f"documents_{start:%Y-%m-%d}_{end:%Y-%m-%d}.zip"
+    return StreamingResponse(
+        archive(),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
 @api_router.get("/contracts/status/{contract_id}")
 async def get_contract_status(contract_id: str):
     contract = await db.contracts.find_one({"id": contract_id})
@@ -758,65 +1103,240 @@ async def get_contract_status(contract_id: str):
     return Contract(**contract)
 
 # Invoice endpoints
-@api_router.post("/invoices/create")
-async def create_invoice(invoice_data: InvoiceCreate):
-    """Create invoice using Billing Agent"""
+async def run_invoice_creation(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: generate invoice details with the Billing Agent and store the invoice"""
     trace_id = str(uuid.uuid4())
-    
+    project_id = payload["project_id"]
+
+    # Get project and related data (only the fields the prompt and lookups need)
+    project = await db.projects.find_one({"id": project_id}, projection(PROJECT_FIELDS, "client_id"))
+    if not project:
+        raise ValueError("Project not found")
+
+    client = await db.clients.find_one({"id": project["client_id"]}, projection([], "owner_id"))
+    if not client:
+        raise ValueError("Client not found")
+
+    user = await db.users.find_one({"id": client["owner_id"]}, projection([], "id"))
+    if not user:
+        raise ValueError("User not found")
+
+    # Bill against the project's contract when there is one, preferring a signed contract
+    contract = await db.contracts.find_one(
+        {"project_id": project_id, "status": ContractStatus.SIGNED}, {"_id": 0, "status": 1, "variables": 1}, sort=[("created_at", -1)]
+    ) or await db.contracts.find_one(
+        {"project_id": project_id}, {"_id": 0, "status": 1, "variables": 1}, sort=[("created_at", -1)]
+    )
+    sequence = await db.invoices.count_documents({"project_id": project_id})
+
+    # Derive invoice details from the contract, or generate them with AI when it has nothing usable
+    async with admission.slot():
+        invoice_details = await billing_agent.generate_invoice_data(
+            project,
+            payload["amount"],
+            payload["mode"],
+            contract_variables=(contract or {}).get("variables"),
+            sequence=sequence,
+            contract_signed=(contract or {}).get("status") == ContractStatus.SIGNED
+        )
+
+    # Create invoice with enhanced structure
+    invoice = Invoice(
+        project_id=project_id,
+        amount=payload["amount"],
+        due_date=datetime.strptime(invoice_details["due_date"], "%Y-%m-%d"),
+        status=InvoiceStatus.SENT
+    )
+
+    # Store the full invoice details in the invoice record
+    invoice_dict = invoice.dict()
+    invoice_dict["details"] = invoice_details
+
+    await db.invoices.insert_one(invoice_dict)
+
+    # Update project status
+    await db.projects.update_one(
+        {"id": project_id},
+        {"$set": {"status": ProjectStatus.BILLING}}
+    )
+
+    # Log event
+    await log_agent_event(
+        trace_id=trace_id,
+        kind=EventKind.INVOICE_SENT,
+        entity_type="invoice",
+        entity_id=invoice.id,
+        payload={"invoice": invoice.dict(), "details": invoice_details}
+    )
+
+    await schedule_pdf_render("invoice", [invoice.id])
+
+    # Return invoice with details
+    result = invoice.dict()
+    result["details"] = invoice_details
+    return result
+
+@api_router.post("/invoices/create", status_code=202)
+async def create_invoice(
+    invoice_data: InvoiceCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    user_id: Optional[str] = Header(None, alias="X-User-ID")
+):
+    """Queue invoice creation with the Billing Agent; poll the returned job for the invoice.
+
+    Concurrent identical requests for a project, or repeats of an Idempotency-Key, share one job.
+    """
+    project = await db.projects.find_one({"id": invoice_data.project_id}, {"_id": 0, "id": 1})
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    admission.charge(user_id)
+
     try:
-        # Get project and related data
-        project = await db.projects.find_one({"id": invoice_data.project_id})
-        if not project:
-            raise HTTPException(status_code=404, detail="Project not found")
-        
-        client = await db.clients.find_one({"id": project["client_id"]})
-        if not client:
-            raise HTTPException(status_code=404, detail="Client not found")
-            
-        user = await db.users.find_one({"id": client["owner_id"]})
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Generate invoice details using AI
-        invoice_details = await billing_agent.generate_invoice_data(project, invoice_data.amount, invoice_data.mode)
-        
-        # Create invoice with enhanced structure
-        invoice = Invoice(
-            project_id=invoice_data.project_id,
-            amount=invoice_data.amount,
-            due_date=datetime.strptime(invoice_details["due_date"], "%Y-%m-%d"),
-            status=InvoiceStatus.SENT
+        job = await job_queue.submit(
+            "invoice.create",
+            invoice_data.dict(),
+            # Concurrent requests for one project only coalesce when they ask for the same invoice
+            key=idempotency_key or f"{invoice_data.project_id}:{payload_key(invoice_data.dict())}",
+            idempotent=idempotency_key is not None,
+            owner_id=user_id
         )
-        
-        # Store the full invoice details in the invoice record
-        invoice_dict = invoice.dict()
-        invoice_dict["details"] = invoice_details
-        
-        await db.invoices.insert_one(invoice_dict)
-        
-        # Update project status
-        await db.projects.update_one(
-            {"id": invoice_data.project_id},
-            {"$set": {"status": ProjectStatus.BILLING}}
+    except Exception as e:
+        logger.error(f"Invoice creation error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to create invoice")
+
+    return job_response(job, response)
+
+async def run_bulk_invoice_creation(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: create many invoices, deriving from contracts first and batching Billing Agent calls for the rest"""
+    # Batched calls serve several invoices, so the whole run shares one trace
+    trace_id = str(uuid.uuid4())
+    entries = payload["invoices"]
+    project_ids = list({entry["project_id"] for entry in entries})
+
+    projects = {
+        project["id"]: project
+        for project in await db.projects.find({"id": {"$in": project_ids}}, projection(PROJECT_FIELDS, "id")).to_list(None)
+    }
+    # Latest contract per project, a signed one taking precedence over later unsigned ones
+    contracts: Dict[str, Dict[str, Any]] = {}
+    async for contract in db.contracts.find(
+        {"project_id": {"$in": project_ids}}, {"_id": 0, "project_id": 1, "status": 1, "variables": 1}
+    ).sort("created_at", 1):
+        current = contracts.get(contract["project_id"])
+        if current is None or contract["status"] == ContractStatus.SIGNED or current["status"] != ContractStatus.SIGNED:
+            contracts[contract["project_id"]] = contract
+    sequences = {
+        row["_id"]: row["count"]
+        async for row in db.invoices.aggregate([
+            {"$match": {"project_id": {"$in": project_ids}}},
+            {"$group": {"_id": "$project_id", "count": {"$sum": 1}}}
+        ])
+    }
+
+    details: List[Optional[Dict[str, Any]]] = [None] * len(entries)
+    outcomes: List[Dict[str, Any]] = [{"project_id": entry["project_id"]} for entry in entries]
+    pending = []
+    for i, entry in enumerate(entries):
+        project = projects.get(entry["project_id"])
+        if project is None:
+            outcomes[i]["error"] = "Project not found"
+            continue
+        sequence = sequences.get(entry["project_id"], 0)
+        sequences[entry["project_id"]] = sequence + 1
+        contract = contracts.get(entry["project_id"], {})
+        details[i] = billing_agent.derive_from_contract(
+            project, entry["amount"], entry["mode"], contract.get("variables"), sequence,
+            contract_signed=contract.get("status") == ContractStatus.SIGNED
         )
-        
-        # Log event
-        await log_agent_event(
+        if details[i] is None:
+            pending.append(i)
+
+    semaphore = asyncio.Semaphore(BILLING_BATCH_CONCURRENCY)
+
+    async def run_batch(indexes: List[int]):
+        async with semaphore, admission.slot():
+            batch = await billing_agent.generate_line_items_batch([
+                {"project": projects[entries[i]["project_id"]], "amount": entries[i]["amount"], "mode": entries[i]["mode"]}
+                for i in indexes
+            ])
+        for i, result in zip(indexes, batch):
+            if result is not None:
+                details[i] = result
+                continue
+            # Entries the batch got wrong are retried on their own
+            async with admission.slot():
+                details[i] = await billing_agent.generate_invoice_data(
+                    projects[entries[i]["project_id"]], entries[i]["amount"], entries[i]["mode"]
+                )
+
+    await asyncio.gather(*(
+        run_batch(pending[start:start + BILLING_BATCH_SIZE]) for start in range(0, len(pending), BILLING_BATCH_SIZE)
+    ))
+
+    invoices, events = [], []
+    for i, entry in enumerate(entries):
+        if details[i] is None:
+            continue
+        try:
+            invoice = Invoice(
+                project_id=entry["project_id"],
+                amount=entry["amount"],
+                due_date=datetime.strptime(details[i]["due_date"], "%Y-%m-%d"),
+                status=InvoiceStatus.SENT
+            )
+        except Exception as e:
+            outcomes[i]["error"] = str(e)
+            continue
+        invoices.append({**invoice.dict(), "details": details[i]})
+        events.append(AgentEvent(
             trace_id=trace_id,
             kind=EventKind.INVOICE_SENT,
             entity_type="invoice",
             entity_id=invoice.id,
-            payload={"invoice": invoice.dict(), "details": invoice_details}
+            payload={"invoice": invoice.dict(), "details": details[i]}
+        ).dict())
+        outcomes[i]["invoice_id"] = invoice.id
+
+    if invoices:
+        await db.invoices.insert_many(invoices)
+        await db.projects.update_many(
+            {"id": {"$in": list({invoice["project_id"] for invoice in invoices})}},
+            {"$set": {"status": ProjectStatus.BILLING}}
+        )
+        await db.agent_events.insert_many(events)
+        logger.info(f"Created {len(invoices)} invoices in bulk ({len(pending)} needed the billing agent)")
+        await schedule_pdf_render("invoice", [invoice["id"] for invoice in invoices])
+    await persist_agent_calls(trace_id)
+
+    return {"created": len(invoices), "failed": len(entries) - len(invoices), "invoices": outcomes}
+
+@api_router.post("/invoices/bulk", status_code=202)
+async def create_invoices_bulk(
+    bulk_data: BulkInvoiceCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    user_id: Optional[str] = Header(None, alias="X-User-ID")
+):
+    """Queue creation of many invoices; line items the contracts do not define are generated in batched calls"""
+    if not bulk_data.invoices:
+        raise HTTPException(status_code=400, detail="No invoices to create")
+    # Charged by the number of batched agent calls the run can make
+    admission.charge(user_id, math.ceil(len(bulk_data.invoices) / BILLING_BATCH_SIZE))
+
+    try:
+        job = await job_queue.submit(
+            "invoice.bulk",
+            bulk_data.dict(),
+            key=idempotency_key or str(uuid.uuid4()),
+            idempotent=idempotency_key is not None,
+            owner_id=user_id
         )
-        
-        # Return invoice with details
-        result = invoice.dict()
-        result["details"] = invoice_details
-        return result
-        
     except Exception as e:
-        logger.error(f"Invoice creation error: {e}")
-        raise HTTPException(status_code=500, detail="Failed to create invoice")
+        logger.error(f"Bulk invoice creation error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to create invoices")
+
+    return job_response(job, response)
 
 @api_router.get("/invoices/{invoice_id}")
 async def get_invoice(invoice_id: str):
@@ -911,6 +1431,88 @@ async def get_agent_activity(limit: int = 50):
     events = await db.agent_events.find().sort("created_at", -1).limit(limit).to_list(limit)
     return [AgentEvent(**event) for event in events]
 
+@api_router.get("/dashboard/agent-metrics")
+async def get_agent_metrics():
+    """Get agent runtime and cache counters for this worker"""
+    return {
+        "runtime": get_runtime().stats(),
+        "routing": get_router().stats(),
+        "context": get_context_builder().stats(),
+        "intake_cache": intake_cache.stats(),
+        "intake": intake_agent.stats(),
+        "billing": billing_agent.stats(),
+        "contract_drafts": contract_drafts.stats(),
+        "jobs": job_queue.stats(),
+        "admission": admission.stats(),
+        "pdf_render": pdf_renderer.stats(),
+        "pdf_cache": pdf_cache.stats(),
+        "pdf_store": pdf_store.stats()
+    }
+
+@api_router.get("/dashboard/agent-calls/latency")
+async def get_agent_call_latency(days: int = 7):
+    """Per-agent and source call latency (p50/p95 wall time and time to first token), parse success and fallbacks"""
+    since = datetime.utcnow() - timedelta(days=days)
+    groups = await db.agent_calls.aggregate([
+        {"$match": {"created_at": {"$gte": since}}},
+        {"$group": {
+            "_id": {"agent": "$agent", "source": "$source"},
+            "calls": {"$sum": 1},
+            "wall_ms": {"$push": "$wall_ms"},
+            "ttft_ms": {"$push": "$ttft_ms"},
+            "errors": {"$sum": {"$cond": [{"$ifNull": ["$error", False]}, 1, 0]}},
+            "fallbacks": {"$sum": {"$cond": [{"$ifNull": ["$fallback_reason", False]}, 1, 0]}},
+            "parsed": {"$sum": {"$cond": [{"$eq": ["$parse_ok", True]}, 1, 0]}},
+            "unparsed": {"$sum": {"$cond": [{"$eq": ["$parse_ok", False]}, 1, 0]}}
+        }},
+        {"$sort": {"_id.agent": 1, "_id.source": 1}}
+    ]).to_list(None)
+
+    # Percentiles are taken here rather than in the pipeline, which older MongoDB servers cannot do
+    latency = []
+    for group in groups:
+        ttft = [value for value in group["ttft_ms"] if value is not None]
+        parse_checked = group["parsed"] + group["unparsed"]
+        latency.append({
+            **group["_id"],
+            "calls": group["calls"],
+            "wall_ms_p50": percentile(group["wall_ms"], 50),
+            "wall_ms_p95": percentile(group["wall_ms"], 95),
+            "ttft_ms_p50": percentile(ttft, 50),
+            "ttft_ms_p95": percentile(ttft, 95),
+            "errors": group["errors"],
+            "fallbacks": group["fallbacks"],
+            "parse_success_rate": round(group["parsed"] / parse_checked, 3) if parse_checked else None
+        })
+    return {"days": days, "agents": latency}
+
+@api_router.get("/dashboard/agent-calls/tokens")
+async def get_agent_call_tokens(days: int = 30):
+    """Tokens per day and agent"""
+    since = datetime.utcnow() - timedelta(days=days)
+    rows = await db.agent_calls.aggregate([
+        {"$match": {"created_at": {"$gte": since}}},
+        {"$group": {
+            "_id": {"day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}, "agent": "$agent"},
+            "calls": {"$sum": {"$cond": [{"$eq": ["$source", "model"]}, 1, 0]}},
+            "input_tokens": {"$sum": "$input_tokens"},
+            "output_tokens": {"$sum": "$output_tokens"},
+            "cache_write_tokens": {"$sum": "$cache_write_tokens"},
+            "cache_read_tokens": {"$sum": "$cache_read_tokens"}
+        }},
+        {"$sort": {"_id.day": 1, "_id.agent": 1}}
+    ]).to_list(None)
+    return {"days": days, "tokens": [{**row.pop("_id"), **row} for row in rows]}
+
+@api_router.get("/dashboard/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """Agent events and the agent calls behind them for one trace"""
+    events = await db.agent_events.find({"trace_id": trace_id}).sort("created_at", 1).to_list(None)
+    calls = await db.agent_calls.find({"trace_id": trace_id}, {"_id": 0}).sort("created_at", 1).to_list(None)
+    if not events and not calls:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return {"trace_id": trace_id, "events": [AgentEvent(**event) for event in events], "calls": calls}
+
 # Webhook endpoints
 @api_router.post("/webhooks/stripe")
 async def stripe_webhook():
@@ -1074,9 +1676,53 @@ async def cleanup_demo_data():
         logger.error(f"Cleanup error: {e}")
         return {"message": "Cleanup completed with some errors", "error": str(e)}
 
+# Background jobs
+job_queue.register("contract.generate", collect_agent_calls(run_contract_generation), timeout=CONTRACT_JOB_DEADLINE)
+job_queue.register("contract.pregenerate", collect_agent_calls(run_contract_pregeneration), timeout=CONTRACT_JOB_DEADLINE)
+job_queue.register("invoice.create", collect_agent_calls(run_invoice_creation), timeout=INVOICE_JOB_DEADLINE)
+job_queue.register("invoice.bulk", collect_agent_calls(run_bulk_invoice_creation), timeout=INVOICE_BULK_JOB_DEADLINE)
+job_queue.register("pdf.render", run_pdf_render, timeout=PDF_RENDER_JOB_DEADLINE)
+
+@api_router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status of a queued contract/invoice job; result holds the created document once succeeded"""
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 # Include the router in the main app
 app.include_router(api_router)
 
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+class AgentCallMiddleware:
+    """Collect the agent calls made while handling each request; those not claimed by an agent event
+    (failed, cancelled or event-less requests) are stored untraced once the response is done.
+
+    Plain ASGI rather than BaseHTTPMiddleware, which would hide client disconnects from the endpoints.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        begin_calls()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await persist_agent_calls(None)
+
+app.add_middleware(AgentCallMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -1085,10 +1731,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def create_indexes():
+    await intake_cache.ensure_indexes()
+    await db.intake_runs.create_index("id", unique=True)
+    await db.intake_run_items.create_index([("run_id", 1), ("index", 1)])
+    await job_queue.ensure_indexes()
+    await contract_drafts.ensure_indexes()
+    await pdf_store.ensure_indexes()
+    await db.agent_events.create_index("trace_id")
+    await db.agent_calls.create_index("trace_id")
+    await db.agent_calls.create_index([("created_at", 1), ("agent", 1)])
+
+@app.on_event("startup")
+async def recover_bulk_intake_runs():
+    await bulk_intake_runner.recover()
+
+@app.on_event("startup")
+async def start_job_workers():
+    await job_queue.start()
+
+@app.on_event("startup")
+async def start_pdf_renderer():
+    await pdf_renderer.start()
+
+@app.on_event("shutdown")
+async def drain_job_workers():
+    # Runs before the Mongo client and agent runtime are closed
+    await job_queue.stop()
+
+@app.on_event("shutdown")
+async def stop_bulk_intake_runs():
+    await bulk_intake_runner.stop()
+
+@app.on_event("shutdown")
+async def stop_pdf_renderer():
+    await pdf_renderer.stop()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
 
+@app.on_event("shutdown")
+async def shutdown_agent_runtime():
+    await close_runtime()
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    # PDF render workers are spawned, and spawn re-imports the parent's __main__ in every worker:
+    # run as a script, each worker would rebuild the Mongo client, agents and queues above
+    raise SystemExit("Run the backend with: uvicorn server:app --host 0.0.0.0 --port 8001")
\ No newline at end of file
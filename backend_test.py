@@ -35,7 +35,8 @@ class FreeFlowAPITester:
             elif method == 'DELETE':
                 response = requests.delete(url, headers=headers, timeout=10)
 
-            success = response.status_code == expected_status
+            expected = expected_status if isinstance(expected_status, tuple) else (expected_status,)
+            success = response.status_code in expected
             if success:
                 self.tests_passed += 1
                 print(f"✅ Passed - Status: {response.status_code}")
@@ -58,6 +59,25 @@ class FreeFlowAPITester:
             print(f"❌ Failed - Error: {str(e)}")
             return False, {}
 
+    def wait_for_job(self, job_id, timeout=60, interval=1):
+        """Poll a background job until it succeeds or fails; returns its result or None"""
+        url = f"{self.base_url}/jobs/{job_id}"
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                job = requests.get(url, timeout=10).json()
+            except Exception as e:
+                print(f"❌ Job poll failed - Error: {str(e)}")
+                return None
+            if job.get('status') == 'succeeded':
+                return job.get('result')
+            if job.get('status') == 'failed':
+                print(f"❌ Job {job_id} failed: {job.get('error')}")
+                return None
+            time.sleep(interval)
+        print(f"❌ Job {job_id} did not finish within {timeout}s")
+        return None
+
     def test_root_endpoint(self):
         """Test root API endpoint"""
         return self.run_test("Root API Endpoint", "GET", "", 200)
@@ -265,10 +285,13 @@ class FreeFlowAPITester:
             "AI Contract Generation",
             "POST",
             "contracts/generate",
-            200,
+            (200, 202),
             data=contract_data
         )
         
+        if success and 'job_id' in response:
+            response = response.get('result') or self.wait_for_job(response['job_id']) or {}
+        
         if success and 'id' in response:
             self.contract_id = response['id']
             print("📄 Contract Variables Generated:")
@@ -299,10 +322,13 @@ class FreeFlowAPITester:
             "AI Invoice Creation",
             "POST",
             "invoices/create",
-            200,
+            202,
             data=invoice_data
         )
         
+        if success and 'job_id' in response:
+            response = self.wait_for_job(response['job_id']) or {}
+        
         if success and 'id' in response:
             self.invoice_id = response['id']
             return True
@@ -1,4 +1,4 @@
-import { useState } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import {
   Mail,
   Bot,
@@ -28,6 +28,16 @@ import axios from 'axios';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 
+// Fields shown in the processing card as they arrive from the streaming intake endpoint
+const STREAMED_FIELD_LABELS = [
+  ['client.name', 'Client'],
+  ['client.email', 'Email'],
+  ['client.company', 'Company'],
+  ['project.title', 'Project'],
+  ['project.budget', 'Budget'],
+  ['project.timeline', 'Timeline']
+];
+
 const Inbox = () => {
   // Added for demo - Get user from localStorage
   const user = JSON.parse(localStorage.getItem('freeflow_user'));
@@ -35,10 +45,15 @@ const Inbox = () => {
   const [rawMessage, setRawMessage] = useState('');
   const [extractedData, setExtractedData] = useState(null);
   const [loading, setLoading] = useState(false);
+  const [streamedFields, setStreamedFields] = useState({});
   const [processing, setProcessing] = useState(false);
   const [projectCreated, setProjectCreated] = useState(false);
   const [projectId, setProjectId] = useState(null);
   const [showProjectSuccessModal, setShowProjectSuccessModal] = useState(false);
+  const streamAbort = useRef(null);
+
+  // Leaving the page closes an in-flight stream so the backend stops the agent call
+  useEffect(() => () => streamAbort.current?.abort(), []);
 
   // Example email for demonstration
   const exampleEmail = `Hi there!
@@ -59,19 +74,61 @@ Acme Corporation`;
     
     setLoading(true);
     setExtractedData(null);
+    setStreamedFields({});
     
+    streamAbort.current?.abort();
+    const controller = new AbortController();
+    streamAbort.current = controller;
+
     try {
-      const response = await axios.post(`${BACKEND_URL}/api/intake/parse-email`, {
-        raw_text: rawMessage
+      // Stream extracted fields as Server-Sent Events so they show up before the full result
+      const response = await fetch(`${BACKEND_URL}/api/intake/parse-email/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'X-User-ID': user.id },
+        body: JSON.stringify({ raw_text: rawMessage }),
+        signal: controller.signal
       });
-      
-      setExtractedData(response.data);
+      if (!response.ok || !response.body) {
+        throw new Error(`Request failed with status ${response.status}`);
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let result = null;
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const messages = buffer.split('\n\n');
+        buffer = messages.pop();
+
+        for (const message of messages) {
+          const event = message.match(/^event: (.*)$/m)?.[1];
+          const data = message.match(/^data: (.*)$/m)?.[1];
+          if (!event || data === undefined) continue;
+
+          const payload = JSON.parse(data);
+          if (event === 'field') {
+            setStreamedFields(prev => ({ ...prev, [payload.path]: payload.value }));
+          } else if (event === 'result') {
+            result = payload;
+          } else if (event === 'error') {
+            throw new Error(payload.detail);
+          }
+        }
+      }
+
+      if (!result) throw new Error('Stream ended without a result');
+      setExtractedData(result);
     } catch (error) {
+      if (controller.signal.aborted) return;
       console.error('Error processing email:', error);
       alert('Unable to process email. Please try again.');
       setExtractedData(null);
     } finally {
-      setLoading(false);
+      if (!controller.signal.aborted) setLoading(false);
     }
   };
 
@@ -280,6 +337,15 @@ Acme Corporation`;
                   <p className="text-blue-700">Analyzing email with Claude Sonnet 4</p>
                   <p className="text-sm text-blue-600 mt-2">This usually takes 3-5 seconds</p>
                 </div>
+                {Object.keys(streamedFields).length > 0 && (
+                  <div className="w-full text-left bg-white/60 rounded-lg p-4 space-y-1 text-sm">
+                    {STREAMED_FIELD_LABELS.filter(([path]) => streamedFields[path] !== undefined && streamedFields[path] !== null && streamedFields[path] !== '').map(([path, label]) => (
+                      <p key={path} className="text-blue-900">
+                        <span className="font-medium">{label}:</span> {String(streamedFields[path])}
+                      </p>
+                    ))}
+                  </div>
+                )}
               </div>
             </Card>
           )}
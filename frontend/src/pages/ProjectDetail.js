@@ -26,6 +26,17 @@ import { Tabs, TabsContent, TabsList, TabsTrigger } from '../components/ui/tabs'
 import axios from 'axios';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+const JOB_POLL_INTERVAL_MS = 1000;
+
+// Contract and invoice generation run as background jobs; poll until the job finishes
+const waitForJob = async (jobId) => {
+  for (;;) {
+    const { data: job } = await axios.get(`${BACKEND_URL}/api/jobs/${jobId}`);
+    if (job.status === 'succeeded') return job.result;
+    if (job.status === 'failed') throw new Error(job.error || 'Job failed');
+    await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+};
 
 const ProjectDetail = ({ user }) => {
   const { id } = useParams();
@@ -82,9 +93,10 @@ const ProjectDetail = ({ user }) => {
       const response = await axios.post(`${BACKEND_URL}/api/contracts/generate`, {
         project_id: id,
         template_id: "standard_freelance_contract"
-      });
+      }, {headers: { 'X-User-ID': user.id }});
 
-      setContract(response.data);
+      // A pre-generated draft comes back already completed
+      setContract(response.data.result || await waitForJob(response.data.job_id));
 
       // Update project status
       setProject(prev => ({ ...prev, status: 'Contract' }));
@@ -111,9 +123,9 @@ const ProjectDetail = ({ user }) => {
         project_id: id,
         amount: project.budget || 0,
         mode: "fixed"
-      });
+      }, {headers: { 'X-User-ID': user.id }});
       
-      setInvoices([response.data]);
+      setInvoices([response.data.result || await waitForJob(response.data.job_id)]);
 
       // Update project status
       setProject(prev => ({ ...prev, status: 'Billing' }));
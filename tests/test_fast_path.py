@@ -0,0 +1,71 @@
+import pytest
+
+from agents.fast_path import FastPathExtractor
+
+INQUIRY = """From: Dana Whitfield <dana@northwind.example>
+Subject: New website for Northwind
+{budget_line}
+Hi there,
+I am Dana from Northwind. We need a new website with a product catalogue, a blog and contact forms,
+{budget_sentence} and we want it live within 6 weeks.
+
+Thanks,
+Dana Whitfield
+"""
+
+def inquiry(budget_line: str = "", budget_sentence: str = "the details are below") -> str:
+    return INQUIRY.format(budget_line=budget_line, budget_sentence=budget_sentence)
+
+@pytest.fixture
+def extractor():
+    return FastPathExtractor()
+
+def test_single_labelled_budget_takes_the_fast_path(extractor):
+    result = extractor.try_extract(inquiry(budget_line="Budget: $8,000"))
+    assert result is not None
+    assert result["project"]["budget"] == 8000.0
+    assert result["confidence"]["budget"] == 1.0
+
+def test_single_budget_in_the_body_takes_the_fast_path(extractor):
+    result = extractor.try_extract(inquiry(budget_sentence="our budget is $8,000"))
+    assert result is not None
+    assert result["project"]["budget"] == 8000.0
+
+@pytest.mark.parametrize("budget_line", [
+    "Budget: $3,000 - $6,000",
+    "Budget: $3k-$6k",
+    "Budget: 5-10k",
+    "Budget: 3k to 6k",
+    "Budget: between $3,000 and $6,000",
+])
+def test_labelled_budget_range_goes_to_the_model(extractor, budget_line):
+    result, confidence = extractor.extract(inquiry(budget_line=budget_line))
+    assert result["project"]["budget"] is None
+    assert result["confidence"]["budget"] == 0.0
+    assert confidence < extractor.threshold
+    assert extractor.try_extract(inquiry(budget_line=budget_line)) is None
+
+@pytest.mark.parametrize("budget_line", [
+    "Budget: $80/hour",
+    "Budget: $80 / hr",
+    "Budget: $2,000 per month",
+    "Budget: $500 a week",
+    "Budget: $1,500 monthly retainer",
+])
+def test_labelled_rate_goes_to_the_model(extractor, budget_line):
+    assert extractor.try_extract(inquiry(budget_line=budget_line)) is None
+
+@pytest.mark.parametrize("budget_sentence", [
+    "our budget is $3,000 - $6,000",
+    "we can pay $80 per hour",
+    "we pay $80/hr",
+    "the budget is around $5k-$10k",
+])
+def test_ambiguous_budget_in_the_body_goes_to_the_model(extractor, budget_sentence):
+    assert extractor.try_extract(inquiry(budget_sentence=budget_sentence)) is None
+
+def test_timeline_without_budget_still_takes_the_fast_path(extractor):
+    result = extractor.try_extract(inquiry())
+    assert result is not None
+    assert result["project"]["budget"] is None
+    assert result["project"]["timeline"] == "within 6 weeks"
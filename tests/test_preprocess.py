@@ -0,0 +1,57 @@
+from agents.preprocess import InquiryPreprocessor, strip_boilerplate
+
+LEGAL_FOOTER = (
+    "CONFIDENTIALITY NOTICE: This email and any attachments are confidential and may be legally privileged. "
+    "If you are not the intended recipient, please notify the sender and delete it."
+)
+NOT_RECIPIENT = "If you are not the intended recipient of this message, any use of it is strictly prohibited."
+SCANNED = "This email has been scanned for viruses by ExampleMail."
+
+def test_trailing_disclaimer_is_removed():
+    text = "Hi,\n\nWe need a new landing page.\n\nThanks,\nDana\n\n" + LEGAL_FOOTER
+    cleaned = strip_boilerplate(text)
+    assert "CONFIDENTIALITY" not in cleaned
+    assert "We need a new landing page." in cleaned
+    assert "Dana" in cleaned
+
+def test_run_of_trailing_disclaimers_is_removed():
+    text = "We need a mobile app.\n\nBest,\nSam\n\n" + NOT_RECIPIENT + "\n\n" + SCANNED
+    cleaned = strip_boilerplate(text)
+    assert "intended recipient" not in cleaned
+    assert "scanned" not in cleaned
+
+def test_disclaimer_after_signature_is_removed_even_if_not_last():
+    text = "We need a dashboard.\n\nRegards,\nAlex\n\n" + LEGAL_FOOTER + "\n\nAlex Kim | Acme Corp | alex@acme.example"
+    cleaned = strip_boilerplate(text)
+    assert "CONFIDENTIALITY" not in cleaned
+    assert "alex@acme.example" in cleaned
+
+def test_confidential_requirements_paragraph_is_kept():
+    paragraph = (
+        "We need a partner portal rebuilt by March and our budget is $12k. This is confidential, "
+        "and you would sign a legally binding NDA before we share the designs."
+    )
+    text = "Hi,\n\n" + paragraph + "\n\nThanks,\nDana"
+    assert paragraph in strip_boilerplate(text)
+
+def test_disclaimer_shaped_paragraph_with_money_is_kept():
+    paragraph = "This message is confidential: the budget for the redesign is $12,000."
+    assert paragraph in strip_boilerplate("Hello,\n\n" + paragraph)
+
+def test_keywords_alone_do_not_make_a_disclaimer():
+    paragraph = "Our data is confidential and legally sensitive, so security matters a lot to us."
+    text = "Hi,\n\n" + paragraph + "\n\nCheers,\nRiley"
+    assert paragraph in strip_boilerplate(text)
+
+def test_disclaimer_in_the_middle_before_the_signature_is_kept():
+    text = NOT_RECIPIENT + "\n\nWe need an API integration.\n\nThanks,\nDana"
+    assert NOT_RECIPIENT in strip_boilerplate(text)
+
+def test_budget_reaches_the_model_after_preprocessing():
+    text = (
+        "Hi,\n\nWe need a partner portal rebuilt; budget is $12k, this is confidential and "
+        "covered by a legally binding NDA.\n\nThanks,\nDana\n\n" + LEGAL_FOOTER
+    )
+    processed = InquiryPreprocessor().process(text)
+    assert "$12k" in processed
+    assert "CONFIDENTIALITY" not in processed